@@ -1,9 +1,60 @@
-from flask import Flask, jsonify, request
+import json
+import logging
+import os
+import time
+from collections import deque
+from functools import wraps
+from flask import Flask, Response, jsonify, request
+from werkzeug.exceptions import RequestEntityTooLarge
 from binarytrees import BinaryTreeNode, RedBlackTreeNode, RedBlackTreeColor
-from evaluation import example_evaluation
+from evaluation import (COMPACT_REQUEST_MIMETYPE, CachedSolution, EvaluationTimeoutError, InvalidRequestError,
+                        ServiceOverloadedError, collect_phase_timings, create_concurrency_limiter,
+                        create_evaluation_executor, create_request_profiler, create_tree_image_renderer,
+                        create_tree_request_limits,
+                        example_evaluation, grading_metrics, open_exercise_bank, parse_batch_request,
+                        parse_compact_request, parse_tree_request, solution_cache, time_phase)
+from evaluation.metrics import format_prometheus_gauges
 
 
+# The received trees are only written to the log with LOG_LEVEL=DEBUG.
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"))
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
+# Larger request bodies are rejected with 413 before they are read (configured with MAX_REQUEST_BYTES, default 16 MiB).
+app.config["MAX_CONTENT_LENGTH"] = int(os.environ.get("MAX_REQUEST_BYTES", str(16 * 1024 * 1024)))
+# Limits on the number of nodes, the depth and the values of the trees in a request, which are checked while it is parsed
+# (configured with MAX_TREE_NODES, MAX_TREE_DEPTH, MIN_TREE_VALUE and MAX_TREE_VALUE).
+tree_request_limits = create_tree_request_limits()
+# Runs the evaluation functions inline or in worker processes (configured with EVALUATION_WORKERS and EVALUATION_TIMEOUT).
+evaluation_executor = create_evaluation_executor()
+# Limits the number of requests evaluated at once (configured with MAX_CONCURRENT_EVALUATIONS and MAX_QUEUE_WAIT).
+evaluation_limiter = create_concurrency_limiter("evaluations")
+# Renders images in its own threads, e.g. tree_image_renderer.render(solution_tree, "Solution"),
+# so slow renders do not hold up requests which only grade (configured with MAX_CONCURRENT_RENDERS).
+tree_image_renderer = create_tree_image_renderer()
+# Precomputed exam instances with their solutions (the file given by EXERCISE_BANK, created with generate_exercises.py), or None.
+# A route grading an instance of the bank takes its solution from exercise_bank.get_solution(instance_id) instead of computing it.
+exercise_bank = open_exercise_bank()
+# Profiles requests with the X-Profile header containing PROFILE_TOKEN or a sampled fraction of them into a directory
+# (configured with PROFILE_DIRECTORY, PROFILE_SAMPLE_RATE and PROFILE_TOKEN, disabled by default).
+request_profiler = create_request_profiler()
+
+
+def profiled(route: str):
+    """Decorator profiling the requests to the route which are selected by request_profiler.
+    If profiling is disabled, the route is returned unchanged, so it costs nothing.
+    """
+    def decorate(view):
+        if not request_profiler.is_enabled():
+            return view
+
+        @wraps(view)
+        def profiled_view(*args, **kwargs):
+            with request_profiler.profile(route, request.headers):
+                return view(*args, **kwargs)
+        return profiled_view
+    return decorate
 
 
 @app.route("/", methods=["GET"])
@@ -12,52 +63,185 @@ def index():
 
 
 @app.route("/example-route", methods=["POST"])
+@profiled("example-route")
 def example_route():
     """Example route showcasing how a route should be handled.
     It takes the inputs, passes them to an evaluation function elsewhere and then answers with an example score and feedback.
+    The inputs are either JSON (the trees as dictionaries or as Base64 text of the compact binary format)
+    or a binary body in the compact format. Trees sent in the compact format get the solution in the compact format as well.
     """
-    print("A request has arrived!")
-    data = request.get_json()
-
-    if not data:
+    logger.debug("A request has arrived")
+    # The durations of the phases of the request are recorded in the metrics exported by /metrics.
+    with collect_phase_timings() as phase_timings:
+        if request.mimetype == COMPACT_REQUEST_MIMETYPE:
+            with time_phase("from_dict"):
+                try:
+                    existing_tree, student_tree, values = parse_compact_request(request.get_data(), BinaryTreeNode, tree_request_limits)
+                    # existing_tree, student_tree, values = parse_compact_request(request.get_data(), RedBlackTreeNode, tree_request_limits) # In case it would have been a red-black tree
+                except InvalidRequestError as error:
+                    return jsonify({"error": str(error)}), 400
+                except ValueError:
+                    return jsonify({"error": "The trees could not be parsed from the request body"}), 400
+            compact_solution = True
+        else:
+            if not request.is_json:
+                return jsonify({"error": "Invalid JSON"}), 400
+
+            # Parse the trees into the structure based on the task (rb-tree or bin-search-tree) while the request body is read,
+            # so a request exceeding the limits is rejected before it has been read completely.
+            # (Assuming your task requires an existing tree as input. If not, the existing tree is simply None.)
+            # Trees sent as Base64 text of the compact format get the solution in the compact format as well.
+            with time_phase("json_parse"):
+                try:
+                    existing_tree, student_tree, values, compact_solution = parse_tree_request(
+                        request.stream, BinaryTreeNode, tree_request_limits)
+                    # existing_tree, student_tree, values, compact_solution = parse_tree_request(request.stream, RedBlackTreeNode, tree_request_limits) # In case it would have been a red-black tree
+                except InvalidRequestError as error:
+                    return jsonify({"error": str(error)}), 400
+
+        # Write the received trees to the log if they exist. They are only formatted if debug logging is enabled.
+        if logger.isEnabledFor(logging.DEBUG):
+            if existing_tree:
+                logger.debug("Here is a text representation of the existing tree:\n%s", existing_tree.format_tree())
+            if student_tree:
+                logger.debug("Here is a text representation of the student tree:\n%s", student_tree.format_tree())
+
+        # 1. Solve the task yourself (with existing_tree and or values, depending on task)
+        # 2. Compare your solution with the student tree
+        # 3. Calculate a score and generate feedback text
+        # 4. Send response
+        try:
+            with evaluation_limiter.limit(), time_phase("evaluation"):
+                example_score, example_feedback, example_solution = evaluation_executor.evaluate(
+                    example_evaluation, existing_tree, values, student_tree)
+        except EvaluationTimeoutError:
+            return jsonify({"error": "The evaluation of the submission took too long"}), 503
+
+        with time_phase("to_dict"):
+            response = evaluation_response(example_score, example_feedback, example_solution, compact_solution)
+    grading_metrics.observe("example-route", phase_timings, student_tree)
+    return response
+
+
+@app.route("/example-route/batch", methods=["POST"])
+def example_route_batch():
+    """Batch version of the example route, which grades many submissions for the same task in one request.
+    It takes the task definition once together with a list of student trees ("student_trees").
+    The shared inputs are parsed once and the solution is computed once (through the solution cache).
+    The results are streamed back as NDJSON while they are produced, one line per submission in the order of the list:
+    {"feedback": ..., "index": ..., "score": ...} or {"error": ..., "index": ...} if the student tree is invalid
+    or exceeds the limits.
+    """
+    # Only the phases of the request as a whole are timed, the results are produced after the route has returned.
+    phase_timings = {}
+    # The route is not decorated with @profiled, since the results are produced after it has returned and a profile of the route
+    # would only cover parsing the request. The profile is entered in generate_results instead, so it covers grading the submissions.
+    profile = request_profiler.profile("example-route/batch", request.headers)
+    if not request.is_json:
         return jsonify({"error": "Invalid JSON"}), 400
 
-    # Get the data
-    existing_tree_json_data = data.get("existing_tree")
-    student_tree_json_data = data.get("student_tree")
-    values = data.get("values")
-
-    # Parse the trees into the structure based on the task (rb-tree or bin-search-tree).
-    # (Assuming your task requires an existing tree as input. If not, you can skip it and only parse the student tree.)
+    # All trees are built while the request body is read, with the same limits as single requests.
+    # A student tree which is invalid or exceeds them takes the place of its tree as an InvalidRequestError,
+    # while more than MAX_BATCH_SIZE student trees or more than MAX_TREE_NODES nodes in all of them reject the whole batch.
+    start = time.perf_counter()
     try:
-        existing_tree = BinaryTreeNode.from_dict(existing_tree_json_data)
-        # existing_tree = RedBlackTreeNode.from_dict(existing_tree_json_data) # In case it would have been a red-black tree
-    except:
-        jsonify({"error": "Existing tree could not be parsed from JSON"}), 400
+        existing_tree, student_trees, values = parse_batch_request(request.stream, BinaryTreeNode, tree_request_limits)
+        # existing_tree, student_trees, values = parse_batch_request(request.stream, RedBlackTreeNode, tree_request_limits) # In case it would have been a red-black tree
+    except InvalidRequestError as error:
+        return jsonify({"error": str(error)}), 400
+    phase_timings["json_parse"] = time.perf_counter() - start
+    # The slot is held until the whole response has been sent.
+    evaluation_limiter.acquire()
+
+    # Outcome of each student tree in order: an error message or None if it was handed to the executor.
+    parse_outcomes = deque()
+
+    def get_student_trees():
+        for index, student_tree in enumerate(student_trees):
+            if isinstance(student_tree, InvalidRequestError):
+                parse_outcomes.append((index, str(student_tree)))
+                continue
+            parse_outcomes.append((index, None))
+            yield student_tree
+
+    def generate_results():
+        with profile:
+            start = time.perf_counter()
+            yield from generate_evaluation_results()
+            phase_timings["evaluation"] = time.perf_counter() - start
+            grading_metrics.observe("example-route/batch", phase_timings, existing_tree)
+
+    def generate_evaluation_results():
+        # The executor yields the results in order, so all parse errors in front of a result are sent first.
+        evaluation_results = evaluation_executor.evaluate_many(
+            example_evaluation, existing_tree, values, get_student_trees())
+        for evaluation_result in evaluation_results:
+            index, parse_error = parse_outcomes.popleft()
+            while parse_error is not None:
+                yield _ndjson_line({"error": parse_error, "index": index})
+                index, parse_error = parse_outcomes.popleft()
+            if isinstance(evaluation_result, EvaluationTimeoutError):
+                yield _ndjson_line({"error": "The evaluation of the submission took too long", "index": index})
+            elif isinstance(evaluation_result, Exception):
+                yield _ndjson_line({"error": "The submission could not be evaluated", "index": index})
+            else:
+                score, feedback, _ = evaluation_result
+                yield _ndjson_line({"feedback": feedback, "index": index, "score": score})
+        for index, parse_error in parse_outcomes:
+            yield _ndjson_line({"error": parse_error, "index": index})
+
+    response = Response(generate_results(), mimetype="application/x-ndjson")
+    response.call_on_close(evaluation_limiter.release)
+    return response
+
+
+@app.route("/exercises/<int:instance_id>", methods=["GET"])
+def exercise(instance_id: int):
+    """Hands out an instance of the exercise bank: its task, existing tree and values in the JSON format of the requests.
+    """
+    if exercise_bank is None or instance_id not in exercise_bank:
+        return jsonify({"error": f"There is no exercise instance {instance_id}"}), 404
+    return jsonify(exercise_bank.get_instance(instance_id).to_dict())
 
-    try:
-        student_tree = BinaryTreeNode.from_dict(student_tree_json_data)
-        # student_tree = RedBlackTreeNode.from_dict(student_tree_json_data) # In case it would have been a red-black tree
-    except:
-        jsonify({"error": "Student tree could not be parsed from JSON"}), 400
-
-    # Print the received trees to the log if they exist
-    if existing_tree:
-        print("Here is a text representation of the existing tree:")
-        existing_tree.print_tree()
-
-    if student_tree:
-        print("Here is a text representation of the student tree:")
-        student_tree.print_tree()
-
-    # 1. Solve the task yourself (with existing_tree and or values, depending on task)
-    # 2. Compare your solution with the student tree
-    # 3. Calculate a score and generate feedback text
-    # 4. Send response
-    example_score, example_feedback, example_solution = example_evaluation(
-        existing_tree, values, student_tree)
-
-    return jsonify({"score": example_score, "feedback": example_feedback, "solution": example_solution.to_dict()})
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Exports the durations of the request phases as histograms and the statistics of the solution cache
+    in the Prometheus text format.
+    """
+    body = "".join([
+        grading_metrics.to_prometheus_text(),
+        format_prometheus_gauges("grading_solution_cache", solution_cache.get_stats(), "Solution cache of this process"),
+        format_prometheus_gauges("grading_evaluation_limiter", evaluation_limiter.get_stats(), "Concurrent evaluations"),
+        format_prometheus_gauges("grading_render_limiter", tree_image_renderer.get_stats(), "Concurrent renders"),
+    ])
+    return app.response_class(body, mimetype="text/plain; version=0.0.4")
+
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_entity_too_large(error: RequestEntityTooLarge):
+    return jsonify({"error": f"The request must not be larger than {app.config['MAX_CONTENT_LENGTH']} bytes"}), 413
+
+
+@app.errorhandler(ServiceOverloadedError)
+def service_overloaded(error: ServiceOverloadedError):
+    response = jsonify({"error": str(error)})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
+def _ndjson_line(result: dict[str, any]) -> str:
+    return json.dumps(result, separators=(",", ":")) + "\n"
+
+
+def evaluation_response(score: int, feedback: str, solution: CachedSolution, compact_solution: bool = False) -> Response:
+    """Creates the JSON response of a graded submission.
+    The solution is inserted as its cached JSON text, so it does not have to be serialized again for every request.
+    With compact_solution the solution is inserted as Base64 text of the compact binary format instead.
+    """
+    solution_text = f'"{solution.to_base64()}"' if compact_solution else solution.to_json()
+    body = f'{{"feedback":{json.dumps(feedback)},"score":{json.dumps(score)},"solution":{solution_text}}}\n'
+    return app.response_class(body, mimetype="application/json")
 
 
 if __name__ == "__main__":
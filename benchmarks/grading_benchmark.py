@@ -0,0 +1,188 @@
+"""Measures the latency of the operations used for grading on synthetic trees.
+For every tree shape and size, parsing (from_dict), serializing (to_dict), copying (deep_copy), traversing,
+comparing (is_equal_including_subtrees), rendering (generate_tree_image) and an end-to-end POST to /example-route
+through Flask's test client are timed. Operations which fail (e.g. by hitting the recursion limit) are reported with their error.
+
+Run from the repository root:
+> python benchmarks/grading_benchmark.py --output results.json
+> python benchmarks/grading_benchmark.py --baseline results.json
+
+The script prints a JSON report. If a baseline report is given, the median of each operation is compared with it
+and the script exits with status 1 if an operation became slower than the tolerance allows or started failing.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from collections.abc import Callable
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPOSITORY_ROOT)
+
+from benchmarks.tree_generators import SHAPES, generate_tree  # noqa: E402
+from binarytrees import BinaryTreeNode, RedBlackTreeNode, configure_render_cache  # noqa: E402
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+OPERATIONS = ("parse", "serialize", "copy", "traverse", "compare", "render_graphviz", "render_python", "post")
+# Graphviz is measured with its default PNG output. The pure Python engine is measured with SVG output,
+# since drawing a PNG of a deep tree is dominated by filling the huge canvas.
+RENDER_FORMATS = {"graphviz": "png", "python": "svg"}
+# Rendering and the end-to-end request process the whole tree several times, so they are only measured up to these sizes by default.
+DEFAULT_MAX_RENDER_SIZE = 1000
+DEFAULT_MAX_POST_SIZE = 10000
+
+
+def measure(run: Callable[[], object], setup: Callable[[], None] | None, repetitions: int, time_budget: float) -> dict[str, any]:
+    """Runs the operation up to repetitions times (at least once, but stops early once time_budget seconds are used)
+    and returns the median and minimum duration in milliseconds, or the error if it failed.
+    """
+    durations = []
+    try:
+        while len(durations) < repetitions and (not durations or sum(durations) < time_budget):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            run()
+            durations.append(time.perf_counter() - start)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"[:200]}
+    return {
+        "median_ms": round(statistics.median(durations) * 1000, 4),
+        "min_ms": round(min(durations) * 1000, 4),
+        "repetitions": len(durations),
+    }
+
+
+def benchmark_tree(shape: str, size: int, seed: int, arguments: argparse.Namespace) -> list[dict[str, any]]:
+    tree = generate_tree(shape, size, seed)
+    node_class = RedBlackTreeNode if isinstance(tree, RedBlackTreeNode) else BinaryTreeNode
+    tree_dict = tree.to_dict()
+    other_tree = node_class.from_dict(tree_dict)
+    repetitions, budget = arguments.repetitions, arguments.time_budget
+
+    def invalidate_digests():
+        # Otherwise the comparison would only measure the lookup of the digests cached by the previous repetition.
+        tree.invalidate_structural_digests(include_subtree=True)
+        other_tree.invalidate_structural_digests(include_subtree=True)
+
+    timings = {
+        "parse": lambda: measure(lambda: node_class.from_dict(tree_dict), None, repetitions, budget),
+        "serialize": lambda: measure(tree.to_dict, None, repetitions, budget),
+        "copy": lambda: measure(tree.deep_copy, None, repetitions, budget),
+        "traverse": lambda: measure(tree.inorder_traverse, None, repetitions, budget),
+        "compare": lambda: measure(lambda: tree.is_equal_including_subtrees(other_tree), invalidate_digests, repetitions, budget),
+    }
+    if size <= arguments.max_render_size:
+        for engine, image_format in RENDER_FORMATS.items():
+            timings[f"render_{engine}"] = lambda engine=engine, image_format=image_format: measure(
+                lambda: tree.generate_tree_image("Benchmark", engine=engine, image_format=image_format), None, repetitions, budget)
+    if size <= arguments.max_post_size and node_class is BinaryTreeNode:
+        timings["post"] = lambda: measure_post(tree_dict, repetitions, budget)
+
+    results = []
+    for operation in OPERATIONS:
+        if operation in timings:
+            results.append({"shape": shape, "size": size, "operation": operation, **timings[operation]()})
+    return results
+
+
+def measure_post(tree_dict: dict[str, any], repetitions: int, time_budget: float) -> dict[str, any]:
+    """Sends the tree as existing tree and student tree to /example-route. The solution cache is cleared before
+    each request, so that the solution is computed every time like for the first submission of an exercise.
+    """
+    from app import app
+    from evaluation import solution_cache
+    client = app.test_client()
+    body = {"existing_tree": tree_dict, "values": [-1], "student_tree": tree_dict}
+
+    def post():
+        response = client.post("/example-route", json=body)
+        if response.status_code != 200:
+            raise RuntimeError(f"/example-route answered with status {response.status_code}")
+
+    return measure(post, solution_cache.clear, repetitions, time_budget)
+
+
+def compare_with_baseline(results: list[dict[str, any]], baseline: dict[str, any], tolerance: float,
+                          min_difference_ms: float) -> list[dict[str, any]]:
+    """Returns the operations whose median became more than tolerance (a fraction) and more than min_difference_ms slower
+    than in the baseline, or which failed although they succeeded in the baseline.
+    The absolute threshold keeps the noise of operations taking microseconds from being reported.
+    """
+    baseline_results = {(result["shape"], result["size"], result["operation"]): result
+                        for result in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        baseline_result = baseline_results.get((result["shape"], result["size"], result["operation"]))
+        if baseline_result is None or "error" in baseline_result:
+            continue
+        if "error" in result:
+            regressions.append({**result, "baseline_median_ms": baseline_result["median_ms"]})
+            continue
+        ratio = result["median_ms"] / baseline_result["median_ms"] if baseline_result["median_ms"] else 1.0
+        result["baseline_median_ms"] = baseline_result["median_ms"]
+        result["ratio"] = round(ratio, 3)
+        if ratio > 1 + tolerance and result["median_ms"] - baseline_result["median_ms"] > min_difference_ms:
+            regressions.append(result)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=list(SHAPES), help="tree shapes to measure")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES),
+                        help=f"numbers of nodes, e.g. 10 100 1000000 (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the tree generators")
+    parser.add_argument("--repetitions", type=int, default=5, help="maximum number of measurements per operation")
+    parser.add_argument("--time-budget", type=float, default=2.0,
+                        help="seconds after which no further repetitions of an operation are started")
+    parser.add_argument("--max-render-size", type=int, default=DEFAULT_MAX_RENDER_SIZE,
+                        help="largest tree for which rendering is measured")
+    parser.add_argument("--max-post-size", type=int, default=DEFAULT_MAX_POST_SIZE,
+                        help="largest tree for which the end-to-end request is measured")
+    parser.add_argument("--output", help="file to which the report is written in addition to printing it")
+    parser.add_argument("--baseline", help="report of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown compared with the baseline as a fraction (default: 0.25)")
+    parser.add_argument("--min-difference-ms", type=float, default=0.5,
+                        help="slowdowns of at most this many milliseconds are never reported (default: 0.5)")
+    arguments = parser.parse_args()
+
+    # Every image is rendered again instead of being taken from the render cache.
+    configure_render_cache(max_entries=0)
+    results = []
+    for shape in arguments.shapes:
+        for size in sorted(arguments.sizes):
+            results.extend(benchmark_tree(shape, size, arguments.seed, arguments))
+
+    report = {
+        "metadata": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": arguments.seed,
+            "repetitions": arguments.repetitions,
+        },
+        "results": results,
+    }
+    failed = False
+    if arguments.baseline is not None:
+        with open(arguments.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, arguments.tolerance, arguments.min_difference_ms)
+        report["baseline"] = {"file": arguments.baseline, "tolerance": arguments.tolerance,
+                              "min_difference_ms": arguments.min_difference_ms, "regressions": regressions}
+        failed = bool(regressions)
+    text = json.dumps(report, indent=4)
+    if arguments.output is not None:
+        with open(arguments.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Guards the import time of the packages against regressions.
+Worker processes and scripts import the packages on every cold start, so importing them must stay cheap.
+In particular, the imaging stack (Graphviz and Pillow) must only be loaded when an image is rendered.
+
+Run from the repository root:
+> python benchmarks/import_time.py
+
+The imports are measured with `python -X importtime`. The script prints a JSON report
+and exits with status 1 if a budget is exceeded or a forbidden module was imported.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Maximum cumulative import time in milliseconds per package (the fastest of all runs is compared).
+DEFAULT_BUDGETS_MS = {
+    "binarytrees": 100.0,
+    "evaluation": 150.0,
+}
+
+# Top-level modules, which must not be imported as a side effect of importing the packages.
+FORBIDDEN_MODULES = ("graphviz", "PIL", "multiprocessing")
+
+
+def measure_import(module: str) -> tuple[float, set[str]]:
+    """Imports the module in a fresh interpreter and returns its cumulative import time in milliseconds
+    and the names of all top-level modules imported along with it.
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               cwd=REPOSITORY_ROOT, capture_output=True, text=True, check=True)
+    cumulative_us = None
+    imported = set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        imported.add(name.split(".")[0])
+        if name == module:
+            cumulative_us = int(cumulative)
+    if cumulative_us is None:
+        raise RuntimeError(f"Import time of {module} could not be measured")
+    return cumulative_us / 1000, imported
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5,
+                        help="number of measurements per package, the fastest one is used")
+    for module, budget in DEFAULT_BUDGETS_MS.items():
+        parser.add_argument(f"--{module}-budget-ms", type=float, default=budget,
+                            help=f"maximum import time of {module} in milliseconds (default: {budget})")
+    arguments = parser.parse_args()
+
+    report = {}
+    failed = False
+    for module in DEFAULT_BUDGETS_MS:
+        budget = getattr(arguments, f"{module}_budget_ms")
+        measurements = [measure_import(module) for _ in range(arguments.runs)]
+        fastest = min(milliseconds for milliseconds, _ in measurements)
+        forbidden = sorted(set(FORBIDDEN_MODULES).intersection(measurements[0][1]))
+        passed = fastest <= budget and not forbidden
+        failed = failed or not passed
+        report[module] = {
+            "import_time_ms": round(fastest, 2),
+            "budget_ms": budget,
+            "forbidden_imports": forbidden,
+            "passed": passed,
+        }
+    print(json.dumps(report, indent=4))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""Seeded generators for synthetic trees used by the benchmarks.
+The same shape, size and seed always result in the same tree.
+"""
+
+import random
+from binarytrees import (BinaryTreeNode, RedBlackTreeNode, RedBlackTreeColor,
+                         insert_values_into_binary_search_tree, insert_values_into_red_black_tree)
+
+# balanced: complete binary search tree, degenerate: every node only has a right child (sorted insertion),
+# random: binary search tree from inserting the values in random order,
+# red_black: valid red-black tree, invalid_red_black: red-black tree in which one node has the wrong color.
+SHAPES = ("balanced", "degenerate", "random", "red_black", "invalid_red_black")
+
+
+def generate_tree(shape: str, size: int, seed: int = 0) -> BinaryTreeNode | RedBlackTreeNode:
+    """Generates a tree of the shape with size distinct values.
+    """
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown shape '{shape}'. Must be one of {', '.join(SHAPES)}.")
+    if size < 1:
+        raise ValueError("Size must be at least 1")
+    generator = random.Random(f"{shape}:{size}:{seed}")
+    values = generator.sample(range(10 * size), size)
+    if shape == "balanced":
+        return BinaryTreeNode.from_sorted_values(sorted(values))
+    if shape == "degenerate":
+        return _generate_degenerate_tree(sorted(values))
+    if shape == "random":
+        return insert_values_into_binary_search_tree(None, values)
+    tree = insert_values_into_red_black_tree(None, values)
+    if shape == "invalid_red_black":
+        # Changing the color of any single node of a valid red-black tree violates the black root rule or the black heights.
+        node = generator.choice(tree.preorder_traverse())
+        node.set_color(RedBlackTreeColor.RED if node.get_color() is RedBlackTreeColor.BLACK else RedBlackTreeColor.BLACK)
+    return tree
+
+
+def _generate_degenerate_tree(sorted_values: list[int]) -> BinaryTreeNode:
+    root = node = BinaryTreeNode(sorted_values[0])
+    for value in sorted_values[1:]:
+        node._right = BinaryTreeNode(value, parent=node)
+        node = node._right
+    return root
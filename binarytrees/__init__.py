@@ -1,5 +1,30 @@
 from ._classes.BinaryTreeNode import BinaryTreeNode
 from ._classes.RedBlackTreeNode import RedBlackTreeNode
+from ._classes.CompactBinaryTree import CompactBinaryTree
+from ._classes.PersistentBinaryTree import PersistentBinaryTree
+from ._classes.TreeViolation import TreeViolation
+from ._classes.TreeOperationStep import TreeOperationStep
+from ._classes.TreeEdit import TreeEdit
 from ._enums.RedBlackTreeColor import RedBlackTreeColor
+from ._enums.TreeViolationRule import TreeViolationRule
+from ._enums.TreeOperationStepKind import TreeOperationStepKind
+from ._enums.TreeEditOperation import TreeEditOperation
+from ._validation.validate_binary_tree import validate_binary_search_tree, validate_red_black_tree
+from ._comparison.tree_edit_distance import compute_tree_edit_distance
+from ._operations.binary_search_tree_operations import (insert_into_binary_search_tree, insert_values_into_binary_search_tree,
+                                                      delete_from_binary_search_tree, delete_values_from_binary_search_tree,
+                                                      rotate_left, rotate_right, replay_tree_operation_steps)
+from ._operations.red_black_tree_operations import (insert_into_red_black_tree, insert_values_into_red_black_tree,
+                                                   delete_from_red_black_tree, delete_values_from_red_black_tree)
+from ._visualization.render_cache import RenderCache, configure_render_cache
 
-__all__ = ["BinaryTreeNode", "RedBlackTreeNode", "RedBlackTreeColor"]
+__all__ = ["BinaryTreeNode", "RedBlackTreeNode",
+           "CompactBinaryTree", "PersistentBinaryTree", "TreeViolation", "TreeOperationStep", "TreeEdit",
+           "RedBlackTreeColor", "TreeViolationRule", "TreeOperationStepKind", "TreeEditOperation",
+           "validate_binary_search_tree", "validate_red_black_tree", "compute_tree_edit_distance",
+           "insert_into_binary_search_tree", "insert_values_into_binary_search_tree",
+           "delete_from_binary_search_tree", "delete_values_from_binary_search_tree",
+           "insert_into_red_black_tree", "insert_values_into_red_black_tree",
+           "delete_from_red_black_tree", "delete_values_from_red_black_tree",
+           "rotate_left", "rotate_right", "replay_tree_operation_steps",
+           "RenderCache", "configure_render_cache"]
@@ -0,0 +1,131 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from binarytrees._classes.BinaryTreeNode import BinaryTreeNode
+
+# Augmented nodes cache the statistics of their subtree in _augmentation as [height, size, black height],
+# nodes which are not augmented store None. The height and the black height count nodes (a leaf has height 1,
+# a black leaf has black height 1), missing children count as 0. For a subtree whose paths have different
+# black heights (an invalid red-black tree), the larger one is stored.
+# Either all nodes of a tree are augmented or none. The setters and the operations keep the statistics up to date
+# by calling update_augmentation for the lowest node whose children or color changed.
+HEIGHT = 0
+SIZE = 1
+BLACK_HEIGHT = 2
+
+_EMPTY_SUBTREE = (0, 0, 0)
+
+
+def compute_statistics(node: BinaryTreeNode) -> list[int]:
+    """Computes the statistics of the node from the cached statistics of its children.
+    """
+    left = node._left._augmentation if node._left is not None else _EMPTY_SUBTREE
+    right = node._right._augmentation if node._right is not None else _EMPTY_SUBTREE
+    return [max(left[HEIGHT], right[HEIGHT]) + 1, left[SIZE] + right[SIZE] + 1,
+            max(left[BLACK_HEIGHT], right[BLACK_HEIGHT]) + node._is_black_node()]
+
+
+def compute_subtree_statistics(root: BinaryTreeNode, store: bool) -> list[int]:
+    """Computes the statistics of all nodes of the subtree in postorder without recursion.
+    With store, they are cached in the nodes, which makes the subtree augmented.
+    Returns the statistics of the root.
+    """
+    statistics = []
+    # Stack entries: node and whether its children have been processed.
+    stack = [(root, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if not children_done:
+            stack.append((node, True))
+            if node._right is not None:
+                stack.append((node._right, False))
+            if node._left is not None:
+                stack.append((node._left, False))
+            continue
+        # The statistics of the children are the last ones on the statistics stack, the right one on top.
+        right = statistics.pop() if node._right is not None else _EMPTY_SUBTREE
+        left = statistics.pop() if node._left is not None else _EMPTY_SUBTREE
+        node_statistics = [max(left[HEIGHT], right[HEIGHT]) + 1, left[SIZE] + right[SIZE] + 1,
+                           max(left[BLACK_HEIGHT], right[BLACK_HEIGHT]) + node._is_black_node()]
+        if store:
+            node._augmentation = node_statistics
+        statistics.append(node_statistics)
+    return statistics[0]
+
+
+def clear_augmentation(root: BinaryTreeNode):
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        node._augmentation = None
+        if node._left is not None:
+            stack.append(node._left)
+        if node._right is not None:
+            stack.append(node._right)
+
+
+def update_augmentation(node: BinaryTreeNode | None):
+    """Recomputes the statistics of an augmented node, whose children or color changed, and of its ancestors.
+    Stops at the first node whose statistics stay the same, since nothing above it changes then.
+    Does nothing for nodes which are not augmented.
+    """
+    while node is not None and node._augmentation is not None:
+        statistics = compute_statistics(node)
+        if statistics == node._augmentation:
+            return
+        node._augmentation = statistics
+        node = node._parent
+
+
+def augment_attached_subtree(parent: BinaryTreeNode, child: BinaryTreeNode | None):
+    """Keeps the tree of parent augmented after child was attached to it.
+    A child which is not augmented yet (e.g. a new node) gets its statistics first.
+    """
+    if parent._augmentation is None:
+        return
+    if child is not None and child._augmentation is None:
+        compute_subtree_statistics(child, True)
+    update_augmentation(parent)
+
+
+# The tree operations make many elementary changes at once, e.g. several recolorings on the same path, each of which
+# would update the path to the root again. Instead, they only mark the changed nodes and their ancestors as stale
+# (a size of 0) and recompute the stale nodes once with refresh_augmentation when the operation is done.
+# Since all ancestors of a stale node are stale as well, marking stops at the first stale ancestor.
+_STALE = 0
+
+
+def create_stale_statistics() -> list[int]:
+    return [0, _STALE, 0]
+
+
+def mark_augmentation_stale(node: BinaryTreeNode | None):
+    while node is not None:
+        statistics = node._augmentation
+        if statistics is None or statistics[SIZE] == _STALE:
+            return
+        statistics[SIZE] = _STALE
+        node = node._parent
+
+
+def refresh_augmentation(node: BinaryTreeNode | None):
+    """Recomputes the stale statistics in the tree containing the node, only visiting stale nodes.
+    """
+    if node is None:
+        return
+    while node._parent is not None:
+        node = node._parent
+    if node._augmentation is None or node._augmentation[SIZE] != _STALE:
+        return
+    stack = [(node, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if children_done:
+            node._augmentation = compute_statistics(node)
+            continue
+        stack.append((node, True))
+        if node._right is not None and node._right._augmentation[SIZE] == _STALE:
+            stack.append((node._right, False))
+        if node._left is not None and node._left._augmentation[SIZE] == _STALE:
+            stack.append((node._left, False))
@@ -1,18 +1,54 @@
 from __future__ import annotations
-from binarytrees._visualization.visualize_binary_tree import generate_binary_tree_image, display_binary_tree_image
+from collections import deque
+from collections.abc import Iterable, Iterator
 from typing import Self
 from sys import stderr
+from hashlib import blake2b
+from binarytrees._classes.TreeEdit import TreeEdit
+from binarytrees._classes.TreeViolation import TreeViolation
+from binarytrees._augmentation.subtree_statistics import (HEIGHT, SIZE, augment_attached_subtree, clear_augmentation,
+                                                          compute_subtree_statistics)
+from binarytrees._construction.build_binary_tree import (check_sorted_and_distinct, link_balanced_tree, link_level_order,
+                                                        link_preorder_and_inorder, pause_garbage_collection)
+from binarytrees._comparison.tree_edit_distance import DEFAULT_RECOLOR_COST, compute_tree_edit_distance
+from binarytrees._validation.validate_binary_tree import validate_binary_search_tree
+
+# Size in bytes of the structural digests.
+_DIGEST_SIZE = 16
+# Digest used in place of a missing child.
+_EMPTY_DIGEST = bytes(_DIGEST_SIZE)
+
+
+def invalidate_digests(node: BinaryTreeNode):
+    """Discards the cached digest of the node and of its ancestors, whose subtrees contain it.
+    A node without a cached digest has no ancestor with one (computing a digest caches the digests of all subnodes),
+    so the walk stops at the first ancestor which has none.
+    """
+    node._digest_cache = None
+    node = node._parent
+    while node is not None and node._digest_cache is not None:
+        node._digest_cache = None
+        node = node._parent
 
 
 class BinaryTreeNode:
     """Class representing a node in a binary tree.
     """
 
+    __slots__ = ("_value", "_left", "_right", "_parent", "_digest_cache", "_augmentation")
+
     def __init__(self, value: int, left_child: BinaryTreeNode | None = None, right_child: BinaryTreeNode | None = None, parent: BinaryTreeNode | None = None):
-        self.set_value(value)
+        self._value = self._validate_value(value)
         self._left = left_child
         self._right = right_child
         self._parent = parent
+        self._digest_cache = None
+        self._augmentation = None
+        # The children get their parent link, through which changes to them discard the cached digests of this node.
+        if left_child is not None:
+            left_child._parent = self
+        if right_child is not None:
+            right_child._parent = self
 
     def __repr__(self) -> str:
         return f"BinaryTreeNode[{str(self.get_value())}]"
@@ -26,18 +62,26 @@ class BinaryTreeNode:
         return self._value
 
     def set_value(self, value: int):
+        self._value = self._validate_value(value)
+        invalidate_digests(self)
+
+    @staticmethod
+    def _validate_value(value: int) -> int:
         if value is None:
             raise ValueError("Value cannot be None")
         if not isinstance(value, int):
             raise TypeError("Value must be a numeric type int")
-        self._value = value
+        return value
 
     def get_left_child(self) -> Self | None:
         return self._left
 
     def set_left_child(self, node: Self | None):
         if type(self) == type(node) or node is None:
+            self._replace_child(self._left, node)
             self._left = node
+            augment_attached_subtree(self, node)
+            invalidate_digests(self)
         else:
             raise TypeError(
                 f"Left child must be a {type(self).__name__} or None")
@@ -47,11 +91,22 @@ class BinaryTreeNode:
 
     def set_right_child(self, node: Self | None):
         if type(self) == type(node) or node is None:
+            self._replace_child(self._right, node)
             self._right = node
+            augment_attached_subtree(self, node)
+            invalidate_digests(self)
         else:
             raise TypeError(
                 f"Right child must be a {type(self).__name__} or None")
 
+    def _replace_child(self, child: Self | None, node: Self | None):
+        # Keeps the parent links consistent, since the cached digests and statistics of the ancestors are discarded
+        # or updated through them when a node changes. A detached child is no longer linked to this node.
+        if child is not None and child is not node and child._parent is self:
+            child._parent = None
+        if node is not None:
+            node._parent = self
+
     def get_parent(self) -> Self | None:
         return self._parent
 
@@ -61,85 +116,292 @@ class BinaryTreeNode:
         else:
             raise TypeError(f"Parent must be a {type(self).__name__} or None")
 
+    def enable_augmentation(self):
+        """Makes the whole tree containing the node augmented: every node caches the height, size and black height
+        of its subtree, so get_height, get_size, get_balance_factor and get_black_height are O(1).
+        The setters and the tree operations keep the cached values up to date, each change only updates
+        the path to the root. Nodes attached to an augmented tree become augmented as well.
+        An empty tree is None, so a tree from which all nodes were deleted is no longer augmented: the root created by
+        inserting into it again is a plain node, on which enable_augmentation has to be called again.
+        """
+        with pause_garbage_collection():
+            compute_subtree_statistics(self._get_root(), True)
+
+    def disable_augmentation(self):
+        clear_augmentation(self._get_root())
+
+    def is_augmented(self) -> bool:
+        return self._augmentation is not None
+
+    def get_height(self) -> int:
+        """Returns the number of nodes on the longest path from the node down to a leaf (1 for a leaf).
+        O(1) for augmented trees, otherwise the subtree is traversed.
+        """
+        return self._get_subtree_statistics()[HEIGHT]
+
+    def get_size(self) -> int:
+        """Returns the number of nodes in the subtree of the node, including the node itself.
+        O(1) for augmented trees, otherwise the subtree is traversed.
+        """
+        return self._get_subtree_statistics()[SIZE]
+
+    def get_balance_factor(self) -> int:
+        """Returns the height of the left subtree minus the height of the right subtree.
+        """
+        left_height = self._left.get_height() if self._left is not None else 0
+        right_height = self._right.get_height() if self._right is not None else 0
+        return left_height - right_height
+
+    def _get_subtree_statistics(self) -> list[int]:
+        if self._augmentation is not None:
+            return self._augmentation
+        return compute_subtree_statistics(self, False)
+
+    def _is_black_node(self) -> bool:
+        return False
+
+    def _get_root(self) -> Self:
+        node = self
+        while node._parent is not None:
+            node = node._parent
+        return node
+
     def is_equal_including_subtrees(self, other: Self) -> bool:
+        """Checks whether both nodes and all their subtrees are equal (values, colors and shape).
+        The comparison uses the cached structural digests, so repeated comparisons of unmodified trees are O(1).
+        """
         if type(self) != type(other):
             return False
-        if self != other:
-            return False
-        self_left = self.get_left_child()
-        other_left = other.get_left_child()
-        if self_left is None and other_left is None:
-            left_equal = True
-        elif self_left is None or other_left is None:
-            left_equal = False
-        else:
-            left_equal = self_left.is_equal_including_subtrees(other_left)
-        self_right = self.get_right_child()
-        other_right = other.get_right_child()
-        if self_right is None and other_right is None:
-            right_equal = True
-        elif self_right is None or other_right is None:
-            right_equal = False
-        else:
-            right_equal = self_right.is_equal_including_subtrees(other_right)
-        return left_equal and right_equal
+        if self is other:
+            return True
+        return self.get_structural_digest() == other.get_structural_digest()
 
-    def preorder_traverse(self) -> list[Self]:
-        traversal = []
+    def get_structural_digest(self) -> bytes:
+        """Returns a digest (Merkle hash) covering the values, colors and shape of the node and all its subnodes.
+        Trees are equal including subtrees exactly when their digests are equal, so the digest can be used
+        as a dict key or set member, e.g. to find identical submissions.
+        The digests of all subnodes are cached. Modifying a node through the setters or the tree operations
+        only discards the cached digests of the node and its ancestors (found through the parent links, which the
+        constructor and the child setters set). A node attached to several parents only keeps the link to the last one.
+        """
+        if self._digest_cache is not None:
+            return self._digest_cache
+        # Iterative postorder, only descending into subtrees without a valid cached digest.
+        stack = [(self, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                left = node._left
+                right = node._right
+                digest = blake2b(node._create_digest_header(), digest_size=_DIGEST_SIZE)
+                digest.update(left._digest_cache if left is not None else _EMPTY_DIGEST)
+                digest.update(right._digest_cache if right is not None else _EMPTY_DIGEST)
+                node._digest_cache = digest.digest()
+                continue
+            if node._digest_cache is not None:
+                continue
+            stack.append((node, True))
+            if node._right is not None:
+                stack.append((node._right, False))
+            if node._left is not None:
+                stack.append((node._left, False))
+        return self._digest_cache
 
-        def _preorder_traverse(node: Self):
-            if node is not None:
-                traversal.append(node)
-                _preorder_traverse(node.get_left_child())
-                _preorder_traverse(node.get_right_child())
-        _preorder_traverse(self)
-        return traversal
+    def invalidate_structural_digests(self, include_subtree: bool = False):
+        """Discards the cached digests of the node and its ancestors. The setters and the tree operations do this themselves,
+        so it is only needed after changing nodes in other ways (e.g. through their private fields).
+        With include_subtree, the cached digests of all subnodes are discarded as well, so they are computed from scratch.
+        """
+        invalidate_digests(self)
+        if include_subtree:
+            for node in self.iter_preorder():
+                node._digest_cache = None
 
-    def inorder_traverse(self) -> list[Self]:
-        traversal = []
+    def _create_digest_header(self) -> bytes:
+        return f"BinaryTreeNode:{self._value}".encode()
+
+    def find_first_difference(self, other: Self | None) -> tuple[tuple[str, ...], Self | None, Self | None] | None:
+        """Finds the first position (in preorder) at which this tree and the other tree differ.
+        Returns None if both trees are equal including subtrees. Otherwise a tuple containing the path from the roots
+        (a sequence of "left" and "right") and the nodes of both trees at that position (None if the node is missing).
+        Subtrees with equal digests are skipped, so after the digests are computed only one path is walked.
+        """
+        path = []
+        node, other_node = self, other
+        while True:
+            if node is None or other_node is None or type(node) != type(other_node) or node != other_node:
+                return tuple(path), node, other_node
+            if node.get_structural_digest() == other_node.get_structural_digest():
+                return None
+            left, other_left = node._left, other_node._left
+            if left is None and other_left is None:
+                left_equal = True
+            elif left is None or other_left is None:
+                left_equal = False
+            else:
+                left_equal = left.is_equal_including_subtrees(other_left)
+            if left_equal:
+                path.append("right")
+                node, other_node = node._right, other_node._right
+            else:
+                path.append("left")
+                node, other_node = left, other_left
+
+    def compute_edit_distance(self, other: Self | None, recolor_cost: float = DEFAULT_RECOLOR_COST,
+                              max_distance: float | None = None) -> tuple[float, list[TreeEdit]]:
+        """Computes the tree edit distance to the other tree (e.g. from a student tree to the solution) and an edit script
+        transforming this tree into the other one, whose messages can be used as feedback.
+        Inserting, deleting, changing the value and moving a node to the other side cost 1, recoloring costs recolor_cost.
+        The running time depends on the size of the difference. If the distance is greater than max_distance,
+        the computation stops early and (inf, []) is returned.
+        """
+        return compute_tree_edit_distance(self, other, recolor_cost, max_distance)
+
+    def __iter__(self) -> Iterator[Self]:
+        """Iterates lazily over the node and its descendants in inorder, which is the sorted order for binary search trees.
+        """
+        return self.iter_inorder()
+
+    def iter_preorder(self) -> Iterator[Self]:
+        """Lazily yields the node and its descendants in preorder. Iteration can be stopped at any point
+        and does not use recursion. The tree must not be modified during the iteration.
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            if node._right is not None:
+                stack.append(node._right)
+            if node._left is not None:
+                stack.append(node._left)
+
+    def iter_inorder(self) -> Iterator[Self]:
+        """Lazily yields the node and its descendants in inorder. Iteration can be stopped at any point
+        and does not use recursion. The tree must not be modified during the iteration.
+        """
+        stack = []
+        node = self
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node._left
+            node = stack.pop()
+            yield node
+            node = node._right
 
-        def _inorder_traverse(node: Self):
+    def iter_postorder(self) -> Iterator[Self]:
+        """Lazily yields the node and its descendants in postorder. Iteration can be stopped at any point
+        and does not use recursion. The tree must not be modified during the iteration.
+        """
+        stack = []
+        node = self
+        last_yielded = None
+        while stack or node is not None:
             if node is not None:
-                _inorder_traverse(node.get_left_child())
-                traversal.append(node)
-                _inorder_traverse(node.get_right_child())
-        _inorder_traverse(self)
-        return traversal
+                stack.append(node)
+                node = node._left
+                continue
+            top = stack[-1]
+            if top._right is not None and top._right is not last_yielded:
+                node = top._right
+            else:
+                last_yielded = stack.pop()
+                yield last_yielded
+
+    def iter_levelorder(self) -> Iterator[Self]:
+        """Lazily yields the node and its descendants level by level from left to right. Iteration can be stopped
+        at any point. The tree must not be modified during the iteration.
+        """
+        queue = deque((self,))
+        while queue:
+            node = queue.popleft()
+            yield node
+            if node._left is not None:
+                queue.append(node._left)
+            if node._right is not None:
+                queue.append(node._right)
+
+    def preorder_traverse(self) -> list[Self]:
+        return list(self.iter_preorder())
+
+    def inorder_traverse(self) -> list[Self]:
+        return list(self.iter_inorder())
 
     def postorder_traverse(self) -> list[Self]:
-        traversal = []
+        return list(self.iter_postorder())
 
-        def _postorder_traverse(node: Self):
-            if node is not None:
-                _postorder_traverse(node.get_left_child())
-                _postorder_traverse(node.get_right_child())
-                traversal.append(node)
-        _postorder_traverse(self)
-        return traversal
+    def levelorder_traverse(self) -> list[Self]:
+        return list(self.iter_levelorder())
+
+    def validate(self, stop_at_first_violation: bool = False) -> list[TreeViolation]:
+        """Checks in a single pass whether the node and its subtrees form a valid binary search tree with correct parent links.
+        Returns a list of violations (empty if the tree is valid). If only pass/fail is needed, stop_at_first_violation
+        stops the check at the first violation.
+        """
+        return validate_binary_search_tree(self, stop_at_first_violation)
+
+    def is_valid(self) -> bool:
+        return not self.validate(stop_at_first_violation=True)
 
     def to_dict(self) -> dict[str, any]:
-        return {
-            "value": self._value,
-            "left": self._left.to_dict() if self._left else None,
-            "right": self._right.to_dict() if self._right else None,
-        }
-
-    def _print_child(self, child: Self | None, level: int, prefix: str):
-        if child:
-            child.print_tree(level + 1, prefix)
-        else:
-            print(" " * ((level + 1) * 4) + f"{prefix} null")
+        # Uses an explicit stack instead of recursion, so that degenerate trees
+        # (e.g. values inserted in sorted order) do not hit the recursion limit.
+        root_dict = self._create_dict_from_node()
+        stack = [(self, root_dict)]
+        while stack:
+            node, node_dict = stack.pop()
+            left = node._left
+            right = node._right
+            left_dict = left._create_dict_from_node() if left is not None else None
+            right_dict = right._create_dict_from_node() if right is not None else None
+            node_dict["left"] = left_dict
+            node_dict["right"] = right_dict
+            if right is not None:
+                stack.append((right, right_dict))
+            if left is not None:
+                stack.append((left, left_dict))
+        return root_dict
+
+    def to_bytes(self) -> bytes:
+        """Encodes node and subtrees in the compact binary format of CompactBinaryTree.to_bytes(),
+        which is much smaller and faster to parse than the dictionary format.
+        """
+        from binarytrees._classes.CompactBinaryTree import CompactBinaryTree
+        return CompactBinaryTree.from_node(self).to_bytes()
+
+    def _create_dict_from_node(self) -> dict[str, any]:
+        return {"value": self._value}
+
+    def format_tree(self, level: int = 0, prefix: str = "Root: ") -> str:
+        """Returns the text representation of the tree, which print_tree prints.
+        """
+        lines = []
+        stack = [(self, level, prefix)]
+        while stack:
+            node, level, prefix = stack.pop()
+            if node is None:
+                lines.append(" " * (level * 4) + f"{prefix} null")
+                continue
+            lines.append(" " * (level * 4) + prefix + node._format_label())
+            stack.append((node._right, level + 1, "R--> "))
+            stack.append((node._left, level + 1, "L--> "))
+        return "\n".join(lines)
+
+    def _format_label(self) -> str:
+        return str(self._value)
 
     def print_tree(self, level: int = 0, prefix: str = "Root: "):
-        print(" " * (level * 4) + prefix + str(self.get_value()))
-        self._print_child(self._left, level, "L--> ")
-        self._print_child(self._right, level, "R--> ")
+        print(self.format_tree(level, prefix))
 
-    def generate_tree_image(self, title: str | None = None) -> str | None:
+    def generate_tree_image(self, title: str | None = None, engine: str = "graphviz", image_format: str = "png") -> str | None:
         """Returns a Base64 encoded string containing the PNG image of the tree. Optionally add a title to display on the image.
+        With engine="python" the image is created without Graphviz, which is much faster for large or unbalanced trees.
+        image_format can be "png" or "svg".
         """
+        # The visualization (and with it Graphviz and Pillow) is only imported when an image is actually needed.
+        from binarytrees._visualization.visualize_binary_tree import generate_binary_tree_image
         try:
-            return generate_binary_tree_image(title, self, show_nil_nodes=False)
+            return generate_binary_tree_image(title, self, show_nil_nodes=False, engine=engine, image_format=image_format)
         except Exception as e:
             raise Exception(str(e))
 
@@ -155,6 +417,7 @@ class BinaryTreeNode:
             print("""The image could not be shown. In case the error mentions the Graphviz executable, then please make sure that you have installed Graphviz and configured it correctly on your system. 
 Please consult the following error message:""", file=stderr)
             print(e, file=stderr)
+        from binarytrees._visualization.visualize_binary_tree import display_binary_tree_image
         display_binary_tree_image(b64_encoded_tree_image)
 
     def deep_copy(self) -> BinaryTreeNode:
@@ -172,19 +435,91 @@ Please consult the following error message:""", file=stderr)
 
     @classmethod
     def from_dict(cls, data: dict[str, any]) -> BinaryTreeNode | None:
+        # Nodes are created in preorder (node, left subtree, right subtree) using an explicit stack,
+        # which results in the same nodes and the same errors as a recursive descent would,
+        # without being limited by the recursion depth.
         if data is None:
             return None
+        root = cls._create_validated_node_from_dict(data)
+        pending_children = []
+        node_data, node = data, root
+        while True:
+            left_data = node_data.get("left")
+            right_data = node_data.get("right")
+            # The right child is pushed first, so that the left subtree is created first.
+            if right_data is not None:
+                pending_children.append((right_data, node, False))
+            if left_data is not None:
+                pending_children.append((left_data, node, True))
+            if not pending_children:
+                break
+            node_data, parent, is_left_child = pending_children.pop()
+            node = cls._create_validated_node_from_dict(node_data)
+            # The node was created by this class, so the type checks of the setters can be skipped.
+            node._parent = parent
+            if is_left_child:
+                parent._left = node
+            else:
+                parent._right = node
+        return root
+
+    @classmethod
+    def from_bytes(cls, data: bytes | bytearray | memoryview) -> BinaryTreeNode | None:
+        """Decodes a tree encoded with to_bytes(). Invalid data raises a ValueError.
+        """
+        # Imported here, since CompactBinaryTree itself builds on this class.
+        from binarytrees._classes.CompactBinaryTree import CompactBinaryTree
+        tree = CompactBinaryTree.from_bytes(data)
+        if len(tree) == 0:
+            return None
+        cls._check_compact_tree(tree)
+        return tree.to_node()
+
+    @classmethod
+    def from_sorted_values(cls, values: Iterable[int]) -> BinaryTreeNode | None:
+        """Builds a height-balanced binary search tree from values sorted in ascending order in O(n):
+        the middle value of every range becomes the root of its subtree. Unsorted or duplicate values raise a ValueError.
+        """
+        values = list(values)
+        check_sorted_and_distinct(values)
+        with pause_garbage_collection():
+            root, _ = link_balanced_tree(cls._create_nodes(values))
+        return root
+
+    @classmethod
+    def from_preorder_and_inorder(cls, preorder: Iterable[int], inorder: Iterable[int]) -> BinaryTreeNode | None:
+        """Builds the binary tree (not necessarily a search tree) with the given preorder and inorder sequences in O(n).
+        The values must be distinct. Sequences which do not belong to the same tree raise a ValueError.
+        """
+        preorder = list(preorder)
+        with pause_garbage_collection():
+            return link_preorder_and_inorder(cls._create_nodes(preorder), list(inorder))
+
+    @classmethod
+    def from_level_order(cls, level_order: Iterable[int]) -> BinaryTreeNode | None:
+        """Builds the binary search tree whose level order (breadth-first order) is the given sequence in O(n).
+        This is the tree resulting from inserting the values in this order. Other sequences raise a ValueError.
+        """
+        level_order = list(level_order)
+        with pause_garbage_collection():
+            return link_level_order(cls._create_nodes(level_order))
+
+    @classmethod
+    def _create_nodes(cls, values: list[int]) -> list[BinaryTreeNode]:
+        return [cls(value) for value in values]
+
+    @classmethod
+    def _check_compact_tree(cls, tree: CompactBinaryTree):
+        if tree.is_red_black_tree():
+            raise ValueError(
+                "BinaryTreeNode does not accept colored nodes")
+
+    @classmethod
+    def _create_validated_node_from_dict(cls, data: dict[str, any]) -> BinaryTreeNode:
         if not isinstance(data, dict) or "value" not in data.keys():
             raise ValueError(
                 "Invalid JSON format: Each node must have a 'value' key")
-        node = cls._create_node_from_dict(data)
-        if "left" in data and data["left"] is not None:
-            node.set_left_child(cls.from_dict(data["left"]))
-            node.get_left_child().set_parent(node)
-        if "right" in data and data["right"] is not None:
-            node.set_right_child(cls.from_dict(data["right"]))
-            node.get_right_child().set_parent(node)
-        return node
+        return cls._create_node_from_dict(data)
 
     @classmethod
     def _create_node_from_dict(cls, data: dict[str, any]) -> BinaryTreeNode:
@@ -0,0 +1,367 @@
+from __future__ import annotations
+import struct
+import sys
+from array import array
+from binarytrees._classes.BinaryTreeNode import BinaryTreeNode
+from binarytrees._classes.RedBlackTreeNode import RedBlackTreeNode
+from binarytrees._enums.RedBlackTreeColor import RedBlackTreeColor
+
+# Index used for missing children and for the parent of the root.
+NO_NODE = -1
+
+# Encoding of the colors inside the color column.
+_COLOR_TO_BYTE = {RedBlackTreeColor.RED: 0, RedBlackTreeColor.BLACK: 1}
+_BYTE_TO_COLOR = (RedBlackTreeColor.RED, RedBlackTreeColor.BLACK)
+
+# Binary wire format (see to_bytes): magic, version, flags and number of nodes, followed by the values,
+# the structure bitmap (2 bits per node: has left child, has right child) and the color bitmap (1 bit per node, 1 = black).
+_WIRE_MAGIC = b"BT"
+_WIRE_VERSION = 1
+_WIRE_HEADER = struct.Struct("<2sBBI")
+_WIRE_FLAG_RED_BLACK = 1
+_WIRE_FLAG_32_BIT_VALUES = 2
+_STRUCTURE_HAS_LEFT = 1
+_STRUCTURE_HAS_RIGHT = 2
+# Translation tables, which extract (or shift into place) the bits of the k-th node of each byte of a bitmap,
+# so that bitmaps are packed and unpacked with bytes.translate and slice assignments instead of per-bit loops.
+_UNPACK_TABLES = {bits: [bytes((byte >> (k * bits)) & ((1 << bits) - 1) for byte in range(256)) for k in range(8 // bits)]
+                  for bits in (1, 2)}
+_PACK_TABLES = {bits: [bytes((byte << (k * bits)) & 0xFF for byte in range(256)) for k in range(8 // bits)]
+                for bits in (1, 2)}
+
+
+class CompactBinaryTree:
+    """Class representing a whole binary tree or red-black tree as parallel arrays (struct of arrays).
+    Each node is identified by its index. The nodes are stored in preorder, so the root has index 0.
+    Missing children and the parent of the root are stored as -1.
+    Values are stored as 64-bit integers, colors (only for red-black trees) as one byte per node.
+    """
+
+    __slots__ = ("_values", "_left", "_right", "_parent", "_colors")
+
+    def __init__(self, values: array, left: array, right: array, parent: array, colors: bytearray | None = None):
+        if not len(values) == len(left) == len(right) == len(parent):
+            raise ValueError("All columns must have the same length")
+        if colors is not None and len(colors) != len(values):
+            raise ValueError("The color column must have the same length as the other columns")
+        self._values = values
+        self._left = left
+        self._right = right
+        self._parent = parent
+        self._colors = colors
+
+    def __repr__(self) -> str:
+        kind = "red-black" if self.is_red_black_tree() else "binary"
+        return f"CompactBinaryTree[{len(self)} nodes, {kind}]"
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __eq__(self, other: CompactBinaryTree) -> bool:
+        return self.is_equal_including_subtrees(other)
+
+    def is_red_black_tree(self) -> bool:
+        return self._colors is not None
+
+    def get_value(self, index: int) -> int:
+        return self._values[index]
+
+    def get_color(self, index: int) -> RedBlackTreeColor | None:
+        if self._colors is None:
+            return None
+        return _BYTE_TO_COLOR[self._colors[index]]
+
+    def get_left_child(self, index: int) -> int:
+        return self._left[index]
+
+    def get_right_child(self, index: int) -> int:
+        return self._right[index]
+
+    def get_parent(self, index: int) -> int:
+        return self._parent[index]
+
+    def is_equal_including_subtrees(self, other: CompactBinaryTree) -> bool:
+        """Compares the whole trees including values, colors and shape.
+        Since both trees store their nodes in preorder, this boils down to comparing the columns.
+        """
+        if not isinstance(other, CompactBinaryTree):
+            return False
+        if not self._values and not other._values:
+            return True
+        return (self._values == other._values
+                and self._left == other._left
+                and self._right == other._right
+                and self._colors == other._colors)
+
+    def preorder_traverse(self) -> list[int]:
+        return list(range(len(self._values)))
+
+    def inorder_traverse(self) -> list[int]:
+        traversal = []
+        if not self._values:
+            return traversal
+        left = self._left
+        right = self._right
+        stack = []
+        index = 0
+        while stack or index != NO_NODE:
+            while index != NO_NODE:
+                stack.append(index)
+                index = left[index]
+            index = stack.pop()
+            traversal.append(index)
+            index = right[index]
+        return traversal
+
+    def postorder_traverse(self) -> list[int]:
+        # Reversed "node, right subtree, left subtree" order is the postorder.
+        traversal = []
+        if not self._values:
+            return traversal
+        left = self._left
+        right = self._right
+        stack = [0]
+        while stack:
+            index = stack.pop()
+            traversal.append(index)
+            if left[index] != NO_NODE:
+                stack.append(left[index])
+            if right[index] != NO_NODE:
+                stack.append(right[index])
+        traversal.reverse()
+        return traversal
+
+    def to_dict(self) -> dict[str, any] | None:
+        if not self._values:
+            return None
+        if self._colors is None:
+            node_dicts = [{"value": value} for value in self._values]
+        else:
+            node_dicts = [{"value": value, "color": _BYTE_TO_COLOR[color].value}
+                          for value, color in zip(self._values, self._colors)]
+        for node_dict, left, right in zip(node_dicts, self._left, self._right):
+            node_dict["left"] = node_dicts[left] if left != NO_NODE else None
+            node_dict["right"] = node_dicts[right] if right != NO_NODE else None
+        return node_dicts[0]
+
+    def to_node(self) -> BinaryTreeNode | RedBlackTreeNode | None:
+        """Converts the compact tree into linked BinaryTreeNode or RedBlackTreeNode objects including parent links.
+        """
+        if not self._values:
+            return None
+        if self._colors is None:
+            nodes = [BinaryTreeNode(value) for value in self._values]
+        else:
+            nodes = [RedBlackTreeNode(value, _BYTE_TO_COLOR[color])
+                     for value, color in zip(self._values, self._colors)]
+        for node, left, right, parent in zip(nodes, self._left, self._right, self._parent):
+            if left != NO_NODE:
+                node._left = nodes[left]
+            if right != NO_NODE:
+                node._right = nodes[right]
+            if parent != NO_NODE:
+                node._parent = nodes[parent]
+        return nodes[0]
+
+    def to_bytes(self) -> bytes:
+        """Encodes the tree in the compact binary wire format:
+        an 8 byte header ("BT", version, flags, number of nodes as unsigned 32-bit integer),
+        the values in preorder as signed 32-bit integers if all of them fit and as 64-bit integers otherwise,
+        a bitmap with 2 bits per node in preorder (bit 0: has a left child, bit 1: has a right child)
+        and for red-black trees a bitmap with 1 bit per node (1 = black). All numbers are little-endian,
+        the bits of each byte are filled starting with the least significant one.
+        """
+        values = self._values
+        flags = _WIRE_FLAG_RED_BLACK if self._colors is not None else 0
+        if not values or (-2 ** 31 <= min(values) and max(values) < 2 ** 31):
+            flags |= _WIRE_FLAG_32_BIT_VALUES
+            values = array("i", values)
+        else:
+            values = array("q", values)
+        if sys.byteorder == "big":
+            values.byteswap()
+        structure = bytes((left != NO_NODE) | ((right != NO_NODE) << 1) for left, right in zip(self._left, self._right))
+        parts = [_WIRE_HEADER.pack(_WIRE_MAGIC, _WIRE_VERSION, flags, len(self._values)), values.tobytes(),
+                 _pack_bits(structure, 2)]
+        if self._colors is not None:
+            parts.append(_pack_bits(self._colors, 1))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes | bytearray | memoryview) -> CompactBinaryTree:
+        """Decodes a tree in the format of to_bytes. The data must contain exactly one tree.
+        Invalid data raises a ValueError.
+        """
+        tree, end = cls.decode_from(data)
+        if end != len(data):
+            raise ValueError("Invalid tree encoding: Unexpected data after the tree")
+        return tree
+
+    @classmethod
+    def decode_from(cls, data: bytes | bytearray | memoryview, offset: int = 0) -> tuple[CompactBinaryTree, int]:
+        """Decodes the tree in the format of to_bytes starting at offset and returns it together with the offset after it,
+        so several trees can be read from the same buffer. Invalid data raises a ValueError.
+        The columns are read and the bitmaps are unpacked as a whole, only the child links are restored node by node (without recursion).
+        """
+        data = memoryview(data).cast("B")
+        flags, count = _read_wire_header(data, offset)
+        red_black_tree = bool(flags & _WIRE_FLAG_RED_BLACK)
+        value_size = 4 if flags & _WIRE_FLAG_32_BIT_VALUES else 8
+        structure_size = (2 * count + 7) // 8
+        color_size = (count + 7) // 8 if red_black_tree else 0
+        start = offset + _WIRE_HEADER.size
+        end = start + count * value_size + structure_size + color_size
+        # The length is checked before anything is allocated, so a forged node count cannot request huge columns.
+        if end > len(data):
+            raise ValueError("Invalid tree encoding: The data is incomplete")
+        values = array("i" if value_size == 4 else "q")
+        values.frombytes(data[start:start + count * value_size])
+        if sys.byteorder == "big":
+            values.byteswap()
+        if value_size == 4:
+            values = array("q", values)
+        start += count * value_size
+        structure = _unpack_bits(data[start:start + structure_size], count, 2)
+        colors = _unpack_bits(data[start + structure_size:end], count, 1) if red_black_tree else None
+        left, right, parent = _link_preorder_structure(structure)
+        return cls(values, left, right, parent, colors), end
+
+    @staticmethod
+    def read_node_count(data: bytes | bytearray | memoryview, offset: int = 0) -> int:
+        """Returns the number of nodes of the tree encoded at offset in the format of to_bytes, only reading its header.
+        This allows rejecting large trees before they are decoded. An invalid header raises a ValueError.
+        """
+        return _read_wire_header(memoryview(data).cast("B"), offset)[1]
+
+    @classmethod
+    def from_node(cls, root: BinaryTreeNode | RedBlackTreeNode | None) -> CompactBinaryTree:
+        """Converts a tree of BinaryTreeNode or RedBlackTreeNode objects into a compact tree.
+        Parent indices are derived from the tree structure, the parent links of the nodes are not read.
+        """
+        values = array("q")
+        left = array("q")
+        right = array("q")
+        parent = array("q")
+        colors = bytearray() if isinstance(root, RedBlackTreeNode) else None
+        stack = [(root, NO_NODE, True)] if root is not None else []
+        while stack:
+            node, parent_index, is_left_child = stack.pop()
+            index = len(values)
+            values.append(node._value)
+            left.append(NO_NODE)
+            right.append(NO_NODE)
+            parent.append(parent_index)
+            if colors is not None:
+                colors.append(_COLOR_TO_BYTE[node._color])
+            if parent_index != NO_NODE:
+                if is_left_child:
+                    left[parent_index] = index
+                else:
+                    right[parent_index] = index
+            if node._right is not None:
+                stack.append((node._right, index, False))
+            if node._left is not None:
+                stack.append((node._left, index, True))
+        return cls(values, left, right, parent, colors)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, any] | None, red_black_tree: bool = False) -> CompactBinaryTree:
+        """Parses the same JSON format as BinaryTreeNode.from_dict (or RedBlackTreeNode.from_dict if red_black_tree is set)
+        directly into a compact tree without creating node objects. Invalid data raises the same errors.
+        """
+        values = array("q")
+        left = array("q")
+        right = array("q")
+        parent = array("q")
+        colors = bytearray() if red_black_tree else None
+        stack = [(data, NO_NODE, True)] if data is not None else []
+        while stack:
+            node_data, parent_index, is_left_child = stack.pop()
+            if not isinstance(node_data, dict) or "value" not in node_data.keys():
+                raise ValueError(
+                    "Invalid JSON format: Each node must have a 'value' key")
+            if red_black_tree:
+                if "color" not in node_data:
+                    raise ValueError(
+                        "Invalid JSON format: RedBlackTreeNode requires a 'color' key")
+                value = BinaryTreeNode._validate_value(node_data["value"])
+                colors.append(_COLOR_TO_BYTE[RedBlackTreeNode._validate_color(node_data["color"])])
+            else:
+                if "color" in node_data:
+                    raise ValueError(
+                        "BinaryTreeNode does not accept a 'color' attribute")
+                value = BinaryTreeNode._validate_value(node_data["value"])
+            index = len(values)
+            values.append(value)
+            left.append(NO_NODE)
+            right.append(NO_NODE)
+            parent.append(parent_index)
+            if parent_index != NO_NODE:
+                if is_left_child:
+                    left[parent_index] = index
+                else:
+                    right[parent_index] = index
+            if node_data.get("right") is not None:
+                stack.append((node_data["right"], index, False))
+            if node_data.get("left") is not None:
+                stack.append((node_data["left"], index, True))
+        return cls(values, left, right, parent, colors)
+
+
+def _read_wire_header(data: memoryview, offset: int) -> tuple[int, int]:
+    # Returns the flags and the number of nodes.
+    if len(data) - offset < _WIRE_HEADER.size:
+        raise ValueError("Invalid tree encoding: The header is incomplete")
+    magic, version, flags, count = _WIRE_HEADER.unpack_from(data, offset)
+    if magic != _WIRE_MAGIC or version != _WIRE_VERSION:
+        raise ValueError("Invalid tree encoding: Unknown format or version")
+    return flags, count
+
+
+def _pack_bits(codes: bytes | bytearray, bits: int) -> bytes:
+    # Packs codes of 1 or 2 bits (one code per byte) into a bitmap. The shifted codes of the k-th position of all bytes
+    # are combined with big integer operations, which run in C.
+    per_byte = 8 // bits
+    padded = bytes(codes) + bytes(-len(codes) % per_byte)
+    packed = 0
+    for k, table in enumerate(_PACK_TABLES[bits]):
+        packed |= int.from_bytes(padded[k::per_byte].translate(table), "little")
+    return packed.to_bytes(len(padded) // per_byte, "little")
+
+
+def _unpack_bits(bitmap: bytes | memoryview, count: int, bits: int) -> bytearray:
+    # Unpacks a bitmap into count codes of 1 or 2 bits (one code per byte).
+    per_byte = 8 // bits
+    bitmap = bytes(bitmap)
+    codes = bytearray(len(bitmap) * per_byte)
+    for k, table in enumerate(_UNPACK_TABLES[bits]):
+        codes[k::per_byte] = bitmap.translate(table)
+    del codes[count:]
+    return codes
+
+
+def _link_preorder_structure(structure: bytearray) -> tuple[array, array, array]:
+    # In preorder, a left child directly follows its parent. A right child follows the left subtree of its parent,
+    # so it belongs to the last node which still waits for its right child.
+    count = len(structure)
+    left = array("q", [NO_NODE]) * count
+    right = array("q", [NO_NODE]) * count
+    parent = array("q", [NO_NODE]) * count
+    waiting_for_right_child = []
+    if count and structure[0] & _STRUCTURE_HAS_RIGHT:
+        waiting_for_right_child.append(0)
+    for index in range(1, count):
+        if structure[index - 1] & _STRUCTURE_HAS_LEFT:
+            parent_index = index - 1
+            left[parent_index] = index
+        elif waiting_for_right_child:
+            parent_index = waiting_for_right_child.pop()
+            right[parent_index] = index
+        else:
+            raise ValueError("Invalid tree encoding: The structure describes more than one tree")
+        parent[index] = parent_index
+        if structure[index] & _STRUCTURE_HAS_RIGHT:
+            waiting_for_right_child.append(index)
+    if waiting_for_right_child or (count and structure[count - 1] & _STRUCTURE_HAS_LEFT):
+        raise ValueError("Invalid tree encoding: The structure describes more nodes than the tree has")
+    return left, right, parent
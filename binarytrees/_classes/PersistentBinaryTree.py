@@ -0,0 +1,263 @@
+from __future__ import annotations
+from collections.abc import Callable, Iterable
+from binarytrees._classes.BinaryTreeNode import BinaryTreeNode
+from binarytrees._classes.RedBlackTreeNode import RedBlackTreeNode
+from binarytrees._classes.TreeOperationStep import TreeOperationStep
+from binarytrees._enums.RedBlackTreeColor import RedBlackTreeColor
+from binarytrees._enums.TreeOperationStepKind import TreeOperationStepKind
+
+
+class _PersistentNode:
+    """Node of a PersistentBinaryTree. Nodes are shared between versions and must not be modified once
+    the version containing them has been created. Nodes do not know their parent, since they can have several.
+    """
+
+    __slots__ = ("value", "left", "right", "color")
+
+    def __init__(self, value: int, left: _PersistentNode | None, right: _PersistentNode | None, color: RedBlackTreeColor | None):
+        self.value = value
+        self.left = left
+        self.right = right
+        self.color = color
+
+
+class PersistentBinaryTree:
+    """Class representing an immutable version of a binary tree or red-black tree.
+    Modifying a version creates a new version, which shares all unchanged subtrees with the old one:
+    only the nodes on the paths from the root to the modified nodes are copied.
+    Keeping a version after each of k operations on a balanced tree with n nodes therefore costs about
+    O(k·log n) additional nodes instead of O(k·n) for deep copies.
+    Versions can be converted to BinaryTreeNode or RedBlackTreeNode objects with to_node() and to dictionaries with to_dict().
+    """
+
+    __slots__ = ("_root", "_size", "_red_black_tree")
+
+    def __init__(self, root: _PersistentNode | None, size: int, red_black_tree: bool):
+        self._root = root
+        self._size = size
+        self._red_black_tree = red_black_tree
+
+    def __repr__(self) -> str:
+        kind = "red-black" if self._red_black_tree else "binary"
+        return f"PersistentBinaryTree[{self._size} nodes, {kind}]"
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __eq__(self, other: PersistentBinaryTree) -> bool:
+        return self.is_equal_including_subtrees(other)
+
+    def is_red_black_tree(self) -> bool:
+        return self._red_black_tree
+
+    def is_equal_including_subtrees(self, other: PersistentBinaryTree) -> bool:
+        """Compares the whole trees including values, colors and shape.
+        Subtrees shared between both versions are equal without being compared.
+        """
+        if not isinstance(other, PersistentBinaryTree) or self._red_black_tree != other._red_black_tree:
+            return False
+        stack = [(self._root, other._root)]
+        while stack:
+            node, other_node = stack.pop()
+            if node is other_node:
+                continue
+            if (node is None or other_node is None or node.value != other_node.value
+                    or node.color is not other_node.color):
+                return False
+            stack.append((node.right, other_node.right))
+            stack.append((node.left, other_node.left))
+        return True
+
+    def apply_steps(self, steps: Iterable[TreeOperationStep]) -> PersistentBinaryTree:
+        """Returns the version resulting from applying the steps (as recorded in the trace of an operation
+        such as insert_into_red_black_tree) to this version, which itself stays unchanged.
+        Within one call, each node is copied at most once, however many steps modify it.
+        """
+        builder = _VersionBuilder(self._root, self._size, self._red_black_tree)
+        for step in steps:
+            builder.apply_step(step)
+        return PersistentBinaryTree(builder.root, builder.size, builder.red_black_tree)
+
+    def to_node(self) -> BinaryTreeNode | RedBlackTreeNode | None:
+        """Converts the version into linked BinaryTreeNode or RedBlackTreeNode objects including parent links.
+        """
+        if self._root is None:
+            return None
+        root = self._create_node(self._root)
+        stack = [(self._root, root)]
+        while stack:
+            persistent_node, node = stack.pop()
+            for persistent_child, is_left_child in ((persistent_node.left, True), (persistent_node.right, False)):
+                if persistent_child is None:
+                    continue
+                child = self._create_node(persistent_child)
+                child._parent = node
+                if is_left_child:
+                    node._left = child
+                else:
+                    node._right = child
+                stack.append((persistent_child, child))
+        return root
+
+    def _create_node(self, persistent_node: _PersistentNode) -> BinaryTreeNode | RedBlackTreeNode:
+        if self._red_black_tree:
+            return RedBlackTreeNode(persistent_node.value, persistent_node.color)
+        return BinaryTreeNode(persistent_node.value)
+
+    def to_dict(self) -> dict[str, any] | None:
+        if self._root is None:
+            return None
+        root_dict = self._create_dict_from_node(self._root)
+        stack = [(self._root, root_dict)]
+        while stack:
+            node, node_dict = stack.pop()
+            left_dict = self._create_dict_from_node(node.left) if node.left is not None else None
+            right_dict = self._create_dict_from_node(node.right) if node.right is not None else None
+            node_dict["left"] = left_dict
+            node_dict["right"] = right_dict
+            if node.right is not None:
+                stack.append((node.right, right_dict))
+            if node.left is not None:
+                stack.append((node.left, left_dict))
+        return root_dict
+
+    def _create_dict_from_node(self, node: _PersistentNode) -> dict[str, any]:
+        if self._red_black_tree:
+            return {"value": node.value, "color": node.color.value}
+        return {"value": node.value}
+
+    @classmethod
+    def from_node(cls, root: BinaryTreeNode | RedBlackTreeNode | None) -> PersistentBinaryTree:
+        """Creates the first version of a persistent tree from a tree of BinaryTreeNode or RedBlackTreeNode objects,
+        which is copied once.
+        """
+        red_black_tree = isinstance(root, RedBlackTreeNode)
+        if root is None:
+            return cls(None, 0, red_black_tree)
+        persistent_root = _PersistentNode(root._value, None, None, root._color if red_black_tree else None)
+        size = 1
+        stack = [(root, persistent_root)]
+        while stack:
+            node, persistent_node = stack.pop()
+            if node._left is not None:
+                persistent_node.left = _PersistentNode(node._left._value, None, None, node._left._color if red_black_tree else None)
+                stack.append((node._left, persistent_node.left))
+                size += 1
+            if node._right is not None:
+                persistent_node.right = _PersistentNode(node._right._value, None, None, node._right._color if red_black_tree else None)
+                stack.append((node._right, persistent_node.right))
+                size += 1
+        return cls(persistent_root, size, red_black_tree)
+
+    @classmethod
+    def create_snapshots(cls, root: BinaryTreeNode | RedBlackTreeNode | None, values: Iterable[int],
+                         operation: Callable[[BinaryTreeNode | None, int, list[TreeOperationStep] | None], BinaryTreeNode | None]) -> list[PersistentBinaryTree]:
+        """Applies the operation (e.g. insert_into_red_black_tree or delete_from_binary_search_tree) for each value
+        and returns the versions of the tree before the first value and after each value, e.g. for awarding partial credit per step.
+        The operation is applied to a copy, root stays unchanged.
+        """
+        version = cls.from_node(root)
+        versions = [version]
+        working_tree = version.to_node()
+        for value in values:
+            trace = []
+            working_tree = operation(working_tree, value, trace)
+            version = version.apply_steps(trace)
+            versions.append(version)
+        return versions
+
+
+class _VersionBuilder:
+    """Creates a new version by path copying. Nodes copied for the new version are not shared with any other version yet,
+    so they can be modified in place by the following steps.
+    """
+
+    def __init__(self, root: _PersistentNode | None, size: int, red_black_tree: bool):
+        self.root = root
+        self.size = size
+        self.red_black_tree = red_black_tree
+        # Nodes created for the new version by their id (the dict keeps them alive, so the ids stay unique).
+        self.copied_nodes: dict[int, _PersistentNode] = {}
+
+    def apply_step(self, step: TreeOperationStep):
+        kind = step.kind
+        path = self._copy_path(step.value)
+        node = path[-1] if path else None
+        if kind is TreeOperationStepKind.INSERT:
+            if node is not None and node.value == step.value:
+                raise ValueError(f"The tree already contains the value {step.value} of {step!r}")
+            color = step.color
+            if self.root is None:
+                # An empty tree becomes a red-black tree by inserting a colored node.
+                self.red_black_tree = color is not None
+            elif color is None and self.red_black_tree:
+                color = RedBlackTreeColor.RED
+            new_node = self._create_node(step.value, None, None, color)
+            if node is None:
+                self.root = new_node
+            elif step.value < node.value:
+                node.left = new_node
+            else:
+                node.right = new_node
+            self.size += 1
+            return
+        if node is None or node.value != step.value:
+            raise ValueError(f"The tree does not contain the value {step.value} of {step!r}")
+        parent = path[-2] if len(path) > 1 else None
+        if kind is TreeOperationStepKind.REMOVE:
+            if node.left is not None and node.right is not None:
+                raise ValueError(f"{step!r} cannot be applied, since the node has two children")
+            self._replace_child(parent, node, node.left if node.left is not None else node.right)
+            self.size -= 1
+        elif kind is TreeOperationStepKind.REPLACE_VALUE:
+            node.value = step.new_value
+        elif kind is TreeOperationStepKind.ROTATE_LEFT:
+            pivot = self._copy_node(node.right)
+            node.right = pivot.left
+            pivot.left = node
+            self._replace_child(parent, node, pivot)
+        elif kind is TreeOperationStepKind.ROTATE_RIGHT:
+            pivot = self._copy_node(node.left)
+            node.left = pivot.right
+            pivot.right = node
+            self._replace_child(parent, node, pivot)
+        elif kind is TreeOperationStepKind.RECOLOR:
+            node.color = step.color
+
+    def _copy_path(self, value: int) -> list[_PersistentNode]:
+        # Copies the nodes from the root to the node with the value (or to the node below which the value belongs).
+        path = []
+        parent = None
+        node = self.root
+        while node is not None:
+            node = self._copy_node(node)
+            if parent is None:
+                self.root = node
+            elif value < parent.value:
+                parent.left = node
+            else:
+                parent.right = node
+            path.append(node)
+            if value == node.value:
+                break
+            parent = node
+            node = node.left if value < node.value else node.right
+        return path
+
+    def _copy_node(self, node: _PersistentNode) -> _PersistentNode:
+        if id(node) in self.copied_nodes:
+            return node
+        return self._create_node(node.value, node.left, node.right, node.color)
+
+    def _create_node(self, value: int, left: _PersistentNode | None, right: _PersistentNode | None, color: RedBlackTreeColor | None) -> _PersistentNode:
+        node = _PersistentNode(value, left, right, color)
+        self.copied_nodes[id(node)] = node
+        return node
+
+    def _replace_child(self, parent: _PersistentNode | None, child: _PersistentNode, replacement: _PersistentNode | None):
+        if parent is None:
+            self.root = replacement
+        elif parent.left is child:
+            parent.left = replacement
+        else:
+            parent.right = replacement
@@ -1,16 +1,23 @@
 from __future__ import annotations
-from binarytrees._classes.BinaryTreeNode import BinaryTreeNode
+from collections.abc import Iterable
+from binarytrees._augmentation.subtree_statistics import BLACK_HEIGHT, update_augmentation
+from binarytrees._classes.BinaryTreeNode import BinaryTreeNode, invalidate_digests
+from binarytrees._construction.build_binary_tree import (check_sorted_and_distinct, link_balanced_tree, link_level_order,
+                                                        link_preorder_and_inorder, pause_garbage_collection)
 from binarytrees._enums.RedBlackTreeColor import RedBlackTreeColor
-from binarytrees._visualization.visualize_binary_tree import generate_binary_tree_image
+from binarytrees._classes.TreeViolation import TreeViolation
+from binarytrees._validation.validate_binary_tree import validate_red_black_tree
 
 
 class RedBlackTreeNode(BinaryTreeNode):
     """Class representing a node in a red-black tree.
     """
 
+    __slots__ = ("_color",)
+
     def __init__(self, value: int, color: str = RedBlackTreeColor.RED, left_child: RedBlackTreeNode | None = None, right_child: RedBlackTreeNode | None = None, parent: RedBlackTreeNode | None = None):
         super().__init__(value, left_child, right_child, parent)
-        self.set_color(color)
+        self._color = self._validate_color(color)
 
     def __repr__(self) -> str:
         color = str(self.get_color())
@@ -25,6 +32,22 @@ class RedBlackTreeNode(BinaryTreeNode):
         return self._color
 
     def set_color(self, color: str | RedBlackTreeColor):
+        self._color = self._validate_color(color)
+        update_augmentation(self)
+        invalidate_digests(self)
+
+    def get_black_height(self) -> int:
+        """Returns the number of black nodes on the paths from the node down to the NIL leaves, including the node itself.
+        If the paths differ (the tree is not a valid red-black tree), the largest number is returned.
+        O(1) for augmented trees, otherwise the subtree is traversed.
+        """
+        return self._get_subtree_statistics()[BLACK_HEIGHT]
+
+    def _is_black_node(self) -> bool:
+        return self._color is RedBlackTreeColor.BLACK
+
+    @staticmethod
+    def _validate_color(color: str | RedBlackTreeColor) -> RedBlackTreeColor:
         if isinstance(color, str):
             try:
                 color = RedBlackTreeColor(color)
@@ -34,27 +57,33 @@ class RedBlackTreeNode(BinaryTreeNode):
         if not isinstance(color, RedBlackTreeColor):
             raise TypeError(
                 "Color must be an instance of RedBlackTreeColor Enum.")
-        self._color = color
-
-    def to_dict(self) -> dict[str, any]:
-        return {
-            "value": self._value,
-            "color": self._color.value,
-            "left": self._left.to_dict() if self._left else None,
-            "right": self._right.to_dict() if self._right else None,
-        }
-
-    def print_tree(self, level: int = 0, prefix: str = "Root: "):
-        print(" " * (level * 4) + prefix +
-              f"{self.get_value()} ({str(self.get_color())})")
-        self._print_child(self._left, level, "L--> ")
-        self._print_child(self._right, level, "R--> ")
-
-    def generate_tree_image(self, title: str | None = None) -> str | None:
+        return color
+
+    def validate(self, stop_at_first_violation: bool = False) -> list[TreeViolation]:
+        """Checks in a single pass whether the node and its subtrees form a valid red-black tree: search tree order,
+        parent links, black root, no red node with a red child and equal black heights.
+        Returns a list of violations (empty if the tree is valid). If only pass/fail is needed, stop_at_first_violation
+        stops the check at the first violation.
+        """
+        return validate_red_black_tree(self, stop_at_first_violation)
+
+    def _create_digest_header(self) -> bytes:
+        return f"RedBlackTreeNode:{self._value}:{self._color.value}".encode()
+
+    def _create_dict_from_node(self) -> dict[str, any]:
+        return {"value": self._value, "color": self._color.value}
+
+    def _format_label(self) -> str:
+        return f"{self._value} ({str(self._color)})"
+
+    def generate_tree_image(self, title: str | None = None, engine: str = "graphviz", image_format: str = "png") -> str | None:
         """Returns a Base64 encoded string containing the PNG image of the tree. Optionally add a title to display on the image.
+        With engine="python" the image is created without Graphviz, which is much faster for large or unbalanced trees.
+        image_format can be "png" or "svg".
         """
+        from binarytrees._visualization.visualize_binary_tree import generate_binary_tree_image
         try:
-            return generate_binary_tree_image(title, self, show_nil_nodes=True)
+            return generate_binary_tree_image(title, self, show_nil_nodes=True, engine=engine, image_format=image_format)
         except Exception as e:
             raise Exception(str(e))
 
@@ -76,6 +105,67 @@ class RedBlackTreeNode(BinaryTreeNode):
     def from_dict(cls, data: dict[str, any]) -> RedBlackTreeNode | None:
         return super().from_dict(data)
 
+    @classmethod
+    def from_bytes(cls, data: bytes | bytearray | memoryview) -> RedBlackTreeNode | None:
+        return super().from_bytes(data)
+
+    @classmethod
+    def from_sorted_values(cls, values: Iterable[int]) -> RedBlackTreeNode | None:
+        """Builds a valid red-black tree of minimal height from values sorted in ascending order in O(n).
+        All levels except the deepest one are complete. The nodes on the deepest level are red, all other nodes are black.
+        Unsorted or duplicate values raise a ValueError.
+        """
+        values = list(values)
+        check_sorted_and_distinct(values)
+        with pause_garbage_collection():
+            root, deepest_nodes = link_balanced_tree(cls._create_nodes(values, [RedBlackTreeColor.BLACK] * len(values)))
+        for node in deepest_nodes:
+            node._color = RedBlackTreeColor.RED
+        return root
+
+    @classmethod
+    def from_preorder_and_inorder(cls, preorder: Iterable[int], inorder: Iterable[int],
+                                  colors: Iterable[str | RedBlackTreeColor]) -> RedBlackTreeNode | None:
+        """Like BinaryTreeNode.from_preorder_and_inorder. colors contains the color of each node in preorder.
+        The colors are taken as they are, use validate() to check the red-black properties.
+        """
+        preorder = list(preorder)
+        with pause_garbage_collection():
+            return link_preorder_and_inorder(cls._create_nodes(preorder, list(colors)), list(inorder))
+
+    @classmethod
+    def from_level_order(cls, level_order: Iterable[int], colors: Iterable[str | RedBlackTreeColor]) -> RedBlackTreeNode | None:
+        """Like BinaryTreeNode.from_level_order. colors contains the color of each node in level order.
+        The colors are taken as they are, use validate() to check the red-black properties.
+        """
+        level_order = list(level_order)
+        with pause_garbage_collection():
+            return link_level_order(cls._create_nodes(level_order, list(colors)))
+
+    @classmethod
+    def _create_nodes(cls, values: list[int], colors: list[str | RedBlackTreeColor] | None = None) -> list[RedBlackTreeNode]:
+        if colors is None:
+            return [cls(value) for value in values]
+        if len(colors) != len(values):
+            raise ValueError("There must be exactly one color for each value")
+        # Each distinct color is only validated once instead of once per node by the constructor.
+        validated_colors = {color: cls._validate_color(color) for color in set(colors)}
+        create_node = object.__new__
+        initialize_node = BinaryTreeNode.__init__
+        nodes = []
+        for value, color in zip(values, colors):
+            node = create_node(cls)
+            initialize_node(node, value)
+            node._color = validated_colors[color]
+            nodes.append(node)
+        return nodes
+
+    @classmethod
+    def _check_compact_tree(cls, tree: CompactBinaryTree):
+        if not tree.is_red_black_tree():
+            raise ValueError(
+                "Invalid tree encoding: RedBlackTreeNode requires colored nodes")
+
     @classmethod
     def _create_node_from_dict(cls, data: dict[str, any]) -> RedBlackTreeNode:
         if "color" not in data:
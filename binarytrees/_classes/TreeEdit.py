@@ -0,0 +1,35 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from binarytrees._enums.TreeEditOperation import TreeEditOperation
+
+if TYPE_CHECKING:
+    from binarytrees._classes.BinaryTreeNode import BinaryTreeNode
+
+
+class TreeEdit:
+    """Class representing one operation of an edit script, which transforms a tree into another tree.
+    node is the affected node of the tree (None for insertions), other_node the corresponding node
+    of the other tree (None for deletions). cost is the part of the edit distance caused by the operation
+    and message describes the operation, so that it can be used as feedback.
+    """
+
+    __slots__ = ("operation", "node", "other_node", "cost", "message")
+
+    def __init__(self, operation: TreeEditOperation, node: BinaryTreeNode | None, other_node: BinaryTreeNode | None, cost: float, message: str):
+        self.operation = operation
+        self.node = node
+        self.other_node = other_node
+        self.cost = cost
+        self.message = message
+
+    def __repr__(self) -> str:
+        return f"TreeEdit[{self.operation}, {self.node!r}, {self.other_node!r}, {self.cost}]"
+
+    def to_dict(self) -> dict[str, any]:
+        return {
+            "operation": self.operation.value,
+            "value": self.node.get_value() if self.node is not None else None,
+            "other_value": self.other_node.get_value() if self.other_node is not None else None,
+            "cost": self.cost,
+            "message": self.message,
+        }
@@ -0,0 +1,43 @@
+from __future__ import annotations
+from binarytrees._enums.RedBlackTreeColor import RedBlackTreeColor
+from binarytrees._enums.TreeOperationStepKind import TreeOperationStepKind
+
+
+class TreeOperationStep:
+    """Class representing one elementary step of an operation on a tree, as recorded in an operation trace.
+    Nodes are identified by their value, which is unique in binary search trees:
+    - INSERT: a node with the value (and color, for red-black trees) was attached as a leaf.
+    - REMOVE: the node with the value, which had at most one child, was removed and replaced by its child.
+    - REPLACE_VALUE: the value of the node was replaced by new_value.
+    - ROTATE_LEFT / ROTATE_RIGHT: the tree was rotated at the node with the value.
+    - RECOLOR: the node with the value was colored in color.
+    """
+
+    __slots__ = ("kind", "value", "new_value", "color")
+
+    def __init__(self, kind: TreeOperationStepKind, value: int, new_value: int | None = None, color: RedBlackTreeColor | None = None):
+        self.kind = kind
+        self.value = value
+        self.new_value = new_value
+        self.color = color
+
+    def __repr__(self) -> str:
+        details = [str(self.value)]
+        if self.new_value is not None:
+            details.append(f"-> {self.new_value}")
+        if self.color is not None:
+            details.append(str(self.color))
+        return f"TreeOperationStep[{self.kind}, {' '.join(details)}]"
+
+    def __eq__(self, other: TreeOperationStep) -> bool:
+        if type(self) != type(other):
+            return False
+        return (self.kind, self.value, self.new_value, self.color) == (other.kind, other.value, other.new_value, other.color)
+
+    def to_dict(self) -> dict[str, any]:
+        step_dict = {"kind": self.kind.value, "value": self.value}
+        if self.new_value is not None:
+            step_dict["new_value"] = self.new_value
+        if self.color is not None:
+            step_dict["color"] = self.color.value
+        return step_dict
@@ -0,0 +1,50 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from binarytrees._enums.TreeViolationRule import TreeViolationRule
+
+if TYPE_CHECKING:
+    from binarytrees._classes.BinaryTreeNode import BinaryTreeNode
+
+
+class TreeViolation:
+    """Class representing a violation of a rule of binary search trees or red-black trees.
+    node is the node at which the rule is violated and path leads from the root to it (a sequence of "left" and "right").
+    message describes the violation and can be used as feedback.
+    """
+
+    __slots__ = ("rule", "node", "message", "_path", "_path_link")
+
+    def __init__(self, rule: TreeViolationRule, node: BinaryTreeNode, path: tuple[str, ...], message: str):
+        self.rule = rule
+        self.node = node
+        self.message = message
+        self._path = tuple(path)
+        self._path_link = None
+
+    @classmethod
+    def _from_path_link(cls, rule: TreeViolationRule, node: BinaryTreeNode, path_link: tuple | None, message: str) -> TreeViolation:
+        # The path is given as linked (parent link, direction) pairs and only built when it is accessed,
+        # so that many violations in a deep tree do not need quadratic memory.
+        violation = cls(rule, node, (), message)
+        violation._path = None
+        violation._path_link = path_link
+        return violation
+
+    @property
+    def path(self) -> tuple[str, ...]:
+        if self._path is None:
+            path = []
+            path_link = self._path_link
+            while path_link is not None:
+                path_link, direction = path_link
+                path.append(direction)
+            path.reverse()
+            self._path = tuple(path)
+            self._path_link = None
+        return self._path
+
+    def __repr__(self) -> str:
+        return f"TreeViolation[{self.rule}, {self.node!r}, {'/'.join(self.path) or 'root'}]"
+
+    def to_dict(self) -> dict[str, any]:
+        return {"rule": self.rule.value, "value": self.node.get_value(), "path": list(self.path), "message": self.message}
@@ -0,0 +1,287 @@
+from __future__ import annotations
+from collections import Counter
+from math import ceil
+from typing import TYPE_CHECKING
+from binarytrees._classes.TreeEdit import TreeEdit
+from binarytrees._enums.TreeEditOperation import TreeEditOperation
+
+if TYPE_CHECKING:
+    from binarytrees._classes.BinaryTreeNode import BinaryTreeNode
+
+# Costs of the edit operations. Recoloring a node is cheaper and can be configured.
+_INSERT_COST = 1.0
+_DELETE_COST = 1.0
+_RELABEL_COST = 1.0
+_MOVE_COST = 1.0
+DEFAULT_RECOLOR_COST = 0.5
+
+# Tolerance when retracing the optimal operations through the (floating point) distances.
+_EPSILON = 1e-9
+_INFINITY = float("inf")
+
+
+def compute_tree_edit_distance(tree: BinaryTreeNode | None, other_tree: BinaryTreeNode | None,
+                               recolor_cost: float = DEFAULT_RECOLOR_COST,
+                               max_distance: float | None = None) -> tuple[float, list[TreeEdit]]:
+    """Computes the ordered tree edit distance (Zhang-Shasha) between the tree and the other tree
+    and an edit script, which transforms the tree into the other tree (e.g. a student tree into the solution).
+    Inserting, deleting and changing the value of a node cost 1, recoloring a node costs recolor_cost and
+    a node which is the left child instead of the right child (or vice versa) costs 1 for moving it.
+    Only pairs of nodes whose positions in postorder differ by at most a bound k are compared, which is exact
+    as long as the distance is at most k (Touzet's k-strip). k starts at a lower bound of the distance and grows
+    until it covers the distance, so the running time grows with the size of the difference rather than the size
+    of the trees, and identical trees are recognized by their structural digests without comparing any nodes.
+    Trees which differ completely take up to a few seconds with several hundred nodes. If the distance is greater
+    than max_distance, the computation stops as soon as this is certain and (inf, []) is returned,
+    which bounds the running time for such submissions.
+    Returns the distance and the list of edits (empty if the trees are equal).
+    """
+    if tree is not None and other_tree is not None:
+        if type(tree) != type(other_tree):
+            raise TypeError("Both trees must be of the same type")
+        if tree.get_structural_digest() == other_tree.get_structural_digest():
+            return 0.0, []
+    flat_tree = _FlatTree(tree)
+    other_flat_tree = _FlatTree(other_tree)
+    size, other_size = len(flat_tree), len(other_flat_tree)
+    if size == 0 or other_size == 0:
+        distance = size * _DELETE_COST + other_size * _INSERT_COST
+        if max_distance is not None and distance > max_distance:
+            return _INFINITY, []
+        return distance, _create_edit_script(flat_tree, other_flat_tree, [], recolor_cost, 0)
+    # Every node whose value does not occur in the other tree has to be deleted, inserted or relabeled, which costs 1.
+    values = Counter(node._value for node in flat_tree.nodes[1:])
+    other_values = Counter(node._value for node in other_flat_tree.nodes[1:])
+    lower_bound = max((values - other_values).total(), (other_values - values).total())
+    if max_distance is not None and lower_bound > max_distance:
+        return _INFINITY, []
+    largest_size = max(size, other_size)
+    band = _limit_band(max(lower_bound, 1), largest_size, max_distance)
+    while True:
+        tree_distances = _compute_tree_distances(flat_tree, other_flat_tree, recolor_cost, band)
+        distance = tree_distances[size][other_size]
+        # A distance d leaves at most floor(d) nodes unmatched, so the result is exact if floor(d) <= k.
+        if distance < band + 1 or band >= largest_size:
+            break
+        if max_distance is not None and band >= max_distance:
+            return _INFINITY, []
+        # The distance found is an upper bound of the exact one, so a band of its size is always sufficient.
+        # It is used directly if it is close, otherwise the band is doubled, so the work stays proportional to the last band.
+        band = _limit_band(int(distance) if distance < 4 * band + 1 else 2 * band, largest_size, max_distance)
+    if max_distance is not None and distance > max_distance:
+        return _INFINITY, []
+    return distance, _create_edit_script(flat_tree, other_flat_tree, tree_distances, recolor_cost, band)
+
+
+def _limit_band(band: int, largest_size: int, max_distance: float | None) -> int:
+    # A band covering half of the larger tree costs almost as much as comparing all pairs, which is exact for every distance.
+    if 2 * band >= largest_size:
+        band = largest_size
+    if max_distance is not None:
+        band = min(band, ceil(max_distance))
+    return band
+
+
+class _FlatTree:
+    """Tree numbered in postorder from 1 to n, as used by the Zhang-Shasha algorithm.
+    """
+
+    def __init__(self, root: BinaryTreeNode | None):
+        # Index 0 is unused, so that the indices match the algorithm.
+        self.nodes = [None]
+        self.parents = [None]
+        self.sides = [None]
+        self.leftmost = [0]
+        if root is None:
+            return
+        # Stack entries: (node, parent, side, children done), child_indices holds the indices of finished subtrees.
+        stack = [(root, None, None, False)]
+        child_indices = []
+        while stack:
+            node, parent, side, children_done = stack.pop()
+            if not children_done:
+                stack.append((node, parent, side, True))
+                if node._right is not None:
+                    stack.append((node._right, node, "right", False))
+                if node._left is not None:
+                    stack.append((node._left, node, "left", False))
+                continue
+            index = len(self.nodes)
+            leftmost = index
+            right_index = child_indices.pop() if node._right is not None else None
+            left_index = child_indices.pop() if node._left is not None else None
+            first_child = left_index if left_index is not None else right_index
+            if first_child is not None:
+                leftmost = self.leftmost[first_child]
+            self.nodes.append(node)
+            self.parents.append(parent)
+            self.sides.append(side)
+            self.leftmost.append(leftmost)
+            child_indices.append(index)
+
+    def __len__(self) -> int:
+        return len(self.nodes) - 1
+
+    def get_keyroots(self) -> list[int]:
+        # Nodes which have no parent with the same leftmost leaf, i.e. the root and all nodes which are not a first child.
+        keyroots = {}
+        for index in range(1, len(self.nodes)):
+            keyroots[self.leftmost[index]] = index
+        return sorted(keyroots.values())
+
+
+def _get_relabel_cost(flat_tree: _FlatTree, index: int, other_flat_tree: _FlatTree, other_index: int, recolor_cost: float) -> float:
+    side, other_side = flat_tree.sides[index], other_flat_tree.sides[other_index]
+    cost = _MOVE_COST if side is not None and other_side is not None and side != other_side else 0.0
+    node, other_node = flat_tree.nodes[index], other_flat_tree.nodes[other_index]
+    if node._value != other_node._value:
+        cost += _RELABEL_COST
+    if getattr(node, "_color", None) is not getattr(other_node, "_color", None):
+        cost += recolor_cost
+    return cost
+
+
+def _compute_forest_distances(flat_tree: _FlatTree, other_flat_tree: _FlatTree, index: int, other_index: int,
+                              tree_distances: list[list[float]], recolor_cost: float, band: int) -> list[list[float]]:
+    # Distances between the forests flat_tree[leftmost(index)..x] and other_flat_tree[leftmost(other_index)..y],
+    # stored at [x - leftmost(index) + 1][y - leftmost(other_index) + 1]. Distances between whole subtrees are
+    # stored in tree_distances as a side effect. Only cells whose forests (and whose positions in the whole trees)
+    # differ by at most band nodes are computed. The others stay infinite, since an optimal mapping with a distance
+    # of at most band never passes through them.
+    leftmost, other_leftmost = flat_tree.leftmost, other_flat_tree.leftmost
+    first, other_first = leftmost[index], other_leftmost[other_index]
+    rows, columns = index - first + 2, other_index - other_first + 2
+    shift = first - other_first
+    forest_distances = [[_INFINITY] * columns for _ in range(rows)]
+    first_row = forest_distances[0]
+    for x in range(min(rows, band + 1)):
+        forest_distances[x][0] = x * _DELETE_COST
+    for y in range(1, min(columns, band + 1)):
+        first_row[y] = y * _INSERT_COST
+    # Rows of the forests before the subtrees of the nodes of the other tree.
+    other_offsets = [0] + [other_leftmost[other_node] - other_first for other_node in range(other_first, other_index + 1)]
+    for x in range(1, rows):
+        node = first + x - 1
+        node_offset = leftmost[node] - first
+        row, previous_row, offset_row = forest_distances[x], forest_distances[x - 1], forest_distances[node_offset]
+        node_distances = tree_distances[node]
+        for y in range(max(1, x - band, x + shift - band), min(columns, x + band + 1, x + shift + band + 1)):
+            other_node = other_first + y - 1
+            distance = previous_row[y] + _DELETE_COST
+            insert_distance = row[y - 1] + _INSERT_COST
+            if insert_distance < distance:
+                distance = insert_distance
+            other_offset = other_offsets[y]
+            if other_offset == 0 and node_offset == 0:
+                # Both forests are whole trees.
+                match_distance = previous_row[y - 1] + _get_relabel_cost(flat_tree, node, other_flat_tree, other_node, recolor_cost)
+                if match_distance < distance:
+                    distance = match_distance
+                node_distances[other_node] = distance
+            else:
+                match_distance = offset_row[other_offset] + node_distances[other_node]
+                if match_distance < distance:
+                    distance = match_distance
+            row[y] = distance
+    return forest_distances
+
+
+def _compute_tree_distances(flat_tree: _FlatTree, other_flat_tree: _FlatTree, recolor_cost: float, band: int) -> list[list[float]]:
+    # An optimal mapping with a distance of at most band only matches subtrees whose leftmost leaves are at most band
+    # positions apart in postorder, since the nodes before them are matched among each other.
+    # The distances of all other pairs of subtrees stay infinite.
+    tree_distances = [[_INFINITY] * (len(other_flat_tree) + 1) for _ in range(len(flat_tree) + 1)]
+    leftmost, other_leftmost = flat_tree.leftmost, other_flat_tree.leftmost
+    # Keyroots have distinct leftmost leaves, so the keyroots of the other tree are found by the position of their leftmost leaf.
+    other_keyroots = [None] * (len(other_flat_tree) + 1)
+    for other_index in other_flat_tree.get_keyroots():
+        other_keyroots[other_leftmost[other_index]] = other_index
+    for index in flat_tree.get_keyroots():
+        first = leftmost[index]
+        # Subtrees of the other tree have to be computed before the subtrees containing them.
+        nearby_keyroots = sorted(other_index for other_index in other_keyroots[max(1, first - band):first + band + 1]
+                                 if other_index is not None)
+        for other_index in nearby_keyroots:
+            _compute_forest_distances(flat_tree, other_flat_tree, index, other_index, tree_distances, recolor_cost, band)
+    return tree_distances
+
+
+def _create_edit_script(flat_tree: _FlatTree, other_flat_tree: _FlatTree, tree_distances: list[list[float]],
+                        recolor_cost: float, band: int) -> list[TreeEdit]:
+    # Retraces the optimal operations by recomputing the forest distances of the matched subtree pairs.
+    operations = []
+    size, other_size = len(flat_tree), len(other_flat_tree)
+    if size == 0 or other_size == 0:
+        operations.extend(("delete", i, None) for i in range(size, 0, -1))
+        operations.extend(("insert", None, j) for j in range(other_size, 0, -1))
+    else:
+        leftmost, other_leftmost = flat_tree.leftmost, other_flat_tree.leftmost
+        pending_pairs = [(size, other_size)]
+        while pending_pairs:
+            index, other_index = pending_pairs.pop()
+            forest_distances = _compute_forest_distances(flat_tree, other_flat_tree, index, other_index, tree_distances,
+                                                         recolor_cost, band)
+            first, other_first = leftmost[index], other_leftmost[other_index]
+            x, y = index - first + 1, other_index - other_first + 1
+            while x > 0 or y > 0:
+                node, other_node = first + x - 1, other_first + y - 1
+                distance = forest_distances[x][y]
+                if x > 0 and abs(distance - forest_distances[x - 1][y] - _DELETE_COST) < _EPSILON:
+                    operations.append(("delete", node, None))
+                    x -= 1
+                elif y > 0 and abs(distance - forest_distances[x][y - 1] - _INSERT_COST) < _EPSILON:
+                    operations.append(("insert", None, other_node))
+                    y -= 1
+                elif leftmost[node] == first and other_leftmost[other_node] == other_first:
+                    operations.append(("match", node, other_node))
+                    x -= 1
+                    y -= 1
+                else:
+                    # The optimal solution matches the subtrees of both nodes, which are retraced separately.
+                    pending_pairs.append((node, other_node))
+                    x = leftmost[node] - first
+                    y = other_leftmost[other_node] - other_first
+    # The operations were found from the end of the postorder, so parents come before their children.
+    edits = []
+    for kind, index, other_index in operations:
+        if kind == "delete":
+            edits.append(_create_delete_edit(flat_tree, index))
+        elif kind == "insert":
+            edits.append(_create_insert_edit(other_flat_tree, other_index))
+        else:
+            edits.extend(_create_match_edits(flat_tree, index, other_flat_tree, other_index, recolor_cost))
+    return edits
+
+
+def _describe_node(node: BinaryTreeNode) -> str:
+    color = getattr(node, "_color", None)
+    return f"the {str(color).lower()} node {node._value}" if color is not None else f"the node {node._value}"
+
+
+def _create_delete_edit(flat_tree: _FlatTree, index: int) -> TreeEdit:
+    node = flat_tree.nodes[index]
+    return TreeEdit(TreeEditOperation.DELETE, node, None, _DELETE_COST, f"Remove {_describe_node(node)}.")
+
+
+def _create_insert_edit(other_flat_tree: _FlatTree, other_index: int) -> TreeEdit:
+    other_node, parent = other_flat_tree.nodes[other_index], other_flat_tree.parents[other_index]
+    position = f"as the {other_flat_tree.sides[other_index]} child of {parent._value}" if parent is not None else "as the root"
+    return TreeEdit(TreeEditOperation.INSERT, None, other_node, _INSERT_COST, f"Insert {_describe_node(other_node)} {position}.")
+
+
+def _create_match_edits(flat_tree: _FlatTree, index: int, other_flat_tree: _FlatTree, other_index: int,
+                        recolor_cost: float) -> list[TreeEdit]:
+    node, other_node = flat_tree.nodes[index], other_flat_tree.nodes[other_index]
+    edits = []
+    if node._value != other_node._value:
+        edits.append(TreeEdit(TreeEditOperation.RELABEL, node, other_node, _RELABEL_COST,
+                              f"Change the value {node._value} to {other_node._value}."))
+    color, other_color = getattr(node, "_color", None), getattr(other_node, "_color", None)
+    if color is not other_color:
+        edits.append(TreeEdit(TreeEditOperation.RECOLOR, node, other_node, recolor_cost,
+                              f"Color the node {other_node._value} {str(other_color).lower()}."))
+    side, other_side = flat_tree.sides[index], other_flat_tree.sides[other_index]
+    if side is not None and other_side is not None and side != other_side:
+        edits.append(TreeEdit(TreeEditOperation.MOVE, node, other_node, _MOVE_COST,
+                              f"{other_node._value} must be the {other_side} child instead of the {side} child."))
+    return edits
@@ -0,0 +1,151 @@
+from __future__ import annotations
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+import gc
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from binarytrees._classes.BinaryTreeNode import BinaryTreeNode
+
+# The builders link nodes which were created in the order of the given sequence, working directly on the private fields.
+# Each of them visits every node a constant number of times and uses explicit stacks or queues instead of recursion.
+
+
+@contextmanager
+def pause_garbage_collection() -> Iterator[None]:
+    # The cyclic garbage collector would otherwise scan the new nodes again and again while they are created,
+    # although none of them is garbage (they reference each other through their parents).
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def check_sorted_and_distinct(values: list[int]):
+    if any(value >= next_value for value, next_value in zip(values, values[1:])):
+        raise ValueError("The values must be sorted in ascending order and distinct")
+
+
+def link_balanced_tree(nodes: list[BinaryTreeNode]) -> tuple[BinaryTreeNode | None, list[BinaryTreeNode]]:
+    """Links the nodes, whose values are sorted, into a binary search tree in which the middle node of every range is the root
+    of its subtree. All levels except the deepest one are complete, so the height is minimal.
+    Returns the root and the nodes on the deepest level (none if the tree only has a root).
+    """
+    count = len(nodes)
+    if count == 0:
+        return None, []
+    deepest_depth = count.bit_length() - 1
+    deepest_nodes = []
+    root_index = (count - 1) // 2
+    # Stack entries: index of the root of a subtree (the middle of its range), first and last index of the range and its depth.
+    # Ranges of a single node are not pushed, which saves the stack operations for half of the nodes.
+    stack = [(root_index, 0, count - 1, 0)] if count > 1 else []
+    while stack:
+        middle, first, last, depth = stack.pop()
+        node = nodes[middle]
+        depth += 1
+        if first < middle:
+            child_middle = (first + middle - 1) // 2
+            child = nodes[child_middle]
+            node._left = child
+            child._parent = node
+            if first < middle - 1:
+                stack.append((child_middle, first, middle - 1, depth))
+            elif depth == deepest_depth:
+                deepest_nodes.append(child)
+        if middle < last:
+            child_middle = (middle + 1 + last) // 2
+            child = nodes[child_middle]
+            node._right = child
+            child._parent = node
+            if middle + 1 < last:
+                stack.append((child_middle, middle + 1, last, depth))
+            elif depth == deepest_depth:
+                deepest_nodes.append(child)
+    return nodes[root_index], deepest_nodes
+
+
+def link_preorder_and_inorder(nodes: list[BinaryTreeNode], inorder: list[int]) -> BinaryTreeNode | None:
+    """Links the nodes, which were created in preorder, into the binary tree with the given inorder sequence of values.
+    The values must be distinct. Sequences which do not belong to the same tree raise a ValueError.
+    """
+    if len(nodes) != len(inorder):
+        raise ValueError("The preorder and inorder sequences must have the same length")
+    if len(set(inorder)) != len(inorder):
+        raise ValueError("The values must be distinct")
+    if not nodes:
+        return None
+    # The stack holds the path of nodes whose left subtree is still being built. A node gets the next node as its left child,
+    # unless it is the next node in inorder. Then its left subtree is complete and the next node is the right child
+    # of the last node which is popped from the stack because it comes next in inorder.
+    stack = [nodes[0]]
+    inorder_index = 0
+    for node in nodes[1:]:
+        parent = stack[-1]
+        if parent._value != inorder[inorder_index]:
+            parent._left = node
+        else:
+            while stack and stack[-1]._value == inorder[inorder_index]:
+                parent = stack.pop()
+                inorder_index += 1
+                if inorder_index == len(inorder):
+                    raise ValueError("The preorder and inorder sequences do not belong to the same tree")
+            parent._right = node
+        node._parent = parent
+        stack.append(node)
+    # The linking only looks at the inorder sequence as far as it is needed, so the whole sequence is compared at the end.
+    if _get_inorder_values(nodes[0]) != list(inorder):
+        raise ValueError("The preorder and inorder sequences do not belong to the same tree")
+    return nodes[0]
+
+
+def link_level_order(nodes: list[BinaryTreeNode]) -> BinaryTreeNode | None:
+    """Links the nodes, which were created in level order, into the binary search tree with this level order.
+    The values must be distinct. A sequence which is not the level order of a binary search tree raises a ValueError.
+    """
+    if not nodes:
+        return None
+    # Queue entries: a node whose children are not yet known and the range of values allowed in its subtree.
+    # In level order, the children of a node follow the children of all nodes in front of it in the queue,
+    # so the next value is a child of the first node whose range contains it.
+    queue = deque([(nodes[0], float("-inf"), float("inf"))])
+    index = 1
+    count = len(nodes)
+    while queue and index < count:
+        parent, lower_bound, upper_bound = queue.popleft()
+        value = parent._value
+        node = nodes[index]
+        if lower_bound < node._value < value:
+            parent._left = node
+            node._parent = parent
+            queue.append((node, lower_bound, value))
+            index += 1
+            if index == count:
+                break
+            node = nodes[index]
+        if value < node._value < upper_bound:
+            parent._right = node
+            node._parent = parent
+            queue.append((node, value, upper_bound))
+            index += 1
+    if index < count:
+        raise ValueError("The values are not the level order of a binary search tree with distinct values")
+    return nodes[0]
+
+
+def _get_inorder_values(root: BinaryTreeNode) -> list[int]:
+    values = []
+    stack = []
+    node = root
+    while stack or node is not None:
+        while node is not None:
+            stack.append(node)
+            node = node._left
+        node = stack.pop()
+        values.append(node._value)
+        node = node._right
+    return values
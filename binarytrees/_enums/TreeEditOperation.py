@@ -0,0 +1,14 @@
+from enum import Enum
+
+
+class TreeEditOperation(Enum):
+    """Enum containing the operations of an edit script, which transforms one tree into another.
+    """
+    INSERT = "INSERT"
+    DELETE = "DELETE"
+    RELABEL = "RELABEL"
+    RECOLOR = "RECOLOR"
+    MOVE = "MOVE"
+
+    def __str__(self):
+        return self.value
@@ -0,0 +1,15 @@
+from enum import Enum
+
+
+class TreeOperationStepKind(Enum):
+    """Enum containing the elementary steps of which insertions into and deletions from trees consist.
+    """
+    INSERT = "INSERT"
+    REMOVE = "REMOVE"
+    REPLACE_VALUE = "REPLACE_VALUE"
+    ROTATE_LEFT = "ROTATE_LEFT"
+    ROTATE_RIGHT = "ROTATE_RIGHT"
+    RECOLOR = "RECOLOR"
+
+    def __str__(self):
+        return self.value
@@ -0,0 +1,14 @@
+from enum import Enum
+
+
+class TreeViolationRule(Enum):
+    """Enum containing the rules of binary search trees and red-black trees, which a tree can violate.
+    """
+    SEARCH_TREE_ORDER = "SEARCH_TREE_ORDER"
+    PARENT_POINTER = "PARENT_POINTER"
+    ROOT_COLOR = "ROOT_COLOR"
+    RED_RED = "RED_RED"
+    BLACK_HEIGHT = "BLACK_HEIGHT"
+
+    def __str__(self):
+        return self.value
@@ -0,0 +1,267 @@
+from __future__ import annotations
+from collections.abc import Callable, Iterable, Iterator
+import gc
+from binarytrees._augmentation.subtree_statistics import create_stale_statistics, mark_augmentation_stale, refresh_augmentation
+from binarytrees._classes.BinaryTreeNode import BinaryTreeNode, invalidate_digests
+from binarytrees._classes.RedBlackTreeNode import RedBlackTreeNode
+from binarytrees._classes.TreeOperationStep import TreeOperationStep
+from binarytrees._enums.TreeOperationStepKind import TreeOperationStepKind
+
+# The operations work directly on the private fields of the nodes instead of using the setters and their type checks.
+# The helpers changing links, values or colors discard the cached digests of the changed nodes and their ancestors.
+# If a trace (a list) is passed, each elementary step is appended to it as a TreeOperationStep.
+# Without a trace, no steps are created at all.
+# In augmented trees, the helpers changing links or colors mark the cached subtree statistics as stale
+# and every operation recomputes them once when it is done.
+
+
+def insert_into_binary_search_tree(root: BinaryTreeNode | None, value: int, trace: list[TreeOperationStep] | None = None) -> BinaryTreeNode:
+    """Inserts the value as a new leaf into the binary search tree and returns the root of the tree.
+    The tree is modified in place. Values which are already contained in the tree are ignored.
+    """
+    root = _insert_into_binary_search_tree(root, value, trace)
+    refresh_augmentation(root)
+    return root
+
+
+def insert_values_into_binary_search_tree(root: BinaryTreeNode | None, values: Iterable[int], trace: list[TreeOperationStep] | None = None) -> BinaryTreeNode | None:
+    """Inserts the values one after another like insert_into_binary_search_tree and returns the root of the tree.
+    This is faster than inserting the values one by one, e.g. for long lists of values.
+    """
+    return _apply_to_values(_insert_into_binary_search_tree, root, values, trace)
+
+
+def _insert_into_binary_search_tree(root: BinaryTreeNode | None, value: int, trace: list[TreeOperationStep] | None) -> BinaryTreeNode:
+    node = type(root)(value) if root is not None else BinaryTreeNode(value)
+    parent = _find_insertion_parent(root, value)
+    if parent is not None and parent._value == value:
+        return root
+    root = _attach_leaf(root, parent, node)
+    if trace is not None:
+        trace.append(TreeOperationStep(TreeOperationStepKind.INSERT, value))
+    return root
+
+
+def delete_from_binary_search_tree(root: BinaryTreeNode | None, value: int, trace: list[TreeOperationStep] | None = None) -> BinaryTreeNode | None:
+    """Deletes the value from the binary search tree and returns the root of the tree (None if it became empty).
+    The tree is modified in place. A node with two children takes over the value of its inorder successor,
+    which is removed instead. Values which are not contained in the tree are ignored.
+    """
+    root = _delete_from_binary_search_tree(root, value, trace)
+    refresh_augmentation(root)
+    return root
+
+
+def delete_values_from_binary_search_tree(root: BinaryTreeNode | None, values: Iterable[int], trace: list[TreeOperationStep] | None = None) -> BinaryTreeNode | None:
+    """Deletes the values one after another like delete_from_binary_search_tree and returns the root of the tree.
+    This is faster than deleting the values one by one, e.g. for long lists of values.
+    """
+    return _apply_to_values(_delete_from_binary_search_tree, root, values, trace)
+
+
+def _delete_from_binary_search_tree(root: BinaryTreeNode | None, value: int, trace: list[TreeOperationStep] | None) -> BinaryTreeNode | None:
+    node = _find_node(root, value)
+    if node is None:
+        return root
+    removed = _get_node_to_remove(node)
+    root = _remove_node(root, removed, trace)
+    if removed is not node:
+        _replace_value(node, removed._value, trace)
+    return root
+
+
+def rotate_left(root: BinaryTreeNode, node: BinaryTreeNode, trace: list[TreeOperationStep] | None = None) -> BinaryTreeNode:
+    """Rotates the tree to the left at the node, so that its right child takes its place.
+    Returns the root of the tree, which changes if the tree is rotated at its root.
+    """
+    if node._right is None:
+        raise ValueError(f"{node!r} cannot be rotated to the left, since it has no right child")
+    root = _rotate_left(root, node, trace)
+    refresh_augmentation(root)
+    return root
+
+
+def rotate_right(root: BinaryTreeNode, node: BinaryTreeNode, trace: list[TreeOperationStep] | None = None) -> BinaryTreeNode:
+    """Rotates the tree to the right at the node, so that its left child takes its place.
+    Returns the root of the tree, which changes if the tree is rotated at its root.
+    """
+    if node._left is None:
+        raise ValueError(f"{node!r} cannot be rotated to the right, since it has no left child")
+    root = _rotate_right(root, node, trace)
+    refresh_augmentation(root)
+    return root
+
+
+def replay_tree_operation_steps(root: BinaryTreeNode | None, steps: Iterable[TreeOperationStep]) -> Iterator[BinaryTreeNode | None]:
+    """Applies recorded steps one after another to the tree and yields the root after each step.
+    This gives all intermediate states of an operation (e.g. for partial credit) while only a single tree is kept:
+    the tree is modified in place, so pass a deep_copy of the initial tree if it is still needed.
+    An augmented tree stays augmented, also if it becomes empty in between.
+    """
+    # An empty tree is None, so whether the tree was augmented is remembered for a new root inserted afterwards.
+    augmented = root is not None and root._augmentation is not None
+    for step in steps:
+        kind = step.kind
+        if kind is TreeOperationStepKind.INSERT:
+            if root is not None:
+                node_class = type(root)
+            else:
+                node_class = RedBlackTreeNode if step.color is not None else BinaryTreeNode
+            node = node_class(step.value, step.color) if step.color is not None else node_class(step.value)
+            root = _attach_leaf(root, _find_insertion_parent(root, step.value), node)
+            if root is node and augmented:
+                node._augmentation = create_stale_statistics()
+        else:
+            node = _find_node(root, step.value)
+            if node is None:
+                raise ValueError(f"The tree does not contain the value {step.value} of {step!r}")
+            if kind is TreeOperationStepKind.REMOVE:
+                root = _remove_node(root, node, None)
+            elif kind is TreeOperationStepKind.REPLACE_VALUE:
+                node._value = step.new_value
+                invalidate_digests(node)
+            elif kind is TreeOperationStepKind.ROTATE_LEFT:
+                root = _rotate_left(root, node, None)
+            elif kind is TreeOperationStepKind.ROTATE_RIGHT:
+                root = _rotate_right(root, node, None)
+            elif kind is TreeOperationStepKind.RECOLOR:
+                node._color = step.color
+                mark_augmentation_stale(node)
+                invalidate_digests(node)
+        refresh_augmentation(root)
+        if root is not None:
+            augmented = root._augmentation is not None
+        yield root
+
+
+def _apply_to_values(operation: Callable[[BinaryTreeNode | None, int, list[TreeOperationStep] | None], BinaryTreeNode | None],
+                     root: BinaryTreeNode | None, values: Iterable[int], trace: list[TreeOperationStep] | None) -> BinaryTreeNode | None:
+    # The cyclic garbage collector is paused meanwhile. The new nodes reference each other through their parents,
+    # so it would otherwise scan them again and again, although none of them is garbage.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for value in values:
+            root = operation(root, value, trace)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+        refresh_augmentation(root)
+    return root
+
+
+def _find_node(root: BinaryTreeNode | None, value: int) -> BinaryTreeNode | None:
+    node = root
+    while node is not None:
+        node_value = node._value
+        if value == node_value:
+            return node
+        node = node._left if value < node_value else node._right
+    return None
+
+
+def _find_insertion_parent(root: BinaryTreeNode | None, value: int) -> BinaryTreeNode | None:
+    # Returns the node below which the value belongs, or the node which already contains the value.
+    parent = None
+    node = root
+    while node is not None:
+        node_value = node._value
+        if value == node_value:
+            return node
+        parent = node
+        node = node._left if value < node_value else node._right
+    return parent
+
+
+def _attach_leaf(root: BinaryTreeNode | None, parent: BinaryTreeNode | None, node: BinaryTreeNode) -> BinaryTreeNode:
+    node._parent = parent
+    if parent is None:
+        return node
+    if node._value < parent._value:
+        parent._left = node
+    else:
+        parent._right = node
+    invalidate_digests(parent)
+    if parent._augmentation is not None:
+        node._augmentation = create_stale_statistics()
+        mark_augmentation_stale(parent)
+    return root
+
+
+def _get_node_to_remove(node: BinaryTreeNode) -> BinaryTreeNode:
+    # A node with two children is replaced by its inorder successor, which has no left child.
+    if node._left is None or node._right is None:
+        return node
+    successor = node._right
+    while successor._left is not None:
+        successor = successor._left
+    return successor
+
+
+def _remove_node(root: BinaryTreeNode, node: BinaryTreeNode, trace: list[TreeOperationStep] | None) -> BinaryTreeNode | None:
+    # Removes a node with at most one child by putting the child in its place.
+    child = node._left if node._left is not None else node._right
+    parent = node._parent
+    _replace_in_parent(node, child)
+    if node is root:
+        root = child
+    if parent is not None:
+        invalidate_digests(parent)
+    if node._augmentation is not None:
+        mark_augmentation_stale(parent)
+        node._augmentation = None
+    node._parent = node._left = node._right = None
+    node._digest_cache = None
+    if trace is not None:
+        trace.append(TreeOperationStep(TreeOperationStepKind.REMOVE, node._value))
+    return root
+
+
+def _replace_value(node: BinaryTreeNode, value: int, trace: list[TreeOperationStep] | None):
+    if trace is not None:
+        trace.append(TreeOperationStep(TreeOperationStepKind.REPLACE_VALUE, node._value, new_value=value))
+    node._value = value
+    invalidate_digests(node)
+
+
+def _replace_in_parent(node: BinaryTreeNode, replacement: BinaryTreeNode | None):
+    parent = node._parent
+    if replacement is not None:
+        replacement._parent = parent
+    if parent is not None:
+        if parent._left is node:
+            parent._left = replacement
+        else:
+            parent._right = replacement
+
+
+def _rotate_left(root: BinaryTreeNode, node: BinaryTreeNode, trace: list[TreeOperationStep] | None) -> BinaryTreeNode:
+    pivot = node._right
+    node._right = pivot._left
+    if pivot._left is not None:
+        pivot._left._parent = node
+    _replace_in_parent(node, pivot)
+    pivot._left = node
+    node._parent = pivot
+    # Marks the pivot and its ancestors as well.
+    mark_augmentation_stale(node)
+    invalidate_digests(node)
+    if trace is not None:
+        trace.append(TreeOperationStep(TreeOperationStepKind.ROTATE_LEFT, node._value))
+    return pivot if node is root else root
+
+
+def _rotate_right(root: BinaryTreeNode, node: BinaryTreeNode, trace: list[TreeOperationStep] | None) -> BinaryTreeNode:
+    pivot = node._left
+    node._left = pivot._right
+    if pivot._right is not None:
+        pivot._right._parent = node
+    _replace_in_parent(node, pivot)
+    pivot._right = node
+    node._parent = pivot
+    # Marks the pivot and its ancestors as well.
+    mark_augmentation_stale(node)
+    invalidate_digests(node)
+    if trace is not None:
+        trace.append(TreeOperationStep(TreeOperationStepKind.ROTATE_RIGHT, node._value))
+    return pivot if node is root else root
@@ -0,0 +1,206 @@
+from __future__ import annotations
+from collections.abc import Iterable
+from binarytrees._augmentation.subtree_statistics import mark_augmentation_stale, refresh_augmentation
+from binarytrees._classes.BinaryTreeNode import invalidate_digests
+from binarytrees._classes.RedBlackTreeNode import RedBlackTreeNode
+from binarytrees._classes.TreeOperationStep import TreeOperationStep
+from binarytrees._enums.RedBlackTreeColor import RedBlackTreeColor
+from binarytrees._enums.TreeOperationStepKind import TreeOperationStepKind
+from binarytrees._enums.TreeViolationRule import TreeViolationRule
+from binarytrees._operations.binary_search_tree_operations import (_apply_to_values, _attach_leaf, _find_insertion_parent,
+                                                                   _find_node, _get_node_to_remove, _remove_node,
+                                                                   _replace_value, _rotate_left, _rotate_right)
+
+_RED = RedBlackTreeColor.RED
+_BLACK = RedBlackTreeColor.BLACK
+
+
+def insert_into_red_black_tree(root: RedBlackTreeNode | None, value: int, trace: list[TreeOperationStep] | None = None) -> RedBlackTreeNode:
+    """Inserts the value as a new red leaf into the red-black tree, restores the red-black properties
+    with recolorings and rotations and returns the root of the tree.
+    The tree is modified in place. Values which are already contained in the tree are ignored.
+    """
+    _check_red_black_tree(root)
+    root = _insert_into_red_black_tree(root, value, trace)
+    refresh_augmentation(root)
+    return root
+
+
+def insert_values_into_red_black_tree(root: RedBlackTreeNode | None, values: Iterable[int], trace: list[TreeOperationStep] | None = None) -> RedBlackTreeNode | None:
+    """Inserts the values one after another like insert_into_red_black_tree and returns the root of the tree.
+    This is faster than inserting the values one by one, e.g. for long lists of values.
+    """
+    _check_red_black_tree(root)
+    return _apply_to_values(_insert_into_red_black_tree, root, values, trace)
+
+
+def _insert_into_red_black_tree(root: RedBlackTreeNode | None, value: int, trace: list[TreeOperationStep] | None) -> RedBlackTreeNode:
+    node = RedBlackTreeNode(value)
+    parent = _find_insertion_parent(root, value)
+    if parent is not None and parent._value == value:
+        return root
+    root = _attach_leaf(root, parent, node)
+    if trace is not None:
+        trace.append(TreeOperationStep(TreeOperationStepKind.INSERT, value, color=_RED))
+    return _fix_after_insertion(root, node, trace)
+
+
+def delete_from_red_black_tree(root: RedBlackTreeNode | None, value: int, trace: list[TreeOperationStep] | None = None) -> RedBlackTreeNode | None:
+    """Deletes the value from the red-black tree, restores the red-black properties with recolorings and rotations
+    and returns the root of the tree (None if it became empty).
+    The tree is modified in place. A node with two children takes over the value of its inorder successor,
+    which is removed instead. Values which are not contained in the tree are ignored.
+    If the tree violates the red-black properties so that they cannot be restored, a ValueError naming the violated rule
+    is raised and the tree is left partially modified (use validate_red_black_tree to check submitted trees first).
+    """
+    _check_red_black_tree(root)
+    root = _delete_from_red_black_tree(root, value, trace)
+    refresh_augmentation(root)
+    return root
+
+
+def delete_values_from_red_black_tree(root: RedBlackTreeNode | None, values: Iterable[int], trace: list[TreeOperationStep] | None = None) -> RedBlackTreeNode | None:
+    """Deletes the values one after another like delete_from_red_black_tree and returns the root of the tree.
+    This is faster than deleting the values one by one, e.g. for long lists of values.
+    """
+    _check_red_black_tree(root)
+    return _apply_to_values(_delete_from_red_black_tree, root, values, trace)
+
+
+def _delete_from_red_black_tree(root: RedBlackTreeNode | None, value: int, trace: list[TreeOperationStep] | None) -> RedBlackTreeNode | None:
+    node = _find_node(root, value)
+    if node is None:
+        return root
+    removed = _get_node_to_remove(node)
+    child = removed._left if removed._left is not None else removed._right
+    parent = removed._parent
+    root = _remove_node(root, removed, trace)
+    if removed is not node:
+        _replace_value(node, removed._value, trace)
+    if removed._color is _BLACK:
+        # The paths through the removed node lack one black node.
+        root = _fix_after_removal(root, child, parent, trace)
+    return root
+
+
+def _check_red_black_tree(root: RedBlackTreeNode | None):
+    if root is not None and not isinstance(root, RedBlackTreeNode):
+        raise TypeError("The tree must be a RedBlackTreeNode or None")
+
+
+def _recolor(node: RedBlackTreeNode, color: RedBlackTreeColor, trace: list[TreeOperationStep] | None):
+    if node._color is color:
+        return
+    node._color = color
+    mark_augmentation_stale(node)
+    invalidate_digests(node)
+    if trace is not None:
+        trace.append(TreeOperationStep(TreeOperationStepKind.RECOLOR, node._value, color=color))
+
+
+def _is_black(node: RedBlackTreeNode | None) -> bool:
+    # NIL leaves are black.
+    return node is None or node._color is _BLACK
+
+
+def _fix_after_insertion(root: RedBlackTreeNode, node: RedBlackTreeNode, trace: list[TreeOperationStep] | None) -> RedBlackTreeNode:
+    # Resolves a red node with a red parent, moving upwards while the uncle is red.
+    parent = node._parent
+    while parent is not None and parent._color is _RED:
+        grandparent = parent._parent
+        if grandparent is None:
+            break
+        if parent is grandparent._left:
+            uncle = grandparent._right
+            if not _is_black(uncle):
+                _recolor(parent, _BLACK, trace)
+                _recolor(uncle, _BLACK, trace)
+                _recolor(grandparent, _RED, trace)
+                node = grandparent
+                parent = node._parent
+                continue
+            if node is parent._right:
+                root = _rotate_left(root, parent, trace)
+                node, parent = parent, node
+            _recolor(parent, _BLACK, trace)
+            _recolor(grandparent, _RED, trace)
+            root = _rotate_right(root, grandparent, trace)
+        else:
+            uncle = grandparent._left
+            if not _is_black(uncle):
+                _recolor(parent, _BLACK, trace)
+                _recolor(uncle, _BLACK, trace)
+                _recolor(grandparent, _RED, trace)
+                node = grandparent
+                parent = node._parent
+                continue
+            if node is parent._left:
+                root = _rotate_right(root, parent, trace)
+                node, parent = parent, node
+            _recolor(parent, _BLACK, trace)
+            _recolor(grandparent, _RED, trace)
+            root = _rotate_left(root, grandparent, trace)
+        break
+    _recolor(root, _BLACK, trace)
+    return root
+
+
+def _get_sibling(parent: RedBlackTreeNode, sibling: RedBlackTreeNode | None) -> RedBlackTreeNode:
+    # The side of the parent which lacks a black node has a sibling in every valid red-black tree, since the paths
+    # through the sibling contain at least one black node more. Trees which violate the rules (e.g. submitted ones) may not.
+    if sibling is None:
+        raise ValueError(f"The tree is not a valid red-black tree ({TreeViolationRule.BLACK_HEIGHT}): the paths from {parent!r} "
+                         "down to its NIL leaves do not all contain the same number of black nodes")
+    return sibling
+
+
+def _fix_after_removal(root: RedBlackTreeNode | None, node: RedBlackTreeNode | None, parent: RedBlackTreeNode | None,
+                       trace: list[TreeOperationStep] | None) -> RedBlackTreeNode | None:
+    # node (possibly a NIL leaf, hence the separate parent) carries an extra black, which is moved upwards
+    # until it can be absorbed by a red node or the root.
+    while parent is not None and _is_black(node):
+        if node is parent._left:
+            sibling = _get_sibling(parent, parent._right)
+            if sibling._color is _RED:
+                _recolor(sibling, _BLACK, trace)
+                _recolor(parent, _RED, trace)
+                root = _rotate_left(root, parent, trace)
+                sibling = _get_sibling(parent, parent._right)
+            if _is_black(sibling._left) and _is_black(sibling._right):
+                _recolor(sibling, _RED, trace)
+                node, parent = parent, parent._parent
+                continue
+            if _is_black(sibling._right):
+                _recolor(sibling._left, _BLACK, trace)
+                _recolor(sibling, _RED, trace)
+                root = _rotate_right(root, sibling, trace)
+                sibling = parent._right
+            _recolor(sibling, parent._color, trace)
+            _recolor(parent, _BLACK, trace)
+            _recolor(sibling._right, _BLACK, trace)
+            root = _rotate_left(root, parent, trace)
+        else:
+            sibling = _get_sibling(parent, parent._left)
+            if sibling._color is _RED:
+                _recolor(sibling, _BLACK, trace)
+                _recolor(parent, _RED, trace)
+                root = _rotate_right(root, parent, trace)
+                sibling = _get_sibling(parent, parent._left)
+            if _is_black(sibling._left) and _is_black(sibling._right):
+                _recolor(sibling, _RED, trace)
+                node, parent = parent, parent._parent
+                continue
+            if _is_black(sibling._left):
+                _recolor(sibling._right, _BLACK, trace)
+                _recolor(sibling, _RED, trace)
+                root = _rotate_left(root, sibling, trace)
+                sibling = parent._left
+            _recolor(sibling, parent._color, trace)
+            _recolor(parent, _BLACK, trace)
+            _recolor(sibling._left, _BLACK, trace)
+            root = _rotate_right(root, parent, trace)
+        node = root
+        break
+    if node is not None:
+        _recolor(node, _BLACK, trace)
+    return root
@@ -0,0 +1,88 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from binarytrees._classes.TreeViolation import TreeViolation
+from binarytrees._enums.RedBlackTreeColor import RedBlackTreeColor
+from binarytrees._enums.TreeViolationRule import TreeViolationRule
+
+if TYPE_CHECKING:
+    from binarytrees._classes.BinaryTreeNode import BinaryTreeNode
+    from binarytrees._classes.RedBlackTreeNode import RedBlackTreeNode
+
+_RED = RedBlackTreeColor.RED
+_BLACK = RedBlackTreeColor.BLACK
+
+
+def validate_binary_search_tree(root: BinaryTreeNode | None, stop_at_first_violation: bool = False) -> list[TreeViolation]:
+    """Checks the search tree order (every value in the left subtree is smaller, every value in the right subtree
+    is larger than the value of the node) and that the parent of each child is set to the node.
+    Returns all violations found, or at most the first one if stop_at_first_violation is set.
+    """
+    return _validate_binary_tree(root, False, stop_at_first_violation)
+
+
+def validate_red_black_tree(root: RedBlackTreeNode | None, stop_at_first_violation: bool = False) -> list[TreeViolation]:
+    """Checks all rules of binary search trees and additionally that the root is black, that no red node has a red child
+    and that every path from a node to its NIL leaves contains the same number of black nodes.
+    Returns all violations found, or at most the first one if stop_at_first_violation is set.
+    """
+    return _validate_binary_tree(root, True, stop_at_first_violation)
+
+
+def _validate_binary_tree(root: BinaryTreeNode | None, check_colors: bool, stop_at_first_violation: bool) -> list[TreeViolation]:
+    violations = []
+    if root is None:
+        return violations
+    if check_colors and root._color is not _BLACK:
+        violations.append(TreeViolation(TreeViolationRule.ROOT_COLOR, root, (),
+                                        f"The root {root._value} must be black."))
+        if stop_at_first_violation:
+            return violations
+    # All rules are checked in one iterative pass. Each node is visited before its subtrees (order, parents, colors)
+    # and, for red-black trees, again after them to compare the black heights of its subtrees.
+    # Paths are linked (parent link, direction) pairs, which are only turned into tuples when a violation is read.
+    # Stack entries: (node, exclusive lower bound, exclusive upper bound, path link, subtrees done)
+    stack = [(root, None, None, None, False)]
+    # Black heights of the finished subtrees, the NIL leaves count as 1.
+    black_heights = []
+    while stack:
+        node, lower_bound, upper_bound, path_link, subtrees_done = stack.pop()
+        left = node._left
+        right = node._right
+        if subtrees_done:
+            right_black_height = black_heights.pop() if right is not None else 1
+            left_black_height = black_heights.pop() if left is not None else 1
+            if left_black_height != right_black_height:
+                violations.append(TreeViolation._from_path_link(
+                    TreeViolationRule.BLACK_HEIGHT, node, path_link,
+                    f"The paths below {node._value} contain different numbers of black nodes "
+                    f"({left_black_height - 1} on the left, {right_black_height - 1} on the right)."))
+                if stop_at_first_violation:
+                    return violations
+            black_heights.append(left_black_height + (1 if node._color is _BLACK else 0))
+            continue
+        value = node._value
+        if lower_bound is not None and value <= lower_bound:
+            violations.append(TreeViolation._from_path_link(TreeViolationRule.SEARCH_TREE_ORDER, node, path_link,
+                                                            f"{value} is in the right subtree of {lower_bound}, but not larger than it."))
+        elif upper_bound is not None and value >= upper_bound:
+            violations.append(TreeViolation._from_path_link(TreeViolationRule.SEARCH_TREE_ORDER, node, path_link,
+                                                            f"{value} is in the left subtree of {upper_bound}, but not smaller than it."))
+        for child, direction in ((left, "left"), (right, "right")):
+            if child is None:
+                continue
+            if child._parent is not node:
+                violations.append(TreeViolation._from_path_link(TreeViolationRule.PARENT_POINTER, child, (path_link, direction),
+                                                                f"The parent of {child._value} is not set to {value}."))
+            if check_colors and node._color is _RED and child._color is _RED:
+                violations.append(TreeViolation._from_path_link(TreeViolationRule.RED_RED, child, (path_link, direction),
+                                                                f"The red node {value} has the red child {child._value}."))
+        if stop_at_first_violation and violations:
+            return violations[:1]
+        if check_colors:
+            stack.append((node, None, None, path_link, True))
+        # The right subtree is pushed first, so that the left subtree is checked first.
+        if right is not None:
+            stack.append((right, value, upper_bound, (path_link, "right"), False))
+        if left is not None:
+            stack.append((left, lower_bound, value, (path_link, "left"), False))
+    return violations
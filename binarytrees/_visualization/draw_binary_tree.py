@@ -0,0 +1,96 @@
+from __future__ import annotations
+from io import BytesIO
+from xml.sax.saxutils import escape
+from binarytrees._visualization.layout_binary_tree import BinaryTreeLayout
+
+# Dimensions in pixels.
+_NODE_RADIUS = 18
+_HORIZONTAL_SPACING = 44
+_LEVEL_HEIGHT = 64
+_MARGIN = 24
+_TITLE_HEIGHT = 36
+_FONT_SIZE = 14
+_TITLE_FONT_SIZE = 18
+_NIL_FONT_SIZE = 11
+
+
+def _get_node_center(layout: BinaryTreeLayout, node: int, top: int) -> tuple[float, float]:
+    return (_MARGIN + _NODE_RADIUS + layout.x[node] * _HORIZONTAL_SPACING,
+            top + _NODE_RADIUS + layout.depths[node] * _LEVEL_HEIGHT)
+
+
+def _get_canvas_size(layout: BinaryTreeLayout, title: str | None) -> tuple[int, int, int]:
+    top = _MARGIN + (_TITLE_HEIGHT if title else 0)
+    width = int(2 * _MARGIN + 2 * _NODE_RADIUS + layout.get_width() * _HORIZONTAL_SPACING)
+    height = int(top + 2 * _NODE_RADIUS + layout.get_height() * _LEVEL_HEIGHT + _MARGIN)
+    return width, height, top
+
+
+def draw_binary_tree_svg(layout: BinaryTreeLayout, title: str | None) -> bytes:
+    """Draws the laid out tree as an SVG image.
+    """
+    width, height, top = _get_canvas_size(layout, title)
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}" '
+             f'font-family="Arial, Helvetica, sans-serif" font-weight="bold">',
+             f'<rect width="{width}" height="{height}" fill="white"/>']
+    if title:
+        parts.append(f'<text x="{width / 2:.1f}" y="{_MARGIN + _TITLE_FONT_SIZE}" font-size="{_TITLE_FONT_SIZE}" '
+                     f'text-anchor="middle">{escape(title)}</text>')
+    # Edges are drawn first, so that the nodes are painted on top of them.
+    centers = [_get_node_center(layout, node, top) for node in range(len(layout))]
+    for node in range(1, len(layout)):
+        x1, y1 = centers[layout.parents[node]]
+        x2, y2 = centers[node]
+        parts.append(f'<line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}" stroke="black"/>')
+    for node in range(len(layout)):
+        x, y = centers[node]
+        if layout.is_nil[node]:
+            parts.append(f'<rect x="{x - _NODE_RADIUS:.1f}" y="{y - _NIL_FONT_SIZE:.1f}" width="{2 * _NODE_RADIUS}" '
+                         f'height="{2 * _NIL_FONT_SIZE}" fill="white"/>')
+            parts.append(f'<text x="{x:.1f}" y="{y:.1f}" font-size="{_NIL_FONT_SIZE}" text-anchor="middle" '
+                         f'dominant-baseline="central">NIL</text>')
+            continue
+        color = layout.colors[node]
+        if color is not None:
+            fill, stroke, text_color = color.lower(), color.lower(), "white"
+        else:
+            fill, stroke, text_color = "white", "black", "black"
+        parts.append(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="{_NODE_RADIUS}" fill="{fill}" stroke="{stroke}"/>')
+        parts.append(f'<text x="{x:.1f}" y="{y:.1f}" font-size="{_FONT_SIZE}" text-anchor="middle" '
+                     f'dominant-baseline="central" fill="{text_color}">{escape(layout.labels[node])}</text>')
+    parts.append("</svg>")
+    return "\n".join(parts).encode("utf-8")
+
+
+def draw_binary_tree_png(layout: BinaryTreeLayout, title: str | None) -> bytes:
+    """Draws the laid out tree as a PNG image using Pillow.
+    """
+    from PIL import Image, ImageDraw, ImageFont
+    width, height, top = _get_canvas_size(layout, title)
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(_FONT_SIZE)
+    if title:
+        draw.text((width / 2, _MARGIN + _TITLE_FONT_SIZE / 2), title, fill="black",
+                  font=ImageFont.load_default(_TITLE_FONT_SIZE), anchor="mm")
+    centers = [_get_node_center(layout, node, top) for node in range(len(layout))]
+    for node in range(1, len(layout)):
+        draw.line((centers[layout.parents[node]], centers[node]), fill="black", width=1)
+    nil_font = ImageFont.load_default(_NIL_FONT_SIZE)
+    for node in range(len(layout)):
+        x, y = centers[node]
+        if layout.is_nil[node]:
+            draw.rectangle((x - _NODE_RADIUS, y - _NIL_FONT_SIZE, x + _NODE_RADIUS, y + _NIL_FONT_SIZE), fill="white")
+            draw.text((x, y), "NIL", fill="black", font=nil_font, anchor="mm")
+            continue
+        color = layout.colors[node]
+        if color is not None:
+            fill, outline, text_color = color.lower(), color.lower(), "white"
+        else:
+            fill, outline, text_color = "white", "black", "black"
+        draw.ellipse((x - _NODE_RADIUS, y - _NODE_RADIUS, x + _NODE_RADIUS, y + _NODE_RADIUS),
+                     fill=fill, outline=outline)
+        draw.text((x, y), layout.labels[node], fill=text_color, font=font, anchor="mm")
+    output = BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
@@ -0,0 +1,167 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from binarytrees._classes.BinaryTreeNode import BinaryTreeNode
+    from binarytrees._classes.RedBlackTreeNode import RedBlackTreeNode
+
+# Index used for missing children.
+_NONE = -1
+
+
+class BinaryTreeLayout:
+    """Positions of the nodes of a binary tree for drawing it.
+    Nodes are identified by their index (preorder, the root has index 0). x is measured in units of the minimal
+    horizontal distance between two nodes (the leftmost node has x = 0), depth is the level of the node (root = 0).
+    colors contains "RED", "BLACK" or None for each node. NIL nodes have the label "NIL" and are marked in is_nil.
+    """
+
+    def __init__(self, labels: list[str], colors: list[str | None], is_nil: list[bool], parents: list[int], x: list[float], depths: list[int]):
+        self.labels = labels
+        self.colors = colors
+        self.is_nil = is_nil
+        self.parents = parents
+        self.x = x
+        self.depths = depths
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def get_width(self) -> float:
+        return max(self.x) if self.x else 0
+
+    def get_height(self) -> int:
+        return max(self.depths) if self.depths else 0
+
+
+def compute_binary_tree_layout(tree: BinaryTreeNode | RedBlackTreeNode, show_nil_nodes: bool) -> BinaryTreeLayout:
+    """Computes a tidy layout of the tree in O(n) with the Reingold-Tilford algorithm.
+    Subtrees are placed as close to each other as possible, parents are centered above their children
+    and a single child is placed diagonally below its parent on its side.
+    """
+    labels, colors, is_nil, parents, left, right, depths = _flatten_tree(tree, show_nil_nodes)
+    count = len(labels)
+    # Offset of each node relative to its parent.
+    offsets = [0.0] * count
+    # Next node on the left and right contour of the subtree (child or thread) and its offset relative to the node.
+    next_left = [_NONE] * count
+    next_right = [_NONE] * count
+    next_left_offset = [0.0] * count
+    next_right_offset = [0.0] * count
+    # Leftmost and rightmost node on the deepest level of the subtree and their offsets relative to the subtree root.
+    extreme_left = list(range(count))
+    extreme_right = list(range(count))
+    extreme_left_offset = [0.0] * count
+    extreme_right_offset = [0.0] * count
+    # Children are placed before their parents when going through the preorder backwards.
+    for node in range(count - 1, -1, -1):
+        left_child = left[node]
+        right_child = right[node]
+        if left_child == _NONE and right_child == _NONE:
+            continue
+        if right_child == _NONE or left_child == _NONE:
+            child = left_child if right_child == _NONE else right_child
+            offset = -0.5 if right_child == _NONE else 0.5
+            offsets[child] = offset
+            next_left[node] = next_right[node] = child
+            next_left_offset[node] = next_right_offset[node] = offset
+            extreme_left[node] = extreme_left[child]
+            extreme_left_offset[node] = extreme_left_offset[child] + offset
+            extreme_right[node] = extreme_right[child]
+            extreme_right_offset[node] = extreme_right_offset[child] + offset
+            continue
+        # Walk down the right contour of the left subtree and the left contour of the right subtree
+        # to find the minimal distance between both subtree roots.
+        left_contour, right_contour = left_child, right_child
+        left_contour_x = right_contour_x = 0.0
+        separation = 1.0
+        while True:
+            if left_contour_x - right_contour_x + 1.0 > separation:
+                separation = left_contour_x - right_contour_x + 1.0
+            left_contour_next = next_right[left_contour]
+            right_contour_next = next_left[right_contour]
+            if left_contour_next == _NONE or right_contour_next == _NONE:
+                break
+            left_contour_x += next_right_offset[left_contour]
+            right_contour_x += next_left_offset[right_contour]
+            left_contour, right_contour = left_contour_next, right_contour_next
+        half = separation / 2
+        offsets[left_child] = -half
+        offsets[right_child] = half
+        next_left[node] = left_child
+        next_left_offset[node] = -half
+        next_right[node] = right_child
+        next_right_offset[node] = half
+        if left_contour_next != _NONE:
+            # The left subtree is deeper: its right contour continues below the right subtree.
+            thread_from = extreme_right[right_child]
+            target_x = -half + left_contour_x + next_right_offset[left_contour]
+            next_right[thread_from] = left_contour_next
+            next_right_offset[thread_from] = target_x - (half + extreme_right_offset[right_child])
+            extreme_left[node] = extreme_left[left_child]
+            extreme_left_offset[node] = extreme_left_offset[left_child] - half
+            extreme_right[node] = extreme_right[left_child]
+            extreme_right_offset[node] = extreme_right_offset[left_child] - half
+        elif right_contour_next != _NONE:
+            # The right subtree is deeper: its left contour continues below the left subtree.
+            thread_from = extreme_left[left_child]
+            target_x = half + right_contour_x + next_left_offset[right_contour]
+            next_left[thread_from] = right_contour_next
+            next_left_offset[thread_from] = target_x - (-half + extreme_left_offset[left_child])
+            extreme_left[node] = extreme_left[right_child]
+            extreme_left_offset[node] = extreme_left_offset[right_child] + half
+            extreme_right[node] = extreme_right[right_child]
+            extreme_right_offset[node] = extreme_right_offset[right_child] + half
+        else:
+            extreme_left[node] = extreme_left[left_child]
+            extreme_left_offset[node] = extreme_left_offset[left_child] - half
+            extreme_right[node] = extreme_right[right_child]
+            extreme_right_offset[node] = extreme_right_offset[right_child] + half
+    # Parents come before their children in preorder, so absolute positions can be accumulated in one pass.
+    x = [0.0] * count
+    for node in range(1, count):
+        x[node] = x[parents[node]] + offsets[node]
+    if count:
+        minimum_x = min(x)
+        x = [node_x - minimum_x for node_x in x]
+    return BinaryTreeLayout(labels, colors, is_nil, parents, x, depths)
+
+
+def _flatten_tree(tree: BinaryTreeNode | RedBlackTreeNode, show_nil_nodes: bool):
+    labels = []
+    colors = []
+    is_nil = []
+    parents = []
+    left = []
+    right = []
+    depths = []
+    # Stack entries: (node or None for a NIL node, parent index, is left child, depth)
+    stack = [(tree, _NONE, True, 0)]
+    while stack:
+        node, parent, is_left_child, depth = stack.pop()
+        index = len(labels)
+        parents.append(parent)
+        left.append(_NONE)
+        right.append(_NONE)
+        depths.append(depth)
+        if parent != _NONE:
+            if is_left_child:
+                left[parent] = index
+            else:
+                right[parent] = index
+        if node is None:
+            labels.append("NIL")
+            colors.append(None)
+            is_nil.append(True)
+            continue
+        labels.append(str(node.get_value()))
+        color = node.get_color() if hasattr(node, "get_color") else None
+        colors.append(str(color) if color is not None else None)
+        is_nil.append(False)
+        left_child = node.get_left_child()
+        right_child = node.get_right_child()
+        if right_child is not None or show_nil_nodes:
+            stack.append((right_child, index, False, depth + 1))
+        if left_child is not None or show_nil_nodes:
+            stack.append((left_child, index, True, depth + 1))
+    return labels, colors, is_nil, parents, left, right, depths
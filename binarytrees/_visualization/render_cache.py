@@ -0,0 +1,233 @@
+from __future__ import annotations
+from collections import OrderedDict
+from collections.abc import Callable
+from hashlib import blake2b
+from threading import Event, Lock
+from typing import TYPE_CHECKING
+import logging
+import os
+
+if TYPE_CHECKING:
+    from binarytrees._classes.BinaryTreeNode import BinaryTreeNode
+
+logger = logging.getLogger(__name__)
+
+# Default limit of the total size of the images in the on-disk tier.
+DEFAULT_MAX_DISK_BYTES = 256 * 1024 * 1024
+# When the on-disk tier exceeds its limit, the least recently used images are removed until it is below this fraction
+# of the limit, so that the directory is only scanned once for many new images.
+_DISK_EVICTION_TARGET = 0.8
+
+
+class _InFlightRender:
+    """Render which is currently being created by one thread, while other threads wait for its result.
+    """
+
+    def __init__(self):
+        self.done = Event()
+        self.image: str | None = None
+        self.error: Exception | None = None
+
+
+class RenderCache:
+    """Content-addressed cache for rendered tree images (base64 encoded strings).
+    Images are kept in an in-memory LRU tier and, if a directory is given, additionally in an on-disk tier.
+    The on-disk tier is limited to max_disk_bytes (None for no limit): when it grows larger, the least recently used
+    images are removed. Processes sharing the directory each enforce the limit, based on the files in the directory.
+    Concurrent requests for the same image are coalesced, so that each image is only rendered once.
+    """
+
+    def __init__(self, max_entries: int = 256, directory: str | None = None, max_disk_bytes: int | None = DEFAULT_MAX_DISK_BYTES):
+        self._max_entries = max_entries
+        self._directory = directory
+        self._max_disk_bytes = max_disk_bytes
+        # Size of the on-disk tier as of the last scan of the directory plus the images this process wrote since.
+        # The directory is scanned when the first image is written, since it may contain the images of earlier runs.
+        self._disk_bytes: int | None = None
+        self._disk_lock = Lock()
+        self._images: OrderedDict[str, str] = OrderedDict()
+        self._in_flight: dict[str, _InFlightRender] = {}
+        self._lock = Lock()
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._coalesced = 0
+        self._renders = 0
+        self._disk_evictions = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def create_key(tree: BinaryTreeNode, title: str | None, show_nil_nodes: bool, *options: str) -> str:
+        """Creates the key of an image from the structure and colors of the tree (its structural digest),
+        the title, whether NIL nodes are shown and further rendering options.
+        """
+        key = blake2b(tree.get_structural_digest(), digest_size=16)
+        key.update(repr((title, show_nil_nodes, options)).encode())
+        return key.hexdigest()
+
+    def get_or_render(self, key: str, render: Callable[[], str]) -> str:
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                self._memory_hits += 1
+                return image
+            in_flight = self._in_flight.get(key)
+            is_owner = in_flight is None
+            if is_owner:
+                in_flight = _InFlightRender()
+                self._in_flight[key] = in_flight
+            else:
+                self._coalesced += 1
+        if not is_owner:
+            in_flight.done.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return in_flight.image
+        try:
+            image = self._read_from_disk(key)
+            if image is None:
+                image = render()
+                self._write_to_disk(key, image)
+                with self._lock:
+                    self._renders += 1
+            else:
+                with self._lock:
+                    self._disk_hits += 1
+            in_flight.image = image
+            with self._lock:
+                self._images[key] = image
+                while len(self._images) > self._max_entries:
+                    self._images.popitem(last=False)
+            return image
+        except Exception as e:
+            in_flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            in_flight.done.set()
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "coalesced": self._coalesced,
+                "renders": self._renders,
+                "disk_evictions": self._disk_evictions,
+                "size": len(self._images),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self._directory, f"{key}.b64")
+
+    def _read_from_disk(self, key: str) -> str | None:
+        if self._directory is None:
+            return None
+        path = self._get_path(key)
+        try:
+            with open(path, "r", encoding="ascii") as f:
+                image = f.read()
+        except OSError:
+            return None
+        # The modification time marks when an image was used last, which decides the order of the eviction.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return image
+
+    def _write_to_disk(self, key: str, image: str):
+        if self._directory is None:
+            return
+        import tempfile
+        # Written to a temporary file first, so that other processes never read a partially written image.
+        # A missing or full directory only costs the on-disk copy, the image is still returned from memory.
+        temporary_path = None
+        try:
+            file_descriptor, temporary_path = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+            with os.fdopen(file_descriptor, "w", encoding="ascii") as f:
+                f.write(image)
+            os.replace(temporary_path, self._get_path(key))
+        except OSError:
+            logger.warning("The tree image could not be written to the render cache directory %s", self._directory, exc_info=True)
+            if temporary_path is not None and os.path.exists(temporary_path):
+                try:
+                    os.remove(temporary_path)
+                except OSError:
+                    pass
+            return
+        if self._max_disk_bytes is None:
+            return
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += len(image)
+            exceeded = self._disk_bytes is None or self._disk_bytes > self._max_disk_bytes
+        if exceeded:
+            self._evict_from_disk()
+
+    def _scan_directory(self) -> list[tuple[float, int, str]]:
+        # Returns the modification time, size and path of the images in the directory (not of partially written ones).
+        files = []
+        try:
+            with os.scandir(self._directory) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".b64"):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            logger.warning("The render cache directory %s could not be read", self._directory, exc_info=True)
+        return files
+
+    def _evict_from_disk(self):
+        # Only one thread scans the directory, the others keep going while it does.
+        if not self._disk_lock.acquire(blocking=False):
+            return
+        try:
+            files = self._scan_directory()
+            total = sum(size for _, size, _ in files)
+            evicted = 0
+            if total > self._max_disk_bytes:
+                # Oldest modification time (least recently used) first.
+                files.sort()
+                for _, size, path in files:
+                    if total <= self._max_disk_bytes * _DISK_EVICTION_TARGET:
+                        break
+                    try:
+                        os.remove(path)
+                        evicted += 1
+                    except FileNotFoundError:
+                        # Another process sharing the directory removed it already.
+                        pass
+                    except OSError:
+                        continue
+                    total -= size
+            with self._lock:
+                self._disk_bytes = total
+                self._disk_evictions += evicted
+        finally:
+            self._disk_lock.release()
+
+
+# Cache used by generate_binary_tree_image. The on-disk tier is enabled by setting TREE_IMAGE_CACHE_DIR
+# and limited to TREE_IMAGE_CACHE_MAX_BYTES (0 for no limit).
+render_cache = RenderCache(directory=os.environ.get("TREE_IMAGE_CACHE_DIR"),
+                           max_disk_bytes=int(os.environ.get("TREE_IMAGE_CACHE_MAX_BYTES", DEFAULT_MAX_DISK_BYTES)) or None)
+
+
+def configure_render_cache(max_entries: int = 256, directory: str | None = None,
+                           max_disk_bytes: int | None = DEFAULT_MAX_DISK_BYTES) -> RenderCache:
+    """Replaces the render cache used for tree images, e.g. to change its size or to enable the on-disk tier.
+    """
+    global render_cache
+    render_cache = RenderCache(max_entries, directory, max_disk_bytes)
+    return render_cache
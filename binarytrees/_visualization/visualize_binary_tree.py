@@ -1,23 +1,18 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING
-import graphviz
 import base64
-from PIL import Image
 from io import BytesIO
+from binarytrees._visualization import render_cache as render_cache_module
 
 if TYPE_CHECKING:
+    import graphviz
     from binarytrees._classes.BinaryTreeNode import BinaryTreeNode
     from binarytrees._classes.RedBlackTreeNode import RedBlackTreeNode
 
 
 def _get_tree_height(node: BinaryTreeNode | RedBlackTreeNode, show_nil_nodes: bool):
-    left = node.get_left_child()
-    right = node.get_right_child()
-    left_height = (1 if show_nil_nodes else 0) if left is None else _get_tree_height(
-        left, show_nil_nodes)
-    right_height = (1 if show_nil_nodes else 0) if right is None else _get_tree_height(
-        right, show_nil_nodes)
-    return max(left_height, right_height) + 1
+    # O(1) for augmented trees, otherwise computed without recursion. The NIL nodes add one level below the leaves.
+    return node.get_height() + (1 if show_nil_nodes else 0)
 
 
 def _draw_subtree(dot: graphviz.Digraph, show_nil_nodes: bool, node: BinaryTreeNode | RedBlackTreeNode, maxdepth, parent_id="", parent_direction="_", depth=0):
@@ -70,16 +65,36 @@ def _draw_subtree(dot: graphviz.Digraph, show_nil_nodes: bool, node: BinaryTreeN
                   maxdepth, node_id, ">", depth+1)
 
 
-def generate_binary_tree_image(title, tree: BinaryTreeNode | RedBlackTreeNode, show_nil_nodes: bool) -> str | None:
-    """Creates an image of the tree and returns it as a base64 encoded string of a pdf.
+IMAGE_ENGINES = ("graphviz", "python")
+IMAGE_FORMATS = ("png", "svg")
+
+
+def generate_binary_tree_image(title, tree: BinaryTreeNode | RedBlackTreeNode, show_nil_nodes: bool, engine: str = "graphviz", image_format: str = "png") -> str | None:
+    """Creates an image of the tree and returns it as a base64 encoded string of a png or svg file.
+    The "graphviz" engine lets Graphviz lay out the tree. The "python" engine computes the layout itself in O(n)
+    and draws the image without starting a Graphviz process (PNG images are drawn with Pillow).
+    Identical images (same structure, colors, title, show_nil_nodes, engine and format) are only rendered once and then taken from the render cache.
     """
+    if engine not in IMAGE_ENGINES:
+        raise ValueError(f"Invalid engine '{engine}'. Must be one of {', '.join(IMAGE_ENGINES)}.")
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Invalid image format '{image_format}'. Must be one of {', '.join(IMAGE_FORMATS)}.")
+    render = _render_binary_tree_image if engine == "graphviz" else _render_binary_tree_image_without_graphviz
+    key = render_cache_module.render_cache.create_key(tree, title, show_nil_nodes, engine, image_format)
+    return render_cache_module.render_cache.get_or_render(
+        key, lambda: render(title, tree, show_nil_nodes, image_format))
+
+
+def _render_binary_tree_image(title, tree: BinaryTreeNode | RedBlackTreeNode, show_nil_nodes: bool, image_format: str) -> str:
+    # Graphviz is imported on first use, so that importing the package does not pay for it.
+    import graphviz
     try:
         dot: graphviz.Digraph = graphviz.Digraph()
         dot.attr("graph", center="True", dpi="300", label=title, labelloc="t")
         treeroot = tree
         _draw_subtree(dot, show_nil_nodes, treeroot,
                       _get_tree_height(treeroot, show_nil_nodes))
-        dot.format = "png"
+        dot.format = image_format
         # Get image as binary
         tree_binary = dot.pipe()
         # Encode binary image as Base64
@@ -88,8 +103,20 @@ def generate_binary_tree_image(title, tree: BinaryTreeNode | RedBlackTreeNode, s
         raise e
 
 
+def _render_binary_tree_image_without_graphviz(title, tree: BinaryTreeNode | RedBlackTreeNode, show_nil_nodes: bool, image_format: str) -> str:
+    from binarytrees._visualization.layout_binary_tree import compute_binary_tree_layout
+    from binarytrees._visualization.draw_binary_tree import draw_binary_tree_png, draw_binary_tree_svg
+    layout = compute_binary_tree_layout(tree, show_nil_nodes)
+    if image_format == "svg":
+        tree_binary = draw_binary_tree_svg(layout, title)
+    else:
+        tree_binary = draw_binary_tree_png(layout, title)
+    return base64.b64encode(tree_binary).decode("utf-8")
+
+
 def display_binary_tree_image(b64_image: str | None):
     if not b64_image:
         return
+    from PIL import Image
     img = Image.open(BytesIO(base64.b64decode(b64_image)))
     img.show()
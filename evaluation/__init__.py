@@ -1,3 +1,26 @@
 from evaluation.example_route_evaluation import example_evaluation
+from evaluation.metrics import GradingMetrics, collect_phase_timings, grading_metrics, time_phase
+from evaluation.solution_cache import CachedSolution, SolutionCache, solution_cache
+from evaluation.executor import (EvaluationExecutor, EvaluationTimeoutError, InlineEvaluationExecutor,
+                                 ProcessPoolEvaluationExecutor, create_evaluation_executor)
+from evaluation.wire_format import COMPACT_REQUEST_MIMETYPE, encode_compact_request, parse_compact_request
+from evaluation.request_limits import InvalidRequestError, TreeRequestLimits, create_tree_request_limits
+from evaluation.request_parser import parse_batch_request, parse_tree_request
+from evaluation.concurrency import (ConcurrencyLimiter, ServiceOverloadedError, TreeImageRenderer,
+                                    create_concurrency_limiter, create_tree_image_renderer)
+from evaluation.exercise_bank import (EXERCISE_TASKS, ExerciseBank, ExerciseInstance, open_exercise_bank,
+                                      write_exercise_bank)
+from evaluation.exercise_generator import build_exercise_bank, generate_exercise_instances, solve_exercise_instances
+from evaluation.profiling import PROFILE_HEADER, RequestProfile, RequestProfiler, create_request_profiler
 
-__all__ = ["example_evaluation"]
+__all__ = ["example_evaluation", "GradingMetrics", "collect_phase_timings", "grading_metrics", "time_phase",
+           "CachedSolution", "SolutionCache", "solution_cache",
+           "EvaluationExecutor", "EvaluationTimeoutError", "InlineEvaluationExecutor",
+           "ProcessPoolEvaluationExecutor", "create_evaluation_executor",
+           "ConcurrencyLimiter", "ServiceOverloadedError", "TreeImageRenderer",
+           "create_concurrency_limiter", "create_tree_image_renderer",
+           "COMPACT_REQUEST_MIMETYPE", "encode_compact_request", "parse_compact_request",
+           "InvalidRequestError", "TreeRequestLimits", "create_tree_request_limits", "parse_tree_request", "parse_batch_request",
+           "EXERCISE_TASKS", "ExerciseBank", "ExerciseInstance", "open_exercise_bank", "write_exercise_bank",
+           "build_exercise_bank", "generate_exercise_instances", "solve_exercise_instances",
+           "PROFILE_HEADER", "RequestProfile", "RequestProfiler", "create_request_profiler"]
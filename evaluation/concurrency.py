@@ -0,0 +1,142 @@
+from __future__ import annotations
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from os import environ
+from threading import BoundedSemaphore, Lock
+from binarytrees import BinaryTreeNode
+from evaluation.metrics import time_phase
+from evaluation.profiling import profile_in_thread
+
+
+class ServiceOverloadedError(Exception):
+    """Raised when a request could not get a slot of a ConcurrencyLimiter within the allowed waiting time.
+    The routes answer with HTTP status 503, so that clients can retry later.
+    """
+
+
+class ConcurrencyLimiter:
+    """Limits how many requests of one kind (e.g. evaluations or renders) are processed at once.
+    Further requests wait up to max_wait_seconds for a free slot (None waits forever) and are rejected afterwards,
+    so a burst of large submissions results in quick rejections instead of an unbounded queue.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_wait_seconds: float | None = 5.0):
+        if max_concurrent < 1:
+            raise ValueError("At least one request must be allowed at once")
+        self._name = name
+        self._max_concurrent = max_concurrent
+        self._max_wait_seconds = max_wait_seconds
+        self._semaphore = BoundedSemaphore(max_concurrent)
+        self._lock = Lock()
+        self._active = 0
+        self._rejected = 0
+
+    def __repr__(self) -> str:
+        return f"ConcurrencyLimiter[{self._name}, {self._active}/{self._max_concurrent} active]"
+
+    def acquire(self):
+        """Waits for a free slot, which must be given back with release(). Raises ServiceOverloadedError if none became free in time.
+        """
+        if not self._semaphore.acquire(timeout=self._max_wait_seconds):
+            with self._lock:
+                self._rejected += 1
+            raise ServiceOverloadedError(f"Too many {self._name} at once, please try again later")
+        with self._lock:
+            self._active += 1
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+        self._semaphore.release()
+
+    @contextmanager
+    def limit(self) -> Iterator[None]:
+        """Holds a slot while the block runs.
+        """
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "active": self._active,
+                "rejected": self._rejected,
+                "max_concurrent": self._max_concurrent,
+            }
+
+
+class TreeImageRenderer:
+    """Renders tree images in a separate pool of threads with its own concurrency limit,
+    so slow renders only queue behind each other and do not use up the slots of requests which only grade.
+    Graphviz spends most of the time in its dot subprocess, while the rendering thread does not hold the GIL.
+    """
+
+    def __init__(self, limiter: ConcurrencyLimiter):
+        self._limiter = limiter
+        self._pool = None
+        self._pool_lock = Lock()
+
+    def submit(self, tree: BinaryTreeNode, title: str | None = None, engine: str = "graphviz",
+               image_format: str = "png") -> Future:
+        """Starts rendering the image (see BinaryTreeNode.generate_tree_image) and returns a future of the Base64 encoded image.
+        The tree must not be modified until the image is done. Raises ServiceOverloadedError if too many images are being rendered.
+        """
+        self._limiter.acquire()
+        try:
+            # In a profiled request the render (including the wait for dot) is profiled in its thread as well.
+            future = self._get_pool().submit(profile_in_thread(tree.generate_tree_image), title, engine, image_format)
+        except BaseException:
+            self._limiter.release()
+            raise
+        future.add_done_callback(lambda _: self._limiter.release())
+        return future
+
+    def render(self, tree: BinaryTreeNode, title: str | None = None, engine: str = "graphviz",
+               image_format: str = "png") -> str | None:
+        """Renders the image in the pool and waits for it. The time is recorded as the phase "render" of the request.
+        """
+        with time_phase("render"):
+            return self.submit(tree, title, engine, image_format).result()
+
+    def get_stats(self) -> dict[str, int]:
+        return self._limiter.get_stats()
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        # The threads are only started once the first image is rendered.
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._limiter.get_stats()["max_concurrent"],
+                                                thread_name_prefix="render")
+            return self._pool
+
+
+def create_concurrency_limiter(name: str, max_concurrent: int | None = None,
+                               max_wait_seconds: float | None = None) -> ConcurrencyLimiter:
+    """Creates the limiter for one kind of request. Arguments which are not given are read from the environment variables
+    MAX_CONCURRENT_<NAME> (e.g. MAX_CONCURRENT_EVALUATIONS, default 16) and MAX_QUEUE_WAIT (default 5 seconds, negative waits forever).
+    """
+    if max_concurrent is None:
+        max_concurrent = int(environ.get(f"MAX_CONCURRENT_{name.upper()}", "16"))
+    if max_wait_seconds is None:
+        max_wait_seconds = float(environ.get("MAX_QUEUE_WAIT", "5"))
+        if max_wait_seconds < 0:
+            max_wait_seconds = None
+    return ConcurrencyLimiter(name, max_concurrent, max_wait_seconds)
+
+
+def create_tree_image_renderer(max_concurrent: int | None = None, max_wait_seconds: float | None = None) -> TreeImageRenderer:
+    """Creates the renderer for the service. By default at most MAX_CONCURRENT_RENDERS (default 2) images are rendered at once.
+    """
+    if max_concurrent is None:
+        max_concurrent = int(environ.get("MAX_CONCURRENT_RENDERS", "2"))
+    return TreeImageRenderer(create_concurrency_limiter("renders", max_concurrent, max_wait_seconds))
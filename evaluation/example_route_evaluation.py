@@ -1,9 +1,17 @@
-from binarytrees import BinaryTreeNode
+from binarytrees import BinaryTreeNode, insert_values_into_binary_search_tree
+from evaluation.solution_cache import CachedSolution, solution_cache
 
 
-def example_evaluation(existing_tree: BinaryTreeNode, values: list[int], student_tree: BinaryTreeNode):
+def example_evaluation(existing_tree: BinaryTreeNode, values: list[int], student_tree: BinaryTreeNode) -> tuple[int, str, CachedSolution]:
     """This is an example method for grading a binary search tree. It does not do any checking whatsoever and just returns full score.
     """
+    # The solution is only computed once per exercise instance and taken from the cache afterwards.
+    solution = solution_cache.get_or_compute(
+        "example", existing_tree, values, _solve_example_task)
     # Feedback and grading process....
-    solution = existing_tree # For simplicity, assume that input was already the correct solution.
     return 100, "Since this is an example, you will just get full points.", solution
+
+
+def _solve_example_task(existing_tree: BinaryTreeNode | None, values: list[int] | None) -> BinaryTreeNode | None:
+    # The example task is inserting the values into the binary search tree. existing_tree is a copy, so it can be modified.
+    return insert_values_into_binary_search_tree(existing_tree, values or [])
@@ -0,0 +1,249 @@
+from __future__ import annotations
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from os import cpu_count, environ
+import signal
+from binarytrees import BinaryTreeNode, CompactBinaryTree
+from evaluation.metrics import collect_phase_timings, record_phase
+from evaluation.profiling import add_request_profile_stats, is_request_profiled, profile_call
+from evaluation.solution_cache import CachedSolution
+
+# Signature of the evaluation functions in this package: (existing_tree, values, student_tree) -> (score, feedback, solution)
+EvaluationFunction = Callable[[BinaryTreeNode | None, list[int] | None, BinaryTreeNode | None],
+                              tuple[int, str, CachedSolution | BinaryTreeNode | None]]
+
+# The time limit is enforced inside the workers. The caller only gives up waiting as a safety net after
+# twice the time limit (a task may have been queued behind another one) plus this grace period.
+_TIMEOUT_GRACE_SECONDS = 1.0
+
+
+class EvaluationTimeoutError(TimeoutError):
+    """Raised when the evaluation of a single submission takes longer than the configured time limit.
+    """
+
+
+class EvaluationExecutor:
+    """Base class of the executors, which run evaluation functions.
+    The results have the same format as the evaluation functions, except that the solution is always a CachedSolution.
+    """
+
+    def submit(self, evaluation_function: EvaluationFunction, existing_tree: BinaryTreeNode | None,
+               values: list[int] | None, student_tree: BinaryTreeNode | None) -> Future:
+        raise NotImplementedError
+
+    def evaluate(self, evaluation_function: EvaluationFunction, existing_tree: BinaryTreeNode | None,
+                 values: list[int] | None, student_tree: BinaryTreeNode | None) -> tuple[int, str, CachedSolution]:
+        """Evaluates a single submission and waits for the result.
+        """
+        return self._get_result(self.submit(evaluation_function, existing_tree, values, student_tree))
+
+    def evaluate_many(self, evaluation_function: EvaluationFunction, existing_tree: BinaryTreeNode | None,
+                      values: list[int] | None, student_trees: Iterable[BinaryTreeNode | None]) -> Iterator[tuple[int, str, CachedSolution] | Exception]:
+        """Evaluates many submissions for the same task and yields the results in the order of the submissions.
+        If the evaluation of a submission fails, its exception is yielded instead of a result.
+        Only a limited number of submissions is in flight at once, so the results can be streamed.
+        """
+        pending = deque()
+        for future in self._submit_all(evaluation_function, existing_tree, values, student_trees):
+            pending.append(future)
+            if len(pending) >= self._get_max_in_flight():
+                yield self._get_result_or_exception(pending.popleft())
+        while pending:
+            yield self._get_result_or_exception(pending.popleft())
+
+    def shutdown(self):
+        pass
+
+    def _submit_all(self, evaluation_function: EvaluationFunction, existing_tree: BinaryTreeNode | None,
+                    values: list[int] | None, student_trees: Iterable[BinaryTreeNode | None]) -> Iterator[Future]:
+        # Submits the student trees lazily, so evaluate_many can limit the submissions in flight.
+        for student_tree in student_trees:
+            yield self.submit(evaluation_function, existing_tree, values, student_tree)
+
+    def _get_max_in_flight(self) -> int:
+        return 1
+
+    def _get_result(self, future: Future) -> tuple[int, str, CachedSolution]:
+        return future.result()
+
+    def _get_result_or_exception(self, future: Future) -> tuple[int, str, CachedSolution] | Exception:
+        try:
+            return self._get_result(future)
+        except Exception as e:
+            return e
+
+
+class InlineEvaluationExecutor(EvaluationExecutor):
+    """Executor running the evaluation functions directly in the calling thread.
+    """
+
+    def submit(self, evaluation_function: EvaluationFunction, existing_tree: BinaryTreeNode | None,
+               values: list[int] | None, student_tree: BinaryTreeNode | None) -> Future:
+        future = Future()
+        try:
+            future.set_result(_normalize_result(evaluation_function(existing_tree, values, student_tree)))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+class ProcessPoolEvaluationExecutor(EvaluationExecutor):
+    """Executor distributing the evaluation functions over a pool of worker processes, so all cores can be used.
+    Trees are sent as CompactBinaryTree payloads instead of pickled node graphs with parent references.
+    The existing tree of a batch is encoded once, and each worker reuses the tree it last rebuilt from the same encoding.
+    The workers import the packages once when they start and are kept alive between tasks.
+    Each task is limited to task_timeout seconds. On POSIX systems the worker interrupts the evaluation itself,
+    so a pathological submission does not keep the worker busy. Elsewhere the caller only stops waiting.
+    """
+
+    def __init__(self, max_workers: int | None = None, task_timeout: float | None = 10.0):
+        # Imported here, since multiprocessing is only needed when worker processes are actually used.
+        from concurrent.futures import ProcessPoolExecutor
+        self._max_workers = max_workers or cpu_count() or 1
+        self._pool = ProcessPoolExecutor(max_workers=self._max_workers, initializer=_initialize_worker)
+        self._task_timeout = task_timeout
+
+    def submit(self, evaluation_function: EvaluationFunction, existing_tree: BinaryTreeNode | None,
+               values: list[int] | None, student_tree: BinaryTreeNode | None) -> Future:
+        return self._submit_encoded(evaluation_function, _encode_shared_tree(existing_tree), values, student_tree)
+
+    def _submit_all(self, evaluation_function: EvaluationFunction, existing_tree: BinaryTreeNode | None,
+                    values: list[int] | None, student_trees: Iterable[BinaryTreeNode | None]) -> Iterator[Future]:
+        existing_tree_data = _encode_shared_tree(existing_tree)
+        for student_tree in student_trees:
+            yield self._submit_encoded(evaluation_function, existing_tree_data, values, student_tree)
+
+    def _submit_encoded(self, evaluation_function: EvaluationFunction, existing_tree_data: bytes | None,
+                        values: list[int] | None, student_tree: BinaryTreeNode | None) -> Future:
+        # In a profiled request the worker profiles the evaluation as well and returns its statistics.
+        return self._pool.submit(_evaluate_in_worker, evaluation_function, existing_tree_data, values,
+                                 _to_payload(student_tree), self._task_timeout, is_request_profiled())
+
+    def warm_up(self):
+        """Starts all worker processes and waits until they have finished their imports.
+        """
+        for future in [self._pool.submit(_warm_up_worker) for _ in range(self._max_workers)]:
+            future.result()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def _get_max_in_flight(self) -> int:
+        return 2 * self._max_workers
+
+    def _get_result(self, future: Future) -> tuple[int, str, CachedSolution]:
+        if self._task_timeout is None:
+            result, phase_timings, profile_stats = future.result()
+        else:
+            try:
+                result, phase_timings, profile_stats = future.result(timeout=2 * self._task_timeout + _TIMEOUT_GRACE_SECONDS)
+            except FutureTimeoutError:
+                future.cancel()
+                raise EvaluationTimeoutError(
+                    f"The evaluation took longer than {self._task_timeout} seconds")
+        # The phases timed inside the worker (e.g. computing the solution) are added to the phases of the calling request.
+        for phase, seconds in phase_timings.items():
+            record_phase(phase, seconds)
+        add_request_profile_stats(profile_stats)
+        return result
+
+
+def create_evaluation_executor(max_workers: int | None = None, task_timeout: float | None = None) -> EvaluationExecutor:
+    """Creates the executor for the service. With max_workers 0 the evaluation runs inline,
+    with a negative number one worker process per core is used.
+    Arguments which are not given are read from the environment variables EVALUATION_WORKERS (default 0)
+    and EVALUATION_TIMEOUT (default 10 seconds).
+    """
+    if max_workers is None:
+        max_workers = int(environ.get("EVALUATION_WORKERS", "0"))
+    if task_timeout is None:
+        task_timeout = float(environ.get("EVALUATION_TIMEOUT", "10"))
+    if max_workers == 0:
+        return InlineEvaluationExecutor()
+    executor = ProcessPoolEvaluationExecutor(max_workers if max_workers > 0 else None, task_timeout)
+    executor.warm_up()
+    return executor
+
+
+def _to_payload(tree: BinaryTreeNode | None) -> CompactBinaryTree | None:
+    return CompactBinaryTree.from_node(tree) if tree is not None else None
+
+
+def _from_payload(payload: CompactBinaryTree | None) -> BinaryTreeNode | None:
+    return payload.to_node() if payload is not None else None
+
+
+def _encode_shared_tree(tree: BinaryTreeNode | None) -> bytes | None:
+    return tree.to_bytes() if tree is not None else None
+
+
+# Existing tree which this worker process rebuilt last: its encoding, the tree and the digest of the tree after rebuilding it.
+# Consecutive tasks of a batch (and requests for the same exercise instance) share the existing tree, so the tree is
+# only rebuilt, and its digest (e.g. for the solution cache) only computed, once instead of for every submission.
+_shared_tree_cache: tuple[bytes, BinaryTreeNode, bytes] | None = None
+
+
+def _decode_shared_tree(data: bytes | None) -> BinaryTreeNode | None:
+    global _shared_tree_cache
+    if data is None:
+        return None
+    if _shared_tree_cache is not None:
+        cached_data, tree, digest = _shared_tree_cache
+        # A tree which an evaluation function modified has another digest, so it is rebuilt instead of being passed on.
+        if cached_data == data and tree.get_structural_digest() == digest:
+            return tree
+    tree = CompactBinaryTree.from_bytes(data).to_node()
+    _shared_tree_cache = (data, tree, tree.get_structural_digest())
+    return tree
+
+
+def _normalize_result(result: tuple[int, str, CachedSolution | BinaryTreeNode | None]) -> tuple[int, str, CachedSolution]:
+    score, feedback, solution = result
+    if not isinstance(solution, CachedSolution):
+        solution = CachedSolution(solution)
+    return score, feedback, solution
+
+
+def _initialize_worker():
+    # Importing the packages here makes every worker pay the import cost once at startup instead of on the first task.
+    import binarytrees  # noqa: F401
+    import evaluation  # noqa: F401
+
+
+def _warm_up_worker():
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise EvaluationTimeoutError("The evaluation took longer than the time limit")
+
+
+def _evaluate_payloads(evaluation_function: EvaluationFunction, existing_tree_data: bytes | None,
+                       values: list[int] | None, student_tree_payload: CompactBinaryTree | None) -> tuple[int, str, CachedSolution]:
+    return _normalize_result(evaluation_function(_decode_shared_tree(existing_tree_data), values, _from_payload(student_tree_payload)))
+
+
+def _evaluate_in_worker(evaluation_function: EvaluationFunction, existing_tree_data: bytes | None,
+                        values: list[int] | None, student_tree_payload: CompactBinaryTree | None,
+                        task_timeout: float | None, profile: bool = False
+                        ) -> tuple[tuple[int, str, CachedSolution], dict[str, float], dict | None]:
+    # Returns the result together with the durations of the phases timed in the worker
+    # and, if the request is profiled, the profile statistics of the evaluation.
+    use_alarm = task_timeout is not None and hasattr(signal, "setitimer")
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, task_timeout)
+    try:
+        with collect_phase_timings() as phase_timings:
+            if profile:
+                result, profile_stats = profile_call(_evaluate_payloads, evaluation_function, existing_tree_data,
+                                                     values, student_tree_payload)
+            else:
+                result = _evaluate_payloads(evaluation_function, existing_tree_data, values, student_tree_payload)
+                profile_stats = None
+        return result, phase_timings, profile_stats
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
@@ -0,0 +1,153 @@
+from __future__ import annotations
+import mmap
+import os
+import struct
+import sys
+from array import array
+from binarytrees import BinaryTreeNode, CompactBinaryTree
+from evaluation.solution_cache import CachedSolution
+
+# Tasks of the exercise instances, in the order of their numbers in the bank file.
+EXERCISE_TASKS = ("insert_into_binary_search_tree", "fix_red_black_tree", "insert_into_red_black_tree")
+
+# Header of a bank file: "BTXB", version and the number of instances as unsigned 32-bit integer.
+# It is followed by one index entry per instance (offset of its record, number of values, task number)
+# and the records: the existing tree and the solution in the format of CompactBinaryTree.to_bytes
+# with the values as signed 64-bit integers between them. All numbers are little-endian.
+_BANK_HEADER = struct.Struct("<4sBI")
+_BANK_MAGIC = b"BTXB"
+_BANK_VERSION = 1
+_INDEX_ENTRY = struct.Struct("<QIB")
+# Number of values of an instance without values (e.g. fixing a red-black tree).
+_NO_VALUES = 0xFFFFFFFF
+
+
+class ExerciseInstance:
+    """Task instance of an exam: the task (one of EXERCISE_TASKS), the existing tree and the values,
+    identified by its instance id (its position in the bank).
+    """
+
+    __slots__ = ("instance_id", "task", "existing_tree", "values")
+
+    def __init__(self, instance_id: int, task: str, existing_tree: BinaryTreeNode | None, values: list[int] | None):
+        if task not in EXERCISE_TASKS:
+            raise ValueError(f"Unknown task '{task}'. Must be one of {', '.join(EXERCISE_TASKS)}.")
+        self.instance_id = instance_id
+        self.task = task
+        self.existing_tree = existing_tree
+        self.values = values
+
+    def __repr__(self) -> str:
+        size = len(self.existing_tree.preorder_traverse()) if self.existing_tree is not None else 0
+        return f"ExerciseInstance[{self.instance_id}, {self.task}, {size} nodes, values {self.values}]"
+
+    def to_dict(self) -> dict[str, any]:
+        """Returns the instance in the JSON format of the requests (without the student tree).
+        """
+        return {
+            "instance_id": self.instance_id,
+            "task": self.task,
+            "existing_tree": self.existing_tree.to_dict() if self.existing_tree is not None else None,
+            "values": self.values,
+        }
+
+
+def write_exercise_bank(path: str, instances: list[ExerciseInstance], solutions: list[CompactBinaryTree]):
+    """Writes the instances with their solutions (in the same order) to a bank file, which is read with ExerciseBank.
+    The instance ids must be the positions of the instances in the list.
+    The file is written next to path first and then replaces it, so servers which still read the old bank are not affected.
+    """
+    if len(instances) != len(solutions):
+        raise ValueError("Every instance needs exactly one solution")
+    index = []
+    records = []
+    offset = _BANK_HEADER.size + len(instances) * _INDEX_ENTRY.size
+    for position, (instance, solution) in enumerate(zip(instances, solutions)):
+        if instance.instance_id != position:
+            raise ValueError(f"The instance at position {position} has the id {instance.instance_id}")
+        values = array("q", instance.values or [])
+        if sys.byteorder == "big":
+            values.byteswap()
+        record = b"".join([CompactBinaryTree.from_node(instance.existing_tree).to_bytes(), values.tobytes(), solution.to_bytes()])
+        value_count = len(values) if instance.values is not None else _NO_VALUES
+        index.append(_INDEX_ENTRY.pack(offset, value_count, EXERCISE_TASKS.index(instance.task)))
+        records.append(record)
+        offset += len(record)
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(_BANK_HEADER.pack(_BANK_MAGIC, _BANK_VERSION, len(instances)))
+        file.writelines(index)
+        file.writelines(records)
+    os.replace(temporary_path, path)
+
+
+class ExerciseBank:
+    """Exercise instances with their reference solutions, read from a file written by write_exercise_bank.
+    The file is memory-mapped, so opening it only reads the header and all processes serving the same bank
+    share its pages. Looking up an instance by its id reads one index entry and decodes only that record.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size < _BANK_HEADER.size:
+                raise ValueError("Invalid exercise bank: The header is incomplete")
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = _BANK_HEADER.unpack_from(self._data, 0)
+        if magic != _BANK_MAGIC or version != _BANK_VERSION:
+            self._data.close()
+            raise ValueError("Invalid exercise bank: Unknown format or version")
+        if len(self._data) < _BANK_HEADER.size + count * _INDEX_ENTRY.size:
+            self._data.close()
+            raise ValueError("Invalid exercise bank: The index is incomplete")
+        self._path = path
+        self._count = count
+
+    def __repr__(self) -> str:
+        return f"ExerciseBank[{self._path}, {self._count} instances]"
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, instance_id: int) -> bool:
+        return 0 <= instance_id < self._count
+
+    def get_instance(self, instance_id: int) -> ExerciseInstance:
+        """Returns the instance with the id. Its existing tree is a new copy, which can be modified freely.
+        Unknown ids raise a KeyError.
+        """
+        task, existing_tree, values, _ = self._read_record(instance_id)
+        return ExerciseInstance(instance_id, task, existing_tree.to_node(), values)
+
+    def get_solution(self, instance_id: int) -> CachedSolution:
+        """Returns the reference solution of the instance with the id, e.g. to pass it to evaluation_response() in app.py.
+        Unknown ids raise a KeyError.
+        """
+        return CachedSolution.from_compact_tree(self._read_record(instance_id)[3])
+
+    def close(self):
+        self._data.close()
+
+    def _read_record(self, instance_id: int) -> tuple[str, CompactBinaryTree, list[int] | None, CompactBinaryTree]:
+        if not 0 <= instance_id < self._count:
+            raise KeyError(f"The exercise bank does not contain the instance {instance_id}")
+        data = self._data
+        offset, value_count, task_number = _INDEX_ENTRY.unpack_from(data, _BANK_HEADER.size + instance_id * _INDEX_ENTRY.size)
+        existing_tree, offset = CompactBinaryTree.decode_from(data, offset)
+        if value_count == _NO_VALUES:
+            values = None
+        else:
+            values = array("q")
+            values.frombytes(data[offset:offset + 8 * value_count])
+            if sys.byteorder == "big":
+                values.byteswap()
+            values = values.tolist()
+            offset += 8 * value_count
+        solution, _ = CompactBinaryTree.decode_from(data, offset)
+        return EXERCISE_TASKS[task_number], existing_tree, values, solution
+
+
+def open_exercise_bank() -> ExerciseBank | None:
+    """Opens the bank file configured by the environment variable EXERCISE_BANK, or returns None if it is not set.
+    """
+    path = os.environ.get("EXERCISE_BANK")
+    return ExerciseBank(path) if path else None
@@ -0,0 +1,150 @@
+from __future__ import annotations
+import random
+from collections.abc import Callable
+from os import cpu_count
+from binarytrees import (BinaryTreeNode, CompactBinaryTree, RedBlackTreeColor, RedBlackTreeNode, TreeOperationStep,
+                         TreeOperationStepKind, delete_from_binary_search_tree, insert_into_binary_search_tree,
+                         insert_into_red_black_tree, insert_values_into_binary_search_tree, insert_values_into_red_black_tree)
+from evaluation.exercise_bank import EXERCISE_TASKS, ExerciseInstance, write_exercise_bank
+from evaluation.solution_cache import SolutionCache
+
+_ROTATIONS = (TreeOperationStepKind.ROTATE_LEFT, TreeOperationStepKind.ROTATE_RIGHT)
+
+
+def generate_exercise_instances(task: str, count: int, size: int, value_count: int = 3, rotations: int | None = None,
+                                seed: int = 0, first_instance_id: int = 0) -> list[ExerciseInstance]:
+    """Generates count distinct instances of the task (one of EXERCISE_TASKS) from seeded random values,
+    so the same arguments always result in the same instances. The ids are numbered from first_instance_id.
+    size is the number of nodes of the existing tree and value_count the number of values to insert.
+    For fix_red_black_tree the existing tree is a red-black tree with one new red leaf below a red parent
+    which has not been fixed yet, and there are no values.
+    The difficulty is controlled by the size and by rotations: if it is given, only instances whose solution needs
+    exactly this many rotations are kept (inserting into a binary search tree never rotates).
+    Instances with the same existing tree and values are only generated once. If not enough distinct instances
+    are found, a ValueError is raised.
+    """
+    if task not in EXERCISE_TASKS:
+        raise ValueError(f"Unknown task '{task}'. Must be one of {', '.join(EXERCISE_TASKS)}.")
+    if task == "fix_red_black_tree":
+        if size < 3:
+            raise ValueError("A red-black tree which has to be fixed needs at least 3 nodes")
+    elif size < 0 or value_count < 1:
+        raise ValueError("The size must not be negative and at least one value must be inserted")
+    if rotations is not None and rotations > 0 and task == "insert_into_binary_search_tree":
+        raise ValueError("Inserting into a binary search tree does not need any rotations")
+    generator = random.Random(f"{task}:{size}:{value_count}:{rotations}:{seed}")
+    create_instance = _INSTANCE_CREATORS[task]
+    instances = []
+    keys = set()
+    # Candidates are drawn until enough distinct instances with the requested number of rotations are found.
+    max_attempts = 100 * count + 1000
+    for _ in range(max_attempts):
+        if len(instances) == count:
+            break
+        candidate = create_instance(generator, size, value_count)
+        if candidate is None:
+            continue
+        existing_tree, values, rotation_count = candidate
+        if rotations is not None and rotation_count != rotations:
+            continue
+        key = SolutionCache.create_key(task, existing_tree, values)
+        if key in keys:
+            continue
+        keys.add(key)
+        instances.append(ExerciseInstance(first_instance_id + len(instances), task, existing_tree, values))
+    if len(instances) < count:
+        raise ValueError(f"Only {len(instances)} distinct instances of {task} with {size} nodes"
+                         + (f" and {rotations} rotations" if rotations is not None else "") + " could be generated")
+    return instances
+
+
+def solve_exercise_instances(instances: list[ExerciseInstance], max_workers: int | None = None) -> list[CompactBinaryTree]:
+    """Computes the reference solutions of the instances with the reference operations and returns them in the same order.
+    They are computed in worker processes (one per core by default, inline with max_workers 0),
+    to which the trees are sent as CompactBinaryTree payloads.
+    """
+    tasks = [instance.task for instance in instances]
+    payloads = [CompactBinaryTree.from_node(instance.existing_tree) for instance in instances]
+    values = [instance.values for instance in instances]
+    if max_workers == 0:
+        return list(map(_solve_in_worker, tasks, payloads, values))
+    # Imported here, since multiprocessing is only needed when worker processes are actually used.
+    from concurrent.futures import ProcessPoolExecutor
+    max_workers = max_workers or cpu_count() or 1
+    # Sending the instances in chunks keeps the overhead per instance low, while the workers still share the load evenly.
+    chunk_size = max(1, len(instances) // (4 * max_workers))
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_solve_in_worker, tasks, payloads, values, chunksize=chunk_size))
+
+
+def build_exercise_bank(path: str, instances: list[ExerciseInstance], max_workers: int | None = None):
+    """Computes the solutions of the instances like solve_exercise_instances and writes the bank file,
+    which the grading routes open with ExerciseBank.
+    """
+    write_exercise_bank(path, instances, solve_exercise_instances(instances, max_workers))
+
+
+def _sample_values(generator: random.Random, count: int) -> list[int]:
+    # Small distinct values, which are easy to read in an exam.
+    return generator.sample(range(1, 10 * count + 1), count)
+
+
+def _count_rotations(trace: list[TreeOperationStep]) -> int:
+    return sum(1 for step in trace if step.kind in _ROTATIONS)
+
+
+def _create_binary_search_tree_instance(generator: random.Random, size: int, value_count: int
+                                        ) -> tuple[BinaryTreeNode | None, list[int], int]:
+    values = _sample_values(generator, size + value_count)
+    return insert_values_into_binary_search_tree(None, values[:size]), values[size:], 0
+
+
+def _create_red_black_tree_instance(generator: random.Random, size: int, value_count: int
+                                    ) -> tuple[RedBlackTreeNode | None, list[int], int]:
+    values = _sample_values(generator, size + value_count)
+    existing_tree = insert_values_into_red_black_tree(None, values[:size])
+    trace = []
+    insert_values_into_red_black_tree(CompactBinaryTree.from_node(existing_tree).to_node(), values[size:], trace)
+    return existing_tree, values[size:], _count_rotations(trace)
+
+
+def _create_broken_red_black_tree_instance(generator: random.Random, size: int, value_count: int
+                                           ) -> tuple[RedBlackTreeNode, None, int] | None:
+    values = _sample_values(generator, size)
+    existing_tree = insert_values_into_red_black_tree(None, values[:-1])
+    trace = []
+    insert_into_red_black_tree(CompactBinaryTree.from_node(existing_tree).to_node(), values[-1], trace)
+    if len(trace) == 1:
+        # The parent of the new leaf is black, so the tree would not have to be fixed.
+        return None
+    # The new leaf is red, since insert_into_binary_search_tree creates nodes of the class of the tree.
+    return insert_into_binary_search_tree(existing_tree, values[-1]), None, _count_rotations(trace)
+
+
+def _solve_fix_red_black_tree(existing_tree: RedBlackTreeNode, values: None) -> RedBlackTreeNode:
+    # Removing the red leaf below a red parent (without any fixing, since it is a leaf) results in the valid tree
+    # it was inserted into. Inserting it again with the reference operation fixes it exactly where it was.
+    leaf = next((node for node in existing_tree.iter_preorder() if node.get_left_child() is None
+                 and node.get_right_child() is None and node.get_color() is RedBlackTreeColor.RED
+                 and node.get_parent() is not None and node.get_parent().get_color() is RedBlackTreeColor.RED), None)
+    if leaf is None:
+        raise ValueError("The red-black tree to fix must contain a red leaf below a red parent")
+    value = leaf.get_value()
+    return insert_into_red_black_tree(delete_from_binary_search_tree(existing_tree, value), value)
+
+
+def _solve_in_worker(task: str, existing_tree_payload: CompactBinaryTree, values: list[int] | None) -> CompactBinaryTree:
+    return CompactBinaryTree.from_node(_SOLVERS[task](existing_tree_payload.to_node(), values))
+
+
+_INSTANCE_CREATORS: dict[str, Callable[[random.Random, int, int], tuple | None]] = {
+    "insert_into_binary_search_tree": _create_binary_search_tree_instance,
+    "fix_red_black_tree": _create_broken_red_black_tree_instance,
+    "insert_into_red_black_tree": _create_red_black_tree_instance,
+}
+
+_SOLVERS: dict[str, Callable[[BinaryTreeNode | None, list[int] | None], BinaryTreeNode | None]] = {
+    "insert_into_binary_search_tree": insert_values_into_binary_search_tree,
+    "fix_red_black_tree": _solve_fix_red_black_tree,
+    "insert_into_red_black_tree": insert_values_into_red_black_tree,
+}
@@ -0,0 +1,145 @@
+from __future__ import annotations
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+from binarytrees import BinaryTreeNode
+from evaluation.profiling import annotate_request_profile
+
+# Upper bounds of the histogram buckets in seconds.
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Tree sizes and depths are used as labels, so they are grouped into a few classes (given by their upper bounds).
+TREE_SIZE_CLASSES = (10, 100, 1000, 10000, 100000, 1000000)
+TREE_DEPTH_CLASSES = (4, 8, 16, 32, 64, 128, 256, 1024)
+
+# Durations of the phases of the current request (by phase name), or None if they are not collected.
+_phase_timings: ContextVar[dict[str, float] | None] = ContextVar("phase_timings", default=None)
+
+
+@contextmanager
+def collect_phase_timings() -> Iterator[dict[str, float]]:
+    """Collects the durations of all phases timed with time_phase (also in called functions) within the block
+    into the returned dict. Phases which occur more than once are summed up.
+    """
+    timings = {}
+    token = _phase_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _phase_timings.reset(token)
+
+
+@contextmanager
+def time_phase(phase: str) -> Iterator[None]:
+    """Measures the duration of the block as the phase, if phase timings are being collected.
+    Phases may be nested, e.g. "solution" is part of "evaluation".
+    """
+    if _phase_timings.get() is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, perf_counter() - start)
+
+
+def record_phase(phase: str, seconds: float):
+    timings = _phase_timings.get()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+def get_tree_size_and_depth(root: BinaryTreeNode | None) -> tuple[int, int]:
+    """Returns the number of nodes and the number of levels of the tree (0 and 0 for an empty tree).
+    """
+    size = 0
+    depth = 0
+    stack = [(root, 1)] if root is not None else []
+    while stack:
+        node, level = stack.pop()
+        size += 1
+        if level > depth:
+            depth = level
+        if node._left is not None:
+            stack.append((node._left, level + 1))
+        if node._right is not None:
+            stack.append((node._right, level + 1))
+    return size, depth
+
+
+def _get_class_label(value: int, upper_bounds: tuple[int, ...]) -> str:
+    index = bisect_left(upper_bounds, value)
+    return str(upper_bounds[index]) if index < len(upper_bounds) else "+Inf"
+
+
+class GradingMetrics:
+    """Histograms of the durations of the phases of grading requests, labelled by route, phase and
+    the size and depth class of the graded tree (the smallest upper bound in TREE_SIZE_CLASSES and TREE_DEPTH_CLASSES).
+    They are exported in the Prometheus text format.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DURATION_BUCKETS):
+        self._buckets = tuple(buckets)
+        # Labels (route, phase, tree size class, tree depth class) -> [count per bucket..., total count, sum of durations]
+        self._histograms: dict[tuple[str, str, str, str], list] = {}
+        self._lock = Lock()
+
+    def observe(self, route: str, timings: dict[str, float], tree: BinaryTreeNode | None):
+        """Adds the durations of the phases of one request, which graded the tree.
+        If the request is profiled, the size and depth of the tree and the durations are attached to its profile.
+        """
+        size, depth = get_tree_size_and_depth(tree)
+        annotate_request_profile(size, depth, timings)
+        size_class = _get_class_label(size, TREE_SIZE_CLASSES)
+        depth_class = _get_class_label(depth, TREE_DEPTH_CLASSES)
+        with self._lock:
+            for phase, seconds in timings.items():
+                histogram = self._histograms.get((route, phase, size_class, depth_class))
+                if histogram is None:
+                    histogram = [0] * (len(self._buckets) + 1) + [0.0]
+                    self._histograms[(route, phase, size_class, depth_class)] = histogram
+                bucket = bisect_left(self._buckets, seconds)
+                if bucket < len(self._buckets):
+                    histogram[bucket] += 1
+                histogram[-2] += 1
+                histogram[-1] += seconds
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def to_prometheus_text(self) -> str:
+        name = "grading_phase_duration_seconds"
+        lines = [f"# HELP {name} Duration of the phases of grading requests.",
+                 f"# TYPE {name} histogram"]
+        with self._lock:
+            histograms = sorted((labels, list(histogram)) for labels, histogram in self._histograms.items())
+        for (route, phase, size_class, depth_class), histogram in histograms:
+            labels = f'route="{route}",phase="{phase}",tree_size="{size_class}",tree_depth="{depth_class}"'
+            cumulative_count = 0
+            for upper_bound, count in zip(self._buckets, histogram):
+                cumulative_count += count
+                lines.append(f'{name}_bucket{{{labels},le="{upper_bound}"}} {cumulative_count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram[-2]}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram[-1]}")
+            lines.append(f"{name}_count{{{labels}}} {histogram[-2]}")
+        return "\n".join(lines) + "\n"
+
+
+def format_prometheus_gauges(prefix: str, values: dict[str, int | float], description: str) -> str:
+    """Formats the values (e.g. the statistics of a cache) as Prometheus gauges named prefix_key.
+    """
+    lines = []
+    for key, value in values.items():
+        name = f"{prefix}_{key}"
+        lines.append(f"# HELP {name} {description} ({key.replace('_', ' ')}).")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# Metrics of the grading service, exported by the /metrics route of the app.
+grading_metrics = GradingMetrics()
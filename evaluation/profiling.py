@@ -0,0 +1,280 @@
+from __future__ import annotations
+import json
+import logging
+import os
+import time
+from collections.abc import Callable, Mapping
+from contextlib import nullcontext
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from hmac import compare_digest
+from itertools import count
+from random import random
+from threading import Lock
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where the CPU time of child processes is not recorded.
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Header which requests the profiling of a single request. Its value must be the configured token,
+# without a token the header is ignored, so clients cannot make the server profile and write files at will.
+PROFILE_HEADER = "X-Profile"
+
+# Profile of the current request, or None if it is not profiled.
+_current_profile: ContextVar[RequestProfile | None] = ContextVar("current_profile", default=None)
+_DISABLED = nullcontext()
+
+
+class RequestProfile:
+    """cProfile profile of one request, which is written by the RequestProfiler when the request is done.
+    The request thread is profiled directly. The evaluation in worker processes and the image renders in their threads
+    are profiled where they run and their statistics are merged into this profile.
+    The profiles measure wall time, so the time spent waiting for external subprocesses (e.g. Graphviz's dot)
+    shows up at the calls which wait for them.
+    """
+
+    def __init__(self, route: str, sampled: bool):
+        self.route = route
+        self.sampled = sampled
+        self.metadata: dict[str, any] = {}
+        self._profiler = None
+        self._merged_stats: list[dict] = []
+        self._lock = Lock()
+        self._token = None
+        self._started_at = None
+        self._start = None
+        self._start_thread_time = None
+        self._start_children_time = None
+
+    def __repr__(self) -> str:
+        return f"RequestProfile[{self.route}]"
+
+    def __enter__(self) -> RequestProfile:
+        self._token = _current_profile.set(self)
+        self._started_at = datetime.now(timezone.utc)
+        self._start_children_time = _get_children_cpu_time()
+        self._start_thread_time = time.thread_time()
+        self._start = time.perf_counter()
+        self._profiler = _start_profiler()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._profiler is not None:
+            self._profiler.disable()
+        self.metadata["wall_seconds"] = time.perf_counter() - self._start
+        self.metadata["thread_cpu_seconds"] = time.thread_time() - self._start_thread_time
+        if self._start_children_time is not None:
+            self.metadata["child_process_cpu_seconds"] = _get_children_cpu_time() - self._start_children_time
+        _current_profile.reset(self._token)
+
+    def annotate_tree(self, size: int, depth: int, phase_timings: dict[str, float]):
+        """Attaches the size and depth of the graded tree and the durations of the phases of the request.
+        """
+        self.metadata["tree_size"] = size
+        self.metadata["tree_depth"] = depth
+        self.metadata["phase_timings"] = dict(phase_timings)
+
+    def add_stats(self, stats: dict):
+        """Merges the statistics of a cProfile.Profile (its stats after create_stats()) from another thread or process.
+        """
+        with self._lock:
+            self._merged_stats.append(stats)
+
+    def write(self, directory: str, number: int) -> str:
+        """Writes the profile in the format of pstats (readable e.g. with "python -m pstats") and its metadata as JSON
+        next to it. Returns the path of the profile.
+        """
+        import pstats
+        stats = pstats.Stats()
+        with self._lock:
+            collected_stats = [_get_stats(self._profiler), *self._merged_stats]
+            merged_profiles = len(self._merged_stats)
+        for collected in collected_stats:
+            # pstats cannot load empty statistics, e.g. of a profiler which could not be started.
+            if collected:
+                stats.add(_CollectedStats(collected))
+        name = f"{self._started_at:%Y%m%dT%H%M%S}-{self.route.replace('/', '_')}-{os.getpid()}-{number}"
+        path = os.path.join(directory, f"{name}.prof")
+        stats.dump_stats(path)
+        metadata = {"route": self.route, "started_at": self._started_at.isoformat(), "sampled": self.sampled,
+                    "merged_profiles": merged_profiles, **self.metadata}
+        with open(os.path.join(directory, f"{name}.json"), "w", encoding="utf-8") as file:
+            json.dump(metadata, file, indent=4)
+        return path
+
+
+class RequestProfiler:
+    """Profiles selected requests with cProfile and writes the profiles to a directory.
+    A request is profiled if it has the PROFILE_HEADER with the token as value or if it is drawn with the probability
+    sample_rate. Without a token, only sampled requests are profiled. Without a directory nothing is profiled,
+    and requests which are not selected only cost a check of their headers.
+    """
+
+    def __init__(self, directory: str | None = None, sample_rate: float = 0.0, token: str | None = None):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("The sample rate must be between 0 and 1")
+        self._directory = directory
+        self._sample_rate = sample_rate
+        self._token = token
+        self._numbers = count()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __repr__(self) -> str:
+        return f"RequestProfiler[{self._directory}, sample rate {self._sample_rate}]"
+
+    def is_enabled(self) -> bool:
+        return self._directory is not None
+
+    def profile(self, route: str, headers: Mapping[str, str] | None = None) -> RequestProfile | nullcontext:
+        """Returns a context manager profiling the block if the request with the headers is selected,
+        otherwise a context manager which does nothing.
+        """
+        if self._directory is None:
+            return _DISABLED
+        if self._token is not None and headers is not None and self._is_token(headers.get(PROFILE_HEADER)):
+            return _WrittenProfile(self, RequestProfile(route, False))
+        if self._sample_rate > 0.0 and random() < self._sample_rate:
+            return _WrittenProfile(self, RequestProfile(route, True))
+        return _DISABLED
+
+    def _is_token(self, value: str | None) -> bool:
+        # Compared in constant time, so the token cannot be guessed from the response times.
+        return value is not None and compare_digest(value.encode(), self._token.encode())
+
+    def _write(self, profile: RequestProfile):
+        try:
+            profile.write(self._directory, next(self._numbers))
+        except OSError:
+            # A full or unwritable directory must not fail the request which was profiled.
+            logger.warning("The profile of a request to %s could not be written", profile.route, exc_info=True)
+
+
+class _WrittenProfile:
+    # Profiles the block and writes the profile afterwards, also if the block raised an exception.
+
+    __slots__ = ("_profiler", "_profile")
+
+    def __init__(self, profiler: RequestProfiler, profile: RequestProfile):
+        self._profiler = profiler
+        self._profile = profile
+
+    def __enter__(self) -> RequestProfile:
+        return self._profile.__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._profile.__exit__(exc_type, exc_value, traceback)
+        self._profiler._write(self._profile)
+
+
+class _CollectedStats:
+    # Statistics which were already collected, in the form pstats.Stats loads from profilers.
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def is_request_profiled() -> bool:
+    """Returns whether the current request is being profiled, e.g. to profile work which it hands to another process.
+    """
+    return _current_profile.get() is not None
+
+
+def annotate_request_profile(size: int, depth: int, phase_timings: dict[str, float]):
+    """Attaches the size and depth of the graded tree and the phase timings to the profile of the current request, if there is one.
+    """
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.annotate_tree(size, depth, phase_timings)
+
+
+def add_request_profile_stats(stats: dict | None):
+    """Merges statistics returned by profile_call (e.g. from a worker process) into the profile of the current request.
+    """
+    profile = _current_profile.get()
+    if profile is not None and stats is not None:
+        profile.add_stats(stats)
+
+
+def profile_call(function: Callable, *arguments) -> tuple[any, dict | None]:
+    """Calls the function with a cProfile profiler and returns its result together with the collected statistics,
+    which can be sent to another process and merged with add_request_profile_stats.
+    The statistics are None if the profiler could not be started.
+    """
+    profiler = _start_profiler()
+    try:
+        result = function(*arguments)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+    return result, _get_stats(profiler) if profiler is not None else None
+
+
+def profile_in_thread(function: Callable) -> Callable:
+    """Wraps the function, which is run in another thread (e.g. an image render), so that its call is profiled
+    and merged into the profile of the current request. Without a profiled request, the function is returned unchanged.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        return function
+
+    def profiled_function(*arguments):
+        profiler = _start_profiler()
+        try:
+            return function(*arguments)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                profile.add_stats(_get_stats(profiler))
+
+    return profiled_function
+
+
+def create_request_profiler(directory: str | None = None, sample_rate: float | None = None,
+                            token: str | None = None) -> RequestProfiler:
+    """Creates the profiler of the service. Arguments which are not given are read from the environment variables
+    PROFILE_DIRECTORY (profiling is disabled if it is not set), PROFILE_SAMPLE_RATE (fraction of the requests
+    which are profiled without the header, default 0) and PROFILE_TOKEN (required value of the header,
+    the header is ignored if it is not set).
+    """
+    if directory is None:
+        directory = os.environ.get("PROFILE_DIRECTORY") or None
+    if sample_rate is None:
+        sample_rate = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+    if token is None:
+        token = os.environ.get("PROFILE_TOKEN") or None
+    return RequestProfiler(directory, sample_rate, token)
+
+
+def _start_profiler():
+    # Imported here, since the profiler is only needed when a request is actually profiled.
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active (since Python 3.12 only one can be active per process).
+        return None
+    return profiler
+
+
+def _get_stats(profiler) -> dict:
+    if profiler is None:
+        return {}
+    profiler.create_stats()
+    return profiler.stats
+
+
+def _get_children_cpu_time() -> float | None:
+    # CPU time of all terminated child processes of this process, including those of concurrent requests.
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
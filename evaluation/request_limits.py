@@ -0,0 +1,75 @@
+from __future__ import annotations
+from os import environ
+from binarytrees import CompactBinaryTree
+
+
+class InvalidRequestError(ValueError):
+    """Raised when a grading request is not valid JSON, contains invalid trees or exceeds the TreeRequestLimits.
+    The message describes the problem and is sent to the client with HTTP status 400.
+    """
+
+
+class TreeRequestLimits:
+    """Limits on the trees and values of a grading request: the number of nodes of each tree (and of values),
+    the depth of each tree (the root is on level 1) and the range of the values.
+    A batch request may contain at most max_batch_size student trees with at most max_nodes nodes in total.
+    They are checked while a request is parsed, so oversized or deeply nested submissions are rejected
+    before they are built completely.
+    """
+
+    def __init__(self, max_nodes: int = 100000, max_depth: int = 10000, min_value: int = -2 ** 63, max_value: int = 2 ** 63 - 1,
+                 max_batch_size: int = 1000):
+        if max_nodes < 1 or max_depth < 1 or max_batch_size < 1:
+            raise ValueError("The limits must allow at least one node and one student tree")
+        if min_value > max_value:
+            raise ValueError("The minimum value must not be larger than the maximum value")
+        self.max_nodes = max_nodes
+        self.max_depth = max_depth
+        self.min_value = min_value
+        self.max_value = max_value
+        self.max_batch_size = max_batch_size
+        # Number literals which are longer than both bounds are out of range, so they do not have to be converted.
+        self.max_value_length = max(len(str(min_value)), len(str(max_value)))
+
+    def __repr__(self) -> str:
+        return (f"TreeRequestLimits[{self.max_nodes} nodes, {self.max_depth} levels, "
+                f"values from {self.min_value} to {self.max_value}, {self.max_batch_size} trees per batch]")
+
+    def check_node_count(self, count: int, name: str):
+        if count > self.max_nodes:
+            raise InvalidRequestError(f"The {name} has more than {self.max_nodes} nodes")
+
+    def check_depth(self, depth: int, name: str):
+        if depth > self.max_depth:
+            raise InvalidRequestError(f"The {name} has more than {self.max_depth} levels")
+
+    def check_batch_size(self, count: int):
+        if count > self.max_batch_size:
+            raise InvalidRequestError(f"A batch must not contain more than {self.max_batch_size} student trees")
+
+    def check_value(self, value: int, name: str):
+        if not self.min_value <= value <= self.max_value:
+            raise self.create_value_error(name)
+
+    def create_value_error(self, name: str) -> InvalidRequestError:
+        return InvalidRequestError(f"The {name} contains a value outside of the allowed range from {self.min_value} to {self.max_value}")
+
+    def check_compact_tree(self, tree: CompactBinaryTree, name: str):
+        """Checks the number of nodes and the values of a decoded tree, before its nodes are created.
+        The depth can only be checked afterwards.
+        """
+        self.check_node_count(len(tree), name)
+        if len(tree) > 0:
+            values = [tree.get_value(index) for index in range(len(tree))]
+            if min(values) < self.min_value or max(values) > self.max_value:
+                raise self.create_value_error(name)
+
+
+def create_tree_request_limits() -> TreeRequestLimits:
+    """Creates the limits configured by the environment variables MAX_TREE_NODES (default: 100000),
+    MAX_TREE_DEPTH (default: 10000), MIN_TREE_VALUE and MAX_TREE_VALUE (default: the range of signed 64-bit integers)
+    and MAX_BATCH_SIZE (default: 1000).
+    """
+    return TreeRequestLimits(int(environ.get("MAX_TREE_NODES", "100000")), int(environ.get("MAX_TREE_DEPTH", "10000")),
+                             int(environ.get("MIN_TREE_VALUE", str(-2 ** 63))), int(environ.get("MAX_TREE_VALUE", str(2 ** 63 - 1))),
+                             int(environ.get("MAX_BATCH_SIZE", "1000")))
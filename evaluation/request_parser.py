@@ -0,0 +1,485 @@
+from __future__ import annotations
+import json
+import re
+from base64 import b64decode
+from collections.abc import Iterator
+from typing import BinaryIO
+from binarytrees import BinaryTreeNode, RedBlackTreeNode
+from evaluation.request_limits import InvalidRequestError, TreeRequestLimits
+from evaluation.wire_format import _decode_tree
+
+# Parses grading requests directly from the body stream. Unlike request.get_json() followed by from_dict,
+# the nodes are created while the JSON text is read, so the trees never exist as dictionaries,
+# and the limits are checked as soon as a node or value is read.
+# The parser uses explicit stacks, so it is not limited by the recursion depth like the json module.
+
+_CHUNK_SIZE = 64 * 1024
+
+# Kinds of tokens, the numbers of the groups of _TOKEN which match them.
+_END = 0
+_PUNCTUATION = 1
+_STRING = 2
+_NUMBER = 3
+_LITERAL = 4
+_TOKEN = re.compile(rb'[ \t\n\r]*(?:([{}\[\]:,])|"([^"\\\x00-\x1f]*(?:\\.[^"\\\x00-\x1f]*)*)"'
+                    rb'|(-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?)|(true|false|null))')
+# A token which does not match at the end of the buffer can only be incomplete if it is a string or a short number or literal.
+_MAX_INCOMPLETE_TOKEN_LENGTH = 16
+# A number followed by these characters up to the end of the buffer may continue with a fraction or exponent in the next chunk.
+_NUMBER_CONTINUATION = re.compile(rb'[.eE+\-][0-9.eE+\-]*')
+
+# Members of node objects as written by to_dict, a key, a simple value and the following delimiter, are read
+# with a single match instead of four tokens. Anything else (e.g. other keys or escapes) is read token by token.
+_FAST_MEMBER = re.compile(rb'[ \t\n\r]*"(value|color|left|right)"[ \t\n\r]*:[ \t\n\r]*'
+                          rb'(?:(?:(-?(?:0|[1-9][0-9]*))|"(RED|BLACK)"|(null))[ \t\n\r]*([,}])|(\{))')
+_FAST_NUMBER = 2
+_FAST_COLOR = 3
+_FAST_NULL = 4
+_FAST_DELIMITER = 5
+_FAST_CHILD = 6
+# The fast members are shorter than this unless they contain unusually much whitespace.
+_MAX_FAST_MEMBER_LENGTH = 256
+
+# Marks a key which did not occur in a node object.
+_MISSING = object()
+
+# States of _parse_tree inside a node object.
+_FIRST_MEMBER = 0
+_NEXT_MEMBER = 1
+_DELIMITER = 2
+
+
+class _InvalidJsonError(InvalidRequestError):
+    # The body is not valid JSON, so parsing cannot continue after the error (unlike e.g. after an invalid student tree).
+    pass
+
+
+class _JsonTokenizer:
+    """Splits the JSON text of a byte stream into tokens, reading the stream in chunks as needed.
+    depth is the number of open arrays and objects, which the users of match() update for the brackets they consume.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        self.depth = 0
+        self._stream = stream
+        self._buffer = b""
+        self._position = 0
+        # Number of bytes of the stream in front of the buffer, for the positions in error messages.
+        self._offset = 0
+        self._end_of_stream = False
+
+    def next_token(self) -> tuple[int, bytes]:
+        """Returns the kind of the next token and its text (the content for strings, empty at the end of the stream).
+        """
+        while True:
+            match = _TOKEN.match(self._buffer, self._position)
+            # A token ending at the end of the buffer might continue in the next chunk.
+            if match is not None and (self._end_of_stream or not self._may_continue(match)):
+                self._position = match.end()
+                kind = match.lastindex
+                text = match.group(kind)
+                if kind == _PUNCTUATION:
+                    if text == b"{" or text == b"[":
+                        self.depth += 1
+                    elif text == b"}" or text == b"]":
+                        self.depth -= 1
+                return kind, text
+            remaining = self._buffer[self._position:].lstrip(b" \t\n\r")
+            if self._end_of_stream:
+                if not remaining:
+                    return _END, b""
+                raise self.create_error()
+            if match is None and not remaining.startswith(b'"') and len(remaining) > _MAX_INCOMPLETE_TOKEN_LENGTH:
+                raise self.create_error()
+            self._read_chunk()
+
+    def _may_continue(self, match: re.Match) -> bool:
+        end = match.end()
+        if end == len(self._buffer):
+            return True
+        if match.lastindex != _NUMBER:
+            return False
+        continuation = _NUMBER_CONTINUATION.match(self._buffer, end)
+        return continuation is not None and continuation.end() == len(self._buffer)
+
+    def match(self, pattern: re.Pattern) -> re.Match | None:
+        """Consumes the match of a pattern which ends with a delimiter at the current position, reading further chunks
+        if the pattern might match once more of the stream is read. Returns None if it does not match.
+        """
+        while True:
+            match = pattern.match(self._buffer, self._position)
+            if match is not None:
+                self._position = match.end()
+                return match
+            if self._end_of_stream or len(self._buffer) - self._position >= _MAX_FAST_MEMBER_LENGTH:
+                return None
+            self._read_chunk()
+
+    def _read_chunk(self):
+        # Reads at least as much as is left in the buffer, so that a long token (e.g. a tree in the compact format)
+        # is copied and scanned a logarithmic number of times only.
+        remaining = len(self._buffer) - self._position
+        chunk = self._stream.read(max(_CHUNK_SIZE, remaining))
+        if not chunk:
+            self._end_of_stream = True
+        self._buffer = self._buffer[self._position:] + chunk
+        self._offset += self._position
+        self._position = 0
+
+    def create_error(self) -> InvalidRequestError:
+        return _InvalidJsonError(f"Invalid JSON at byte {self._offset + self._position}")
+
+    def skip_to_depth(self, depth: int):
+        """Skips the tokens until the arrays and objects opened after depth are closed again.
+        """
+        while self.depth > depth:
+            if self.next_token()[0] == _END:
+                raise self.create_error()
+
+
+def parse_tree_request(stream: BinaryIO, node_class: type[BinaryTreeNode], limits: TreeRequestLimits
+                       ) -> tuple[BinaryTreeNode | None, BinaryTreeNode | None, list[int] | None, bool]:
+    """Parses the JSON body of a grading request from the byte stream into the existing tree, the student tree and the values.
+    The trees are built with node_class (BinaryTreeNode or RedBlackTreeNode) while the stream is read. They are given
+    in the dictionary format of from_dict or as Base64 text of the compact binary format of to_bytes.
+    The last element is True if the student tree was sent in the compact format. Other fields are skipped.
+    Invalid requests and requests exceeding the limits raise an InvalidRequestError as soon as the problem is read.
+    """
+    tokens = _JsonTokenizer(stream)
+    existing_tree = student_tree = values = None
+    compact_student_tree = False
+    for key, kind, text in _read_request_members(tokens):
+        if key == "existing_tree":
+            existing_tree = _parse_tree(tokens, kind, text, node_class, limits, "existing tree")
+        elif key == "student_tree":
+            student_tree = _parse_tree(tokens, kind, text, node_class, limits, "student tree")
+            compact_student_tree = kind == _STRING
+        elif key == "values":
+            values = _parse_values(tokens, kind, text, limits)
+        else:
+            _skip_value(tokens, kind, text, limits)
+    return existing_tree, student_tree, values, compact_student_tree
+
+
+def parse_batch_request(stream: BinaryIO, node_class: type[BinaryTreeNode], limits: TreeRequestLimits
+                        ) -> tuple[BinaryTreeNode | None, list[BinaryTreeNode | None | InvalidRequestError], list[int] | None]:
+    """Parses the JSON body of a batch grading request like parse_tree_request into the existing tree, the list of student trees
+    ("student_trees") and the values. A student tree which is invalid or exceeds the limits does not fail the request:
+    the InvalidRequestError describing the problem takes its place in the list, so the other student trees can still be graded.
+    Invalid JSON, invalid shared inputs, more than max_batch_size student trees and more than max_nodes nodes
+    in all student trees together raise an InvalidRequestError.
+    """
+    tokens = _JsonTokenizer(stream)
+    existing_tree = student_trees = values = None
+    for key, kind, text in _read_request_members(tokens):
+        if key == "existing_tree":
+            existing_tree = _parse_tree(tokens, kind, text, node_class, limits, "existing tree")
+        elif key == "student_trees":
+            student_trees = _parse_student_trees(tokens, kind, text, node_class, limits)
+        elif key == "values":
+            values = _parse_values(tokens, kind, text, limits)
+        else:
+            _skip_value(tokens, kind, text, limits)
+    if student_trees is None:
+        raise InvalidRequestError("student_trees must be a list of trees")
+    return existing_tree, student_trees, values
+
+
+def _read_request_members(tokens: _JsonTokenizer) -> Iterator[tuple[str, int, bytes]]:
+    # Yields the key and the first token of the value of each member of the request object.
+    # The value has to be read completely before the next member is requested.
+    kind, text = tokens.next_token()
+    if kind != _PUNCTUATION or text != b"{":
+        raise InvalidRequestError("Invalid JSON: The body must be an object")
+    kind, text = tokens.next_token()
+    if kind == _PUNCTUATION and text == b"}":
+        raise InvalidRequestError("Invalid JSON: The body must not be empty")
+    while True:
+        key = _read_key(tokens, kind, text)
+        kind, text = tokens.next_token()
+        yield key, kind, text
+        kind, text = tokens.next_token()
+        if kind == _PUNCTUATION and text == b",":
+            kind, text = tokens.next_token()
+        elif kind == _PUNCTUATION and text == b"}":
+            break
+        else:
+            raise tokens.create_error()
+    if tokens.next_token()[0] != _END:
+        raise tokens.create_error()
+
+
+def _parse_student_trees(tokens: _JsonTokenizer, kind: int, text: bytes, node_class: type[BinaryTreeNode],
+                         limits: TreeRequestLimits) -> list[BinaryTreeNode | None | InvalidRequestError]:
+    if kind != _PUNCTUATION or text != b"[":
+        raise InvalidRequestError("student_trees must be a list of trees")
+    student_trees = []
+    node_count = 0
+    kind, text = tokens.next_token()
+    if kind == _PUNCTUATION and text == b"]":
+        return student_trees
+    while True:
+        limits.check_batch_size(len(student_trees) + 1)
+        if kind == _END or (kind == _PUNCTUATION and text != b"{" and text != b"["):
+            raise tokens.create_error()
+        # Depth in front of the student tree, whose first token may already have opened an object or array.
+        depth = tokens.depth - (kind == _PUNCTUATION)
+        try:
+            student_tree = _parse_tree(tokens, kind, text, node_class, limits, "student tree")
+        except _InvalidJsonError:
+            raise
+        except InvalidRequestError as error:
+            tokens.skip_to_depth(depth)
+            student_trees.append(error)
+        else:
+            if student_tree is not None:
+                node_count += student_tree.get_size()
+                limits.check_node_count(node_count, "batch of student trees")
+            student_trees.append(student_tree)
+        kind, text = tokens.next_token()
+        if kind == _PUNCTUATION and text == b"]":
+            return student_trees
+        if kind != _PUNCTUATION or text != b",":
+            raise tokens.create_error()
+        kind, text = tokens.next_token()
+
+
+def _parse_tree(tokens: _JsonTokenizer, kind: int, text: bytes, node_class: type[BinaryTreeNode],
+                limits: TreeRequestLimits, name: str) -> BinaryTreeNode | None:
+    # (kind, text) is the first token of the tree.
+    if kind == _LITERAL and text == b"null":
+        return None
+    if kind == _STRING:
+        return _parse_compact_tree(_decode_string(tokens, text), node_class, limits, name)
+    if kind != _PUNCTUATION or text != b"{":
+        raise InvalidRequestError(f"{name.capitalize()} could not be parsed from JSON: A tree must be an object, a string or null")
+    red_black_tree = issubclass(node_class, RedBlackTreeNode)
+    node_count = 1
+    # Open node objects, whose nodes are created when they are closed: value, color, left and right child
+    # and whether the node is the left child of its parent.
+    frame = [_MISSING, _MISSING, None, None, None]
+    stack = [frame]
+    # Whether the first member of the current object is read (so the object may also end right away),
+    # a further member (after a comma) or the delimiter after a member.
+    state = _FIRST_MEMBER
+    while True:
+        close = False
+        if state == _DELIMITER:
+            kind, text = tokens.next_token()
+            if kind == _PUNCTUATION and text == b",":
+                state = _NEXT_MEMBER
+                continue
+            if kind != _PUNCTUATION or text != b"}":
+                raise tokens.create_error()
+            close = True
+        else:
+            match = tokens.match(_FAST_MEMBER)
+            if match is not None:
+                # The match may have consumed the bracket opening a child or closing the node.
+                if match.group(_FAST_CHILD) is not None:
+                    tokens.depth += 1
+                elif match.group(_FAST_DELIMITER) == b"}":
+                    tokens.depth -= 1
+                key = match.group(1)
+                if match.group(_FAST_CHILD) is not None:
+                    if key == b"value":
+                        raise InvalidRequestError(f"The {name} must only contain integer values")
+                    if key == b"color":
+                        raise InvalidRequestError(f"{name.capitalize()} could not be parsed from JSON: A color must be a string")
+                    node_count += 1
+                    limits.check_node_count(node_count, name)
+                    limits.check_depth(len(stack) + 1, name)
+                    frame = [_MISSING, _MISSING, None, None, key == b"left"]
+                    stack.append(frame)
+                    state = _FIRST_MEMBER
+                    continue
+                if key == b"value":
+                    if match.group(_FAST_NUMBER) is None:
+                        raise InvalidRequestError(f"The {name} must only contain integer values")
+                    frame[0] = _convert_integer(match.group(_FAST_NUMBER), limits, name)
+                elif key == b"color":
+                    if match.group(_FAST_COLOR) is None:
+                        raise InvalidRequestError(f"{name.capitalize()} could not be parsed from JSON: A color must be a string")
+                    frame[1] = match.group(_FAST_COLOR).decode()
+                elif match.group(_FAST_NULL) is not None:
+                    frame[2 if key == b"left" else 3] = None
+                else:
+                    raise InvalidRequestError(f"{name.capitalize()} could not be parsed from JSON: A child must be an object or null")
+                if match.group(_FAST_DELIMITER) == b",":
+                    state = _NEXT_MEMBER
+                    continue
+                close = True
+            else:
+                kind, text = tokens.next_token()
+                if state == _FIRST_MEMBER and kind == _PUNCTUATION and text == b"}":
+                    close = True
+                else:
+                    key = _read_key(tokens, kind, text)
+                    kind, text = tokens.next_token()
+                    state = _DELIMITER
+                    if key == "value":
+                        frame[0] = _read_integer(tokens, kind, text, limits, name)
+                    elif key == "color":
+                        if kind != _STRING:
+                            raise InvalidRequestError(f"{name.capitalize()} could not be parsed from JSON: A color must be a string")
+                        frame[1] = _decode_string(tokens, text)
+                    elif key == "left" or key == "right":
+                        if kind == _PUNCTUATION and text == b"{":
+                            node_count += 1
+                            limits.check_node_count(node_count, name)
+                            limits.check_depth(len(stack) + 1, name)
+                            frame = [_MISSING, _MISSING, None, None, key == "left"]
+                            stack.append(frame)
+                            state = _FIRST_MEMBER
+                        elif kind == _LITERAL and text == b"null":
+                            frame[2 if key == "left" else 3] = None
+                        else:
+                            raise InvalidRequestError(f"{name.capitalize()} could not be parsed from JSON: A child must be an object or null")
+                    else:
+                        _skip_value(tokens, kind, text, limits)
+        if close:
+            node = _create_node(frame, node_class, red_black_tree, name)
+            stack.pop()
+            if not stack:
+                return node
+            is_left_child = frame[4]
+            frame = stack[-1]
+            frame[2 if is_left_child else 3] = node
+            state = _DELIMITER
+
+
+def _create_node(frame: list, node_class: type[BinaryTreeNode], red_black_tree: bool, name: str) -> BinaryTreeNode:
+    value, color, left, right, _ = frame
+    if value is _MISSING:
+        raise InvalidRequestError(f"{name.capitalize()} could not be parsed from JSON: Each node must have a 'value' key")
+    if red_black_tree:
+        if color is _MISSING:
+            raise InvalidRequestError(f"{name.capitalize()} could not be parsed from JSON: RedBlackTreeNode requires a 'color' key")
+        try:
+            node = node_class(value, color)
+        except ValueError as error:
+            raise InvalidRequestError(f"{name.capitalize()} could not be parsed from JSON: {error}") from None
+    elif color is not _MISSING:
+        raise InvalidRequestError(f"{name.capitalize()} could not be parsed from JSON: BinaryTreeNode does not accept a 'color' attribute")
+    else:
+        node = node_class(value)
+    # The children were created by the same class, so the type checks of the setters can be skipped.
+    if left is not None:
+        node._left = left
+        left._parent = node
+    if right is not None:
+        node._right = right
+        right._parent = node
+    return node
+
+
+def _parse_compact_tree(text: str, node_class: type[BinaryTreeNode], limits: TreeRequestLimits, name: str) -> BinaryTreeNode | None:
+    try:
+        data = b64decode(text, validate=True)
+        root, end = _decode_tree(data, 0, node_class, limits, name)
+        if end != len(data):
+            raise ValueError("Invalid tree encoding: Unexpected data after the tree")
+    except InvalidRequestError:
+        raise
+    except ValueError as error:
+        raise InvalidRequestError(f"{name.capitalize()} could not be parsed from JSON: {error}") from None
+    return root
+
+
+def _parse_values(tokens: _JsonTokenizer, kind: int, text: bytes, limits: TreeRequestLimits) -> list[int] | None:
+    if kind == _LITERAL and text == b"null":
+        return None
+    if kind != _PUNCTUATION or text != b"[":
+        raise InvalidRequestError("The list of values must be a list of integers")
+    values = []
+    kind, text = tokens.next_token()
+    if kind == _PUNCTUATION and text == b"]":
+        return values
+    while True:
+        values.append(_read_integer(tokens, kind, text, limits, "list of values"))
+        if len(values) > limits.max_nodes:
+            raise InvalidRequestError(f"The list of values must not contain more than {limits.max_nodes} values")
+        kind, text = tokens.next_token()
+        if kind == _PUNCTUATION and text == b"]":
+            return values
+        if kind != _PUNCTUATION or text != b",":
+            raise tokens.create_error()
+        kind, text = tokens.next_token()
+
+
+def _read_integer(tokens: _JsonTokenizer, kind: int, text: bytes, limits: TreeRequestLimits, name: str) -> int:
+    # An array or object in place of the integer is valid JSON, so only this tree or field is invalid.
+    # Its brackets were counted in tokens.depth, so the batch parser can skip the rest of the student tree.
+    if kind != _NUMBER:
+        if kind == _END or (kind == _PUNCTUATION and text != b"{" and text != b"["):
+            raise tokens.create_error()
+        raise InvalidRequestError(f"The {name} must only contain integer values")
+    if b"." in text or b"e" in text or b"E" in text:
+        raise InvalidRequestError(f"The {name} must only contain integer values")
+    return _convert_integer(text, limits, name)
+
+
+def _convert_integer(text: bytes, limits: TreeRequestLimits, name: str) -> int:
+    if len(text) > limits.max_value_length:
+        raise limits.create_value_error(name)
+    value = int(text)
+    if not limits.min_value <= value <= limits.max_value:
+        raise limits.create_value_error(name)
+    return value
+
+
+def _read_key(tokens: _JsonTokenizer, kind: int, text: bytes) -> str:
+    # Reads a key of an object and the colon after it.
+    if kind != _STRING:
+        raise tokens.create_error()
+    key = _decode_string(tokens, text)
+    kind, text = tokens.next_token()
+    if kind != _PUNCTUATION or text != b":":
+        raise tokens.create_error()
+    return key
+
+
+def _decode_string(tokens: _JsonTokenizer, text: bytes) -> str:
+    try:
+        if b"\\" not in text:
+            return text.decode()
+        return json.loads(b'"' + text + b'"')
+    except ValueError:
+        raise tokens.create_error() from None
+
+
+def _skip_value(tokens: _JsonTokenizer, kind: int, text: bytes, limits: TreeRequestLimits):
+    """Reads a value which is not used (e.g. an unknown field) without creating it. Nesting is limited like the depth of the trees.
+    """
+    # Closing brackets of the open arrays and objects.
+    closing_brackets = []
+    while True:
+        # (kind, text) is the first token of a value.
+        if kind == _PUNCTUATION and (text == b"{" or text == b"["):
+            if len(closing_brackets) >= limits.max_depth:
+                raise InvalidRequestError(f"The request is nested deeper than {limits.max_depth} levels")
+            closing_brackets.append(b"}" if text == b"{" else b"]")
+            kind, text = tokens.next_token()
+            if kind == _PUNCTUATION and text == closing_brackets[-1]:
+                closing_brackets.pop()
+            else:
+                if closing_brackets[-1] == b"}":
+                    _read_key(tokens, kind, text)
+                    kind, text = tokens.next_token()
+                continue
+        elif kind == _PUNCTUATION or kind == _END:
+            raise tokens.create_error()
+        # After a value follows the next element, the end of the enclosing array or object or nothing at the top level.
+        while closing_brackets:
+            kind, text = tokens.next_token()
+            if kind == _PUNCTUATION and text == b",":
+                kind, text = tokens.next_token()
+                if closing_brackets[-1] == b"}":
+                    _read_key(tokens, kind, text)
+                    kind, text = tokens.next_token()
+                break
+            if kind != _PUNCTUATION or text != closing_brackets[-1]:
+                raise tokens.create_error()
+            closing_brackets.pop()
+        else:
+            return
@@ -0,0 +1,159 @@
+from __future__ import annotations
+from base64 import b64encode
+from collections import OrderedDict
+from collections.abc import Callable
+from threading import Lock
+from time import monotonic
+from binarytrees import BinaryTreeNode, CompactBinaryTree
+from binarytrees._classes.CompactBinaryTree import NO_NODE
+from evaluation.metrics import time_phase
+
+
+class CachedSolution:
+    """Reference solution stored in a SolutionCache.
+    The solution is kept as an immutable CompactBinaryTree together with its serialized JSON text.
+    Every call to get_tree() or to_dict() hands out a fresh copy, so callers cannot corrupt the cached solution.
+    """
+
+    __slots__ = ("_compact_tree", "_json", "_base64")
+
+    def __init__(self, solution: BinaryTreeNode | None):
+        self._compact_tree = CompactBinaryTree.from_node(solution)
+        self._json = _serialize_compact_tree(self._compact_tree)
+        self._base64 = None
+
+    @classmethod
+    def from_compact_tree(cls, compact_tree: CompactBinaryTree) -> CachedSolution:
+        """Creates the solution directly from a compact tree (e.g. one read from an exercise bank), without building nodes.
+        """
+        solution = cls.__new__(cls)
+        solution._compact_tree = compact_tree
+        solution._json = _serialize_compact_tree(compact_tree)
+        solution._base64 = None
+        return solution
+
+    def __repr__(self) -> str:
+        return f"CachedSolution[{len(self._compact_tree)} nodes]"
+
+    def get_tree(self) -> BinaryTreeNode | None:
+        """Returns a new copy of the solution tree, which can be modified freely.
+        """
+        return self._compact_tree.to_node()
+
+    def to_dict(self) -> dict[str, any] | None:
+        """Returns a new copy of the solution in the same format as BinaryTreeNode.to_dict().
+        """
+        return self._compact_tree.to_dict()
+
+    def to_json(self) -> str:
+        """Returns the solution as JSON text (keys sorted like in Flask's jsonify). The text is only created once.
+        """
+        return self._json
+
+    def to_base64(self) -> str:
+        """Returns the solution in the compact binary format (see CompactBinaryTree.to_bytes) as Base64 text.
+        The text is only created on the first call.
+        """
+        if self._base64 is None:
+            self._base64 = b64encode(self._compact_tree.to_bytes()).decode("ascii")
+        return self._base64
+
+
+class SolutionCache:
+    """Bounded LRU cache with optional time to live for reference solutions.
+    Solutions are keyed by the task name, the structural digest of the existing tree and the values,
+    so every request for the same exercise instance reuses the same solution.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float | None = 3600):
+        if max_entries < 1:
+            raise ValueError("The cache must be able to hold at least one entry")
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple, tuple[float | None, CachedSolution]] = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get_or_compute(self, task: str, existing_tree: BinaryTreeNode | None, values: list[int] | None,
+                       compute_solution: Callable[[BinaryTreeNode | None, list[int] | None], BinaryTreeNode | None]) -> CachedSolution:
+        """Returns the cached solution for the task instance or computes and caches it.
+        compute_solution is called with a copy of existing_tree and the values, so it may modify the tree in place.
+        """
+        key = self.create_key(task, existing_tree, values)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, solution = entry
+                if expires_at is None or monotonic() < expires_at:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return solution
+                del self._entries[key]
+                self._expirations += 1
+            self._misses += 1
+        # The solution is computed outside of the lock, so that other task instances are not blocked meanwhile.
+        with time_phase("solution"):
+            existing_tree_copy = CompactBinaryTree.from_node(existing_tree).to_node()
+            solution = CachedSolution(compute_solution(existing_tree_copy, values))
+        expires_at = monotonic() + self._ttl_seconds if self._ttl_seconds is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, solution)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return solution
+
+    @staticmethod
+    def create_key(task: str, existing_tree: BinaryTreeNode | None, values: list[int] | None) -> tuple:
+        """Creates the canonical cache key of a task instance.
+        """
+        if existing_tree is None:
+            tree_key = None
+        else:
+            tree_key = (type(existing_tree).__name__, existing_tree.get_structural_digest())
+        values_key = tuple(values) if values is not None else None
+        return (task, tree_key, values_key)
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "size": len(self._entries),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _serialize_compact_tree(tree: CompactBinaryTree) -> str:
+    # Emits the JSON text with an explicit stack, so that the depth of the tree does not matter.
+    if len(tree) == 0:
+        return "null"
+    parts = []
+    stack: list[int | str] = [0]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            parts.append(item)
+        elif item == NO_NODE:
+            parts.append("null")
+        else:
+            color = tree.get_color(item)
+            parts.append(f'{{"color":"{color.value}","left":' if color is not None else '{"left":')
+            stack.append(f',"value":{tree.get_value(item)}}}')
+            stack.append(tree.get_right_child(item))
+            stack.append(',"right":')
+            stack.append(tree.get_left_child(item))
+    return "".join(parts)
+
+
+# Cache shared by all evaluation functions of this process.
+solution_cache = SolutionCache()
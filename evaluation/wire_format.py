@@ -0,0 +1,64 @@
+from __future__ import annotations
+import struct
+import sys
+from array import array
+from binarytrees import BinaryTreeNode, CompactBinaryTree, RedBlackTreeNode
+from evaluation.request_limits import InvalidRequestError, TreeRequestLimits
+
+# Content type of request bodies containing the trees and values in the compact binary format.
+COMPACT_REQUEST_MIMETYPE = "application/x-compact-trees"
+
+_VALUE_COUNT = struct.Struct("<I")
+
+
+def parse_compact_request(body: bytes, node_class: type[BinaryTreeNode], limits: TreeRequestLimits | None = None
+                          ) -> tuple[BinaryTreeNode | None, BinaryTreeNode | None, list[int]]:
+    """Parses a request body of the content type COMPACT_REQUEST_MIMETYPE into the existing tree, the student tree and the values.
+    The body consists of the existing tree and the student tree in the compact binary format (an empty tree stands for None),
+    followed by the number of values as unsigned 32-bit integer and the values as signed 64-bit integers (all little-endian).
+    Invalid bodies raise a ValueError, bodies exceeding the limits an InvalidRequestError (a subclass of it).
+    """
+    existing_tree, offset = _decode_tree(body, 0, node_class, limits, "existing tree")
+    student_tree, offset = _decode_tree(body, offset, node_class, limits, "student tree")
+    if len(body) - offset < _VALUE_COUNT.size:
+        raise ValueError("Invalid request encoding: The values are missing")
+    (count,) = _VALUE_COUNT.unpack_from(body, offset)
+    offset += _VALUE_COUNT.size
+    if len(body) - offset != 8 * count:
+        raise ValueError("Invalid request encoding: The number of values does not match the data")
+    if limits is not None and count > limits.max_nodes:
+        raise InvalidRequestError(f"The list of values must not contain more than {limits.max_nodes} values")
+    values = array("q")
+    values.frombytes(body[offset:])
+    if sys.byteorder == "big":
+        values.byteswap()
+    if limits is not None and count > 0 and (min(values) < limits.min_value or max(values) > limits.max_value):
+        raise limits.create_value_error("list of values")
+    return existing_tree, student_tree, values.tolist()
+
+
+def encode_compact_request(existing_tree: BinaryTreeNode | None, student_tree: BinaryTreeNode | None, values: list[int] | None) -> bytes:
+    """Creates a request body in the format read by parse_compact_request, e.g. for clients and tests.
+    """
+    values = array("q", values or [])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return b"".join([CompactBinaryTree.from_node(existing_tree).to_bytes(), CompactBinaryTree.from_node(student_tree).to_bytes(),
+                     _VALUE_COUNT.pack(len(values)), values.tobytes()])
+
+
+def _decode_tree(body: bytes, offset: int, node_class: type[BinaryTreeNode], limits: TreeRequestLimits | None,
+                 name: str) -> tuple[BinaryTreeNode | None, int]:
+    if limits is not None:
+        limits.check_node_count(CompactBinaryTree.read_node_count(body, offset), name)
+    tree, offset = CompactBinaryTree.decode_from(body, offset)
+    if limits is not None:
+        limits.check_compact_tree(tree, name)
+    if len(tree) == 0:
+        return None, offset
+    if tree.is_red_black_tree() != issubclass(node_class, RedBlackTreeNode):
+        raise ValueError(f"Invalid request encoding: The trees must {'not ' if tree.is_red_black_tree() else ''}be colored")
+    root = tree.to_node()
+    if limits is not None:
+        limits.check_depth(root.get_height(), name)
+    return root, offset
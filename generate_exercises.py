@@ -0,0 +1,56 @@
+"""Generates the exercise instances of an exam and writes them with their reference solutions to a bank file.
+The instances are generated from a seed, so the same arguments always result in the same bank.
+The solutions are computed in worker processes, one per core by default.
+
+Run from the repository root, e.g. 1000 instances of each task with 15 nodes:
+> python generate_exercises.py exam.bank --count 1000 --size 15
+
+Serve the bank by starting the server with EXERCISE_BANK=exam.bank.
+"""
+
+import argparse
+import json
+import sys
+import time
+from evaluation.exercise_bank import EXERCISE_TASKS
+from evaluation.exercise_generator import build_exercise_bank, generate_exercise_instances
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", help="bank file to write")
+    parser.add_argument("--tasks", nargs="+", choices=EXERCISE_TASKS, default=list(EXERCISE_TASKS),
+                        help="tasks to generate instances of (default: all)")
+    parser.add_argument("--count", type=int, default=1000, help="number of instances per task (default: 1000)")
+    parser.add_argument("--size", type=int, default=15, help="number of nodes of the existing trees (default: 15)")
+    parser.add_argument("--values", type=int, default=3, help="number of values to insert (default: 3)")
+    parser.add_argument("--rotations", type=int,
+                        help="number of rotations the solutions of the red-black tree tasks need (default: any)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generator")
+    parser.add_argument("--workers", type=int, help="number of worker processes computing the solutions (default: one per core)")
+    arguments = parser.parse_args()
+
+    start = time.perf_counter()
+    instances = []
+    try:
+        for task in arguments.tasks:
+            # Binary search trees are never rotated, so their instances are generated without the number of rotations.
+            rotations = arguments.rotations if task != "insert_into_binary_search_tree" else None
+            instances.extend(generate_exercise_instances(task, arguments.count, arguments.size, arguments.values, rotations,
+                                                         arguments.seed, first_instance_id=len(instances)))
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    generated = time.perf_counter()
+    build_exercise_bank(arguments.output, instances, arguments.workers)
+    print(json.dumps({
+        "output": arguments.output,
+        "instances": len(instances),
+        "generation_seconds": round(generated - start, 3),
+        "solution_seconds": round(time.perf_counter() - generated, 3),
+    }, indent=4))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""Production entry point of the grading service.
+Serves app.py with the pre-fork server Gunicorn instead of Flask's single process development server:
+SERVER_WORKERS processes (default: 2) each handle up to SERVER_THREADS requests at once (default: 8).
+Each server process creates its own evaluation executor after it has been forked, so with EVALUATION_WORKERS
+the CPU-heavy grading runs in worker processes while the server threads only parse and answer requests.
+
+Run from the repository root:
+> python serve.py
+
+Gunicorn is not available on Windows. There the app is served by the threaded development server instead.
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def get_server_options() -> dict[str, any]:
+    """Reads the options of the server from the environment variables SERVER_BIND (default: 127.0.0.1:5000),
+    SERVER_WORKERS, SERVER_THREADS, SERVER_BACKLOG (connections waiting to be accepted, default: 64)
+    and SERVER_TIMEOUT (seconds after which a request which does not finish is aborted, default: 60).
+    """
+    return {
+        "bind": os.environ.get("SERVER_BIND", "127.0.0.1:5000"),
+        "workers": int(os.environ.get("SERVER_WORKERS", "2")),
+        "threads": int(os.environ.get("SERVER_THREADS", "8")),
+        "worker_class": "gthread",
+        "backlog": int(os.environ.get("SERVER_BACKLOG", "64")),
+        "timeout": int(os.environ.get("SERVER_TIMEOUT", "60")),
+    }
+
+
+def main():
+    options = get_server_options()
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        logging.basicConfig(level=logging.INFO)
+        logger.warning("Gunicorn is not installed, falling back to the threaded development server")
+        from app import app
+        host, _, port = options["bind"].rpartition(":")
+        app.run(host=host, port=int(port), threaded=True)
+        return
+
+    class GradingServer(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            # Imported in every server process after forking, so that process pools and locks are not shared between them.
+            from app import app
+            return app
+
+    GradingServer().run()
+
+
+if __name__ == "__main__":
+    main()
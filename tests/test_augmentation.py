@@ -0,0 +1,53 @@
+import random
+import unittest
+from binarytrees import (BinaryTreeNode, delete_from_red_black_tree, delete_values_from_binary_search_tree,
+                         delete_values_from_red_black_tree, insert_into_binary_search_tree, insert_into_red_black_tree,
+                         insert_values_into_binary_search_tree, insert_values_into_red_black_tree, replay_tree_operation_steps)
+from binarytrees._augmentation.subtree_statistics import compute_subtree_statistics
+
+
+class AugmentationTest(unittest.TestCase):
+
+    def assert_augmentation_up_to_date(self, root: BinaryTreeNode):
+        for node in root.iter_preorder():
+            self.assertTrue(node.is_augmented())
+            self.assertEqual(node._augmentation, compute_subtree_statistics(node, False))
+
+    def test_operations_keep_statistics_up_to_date(self):
+        generator = random.Random(3)
+        root = insert_values_into_red_black_tree(None, generator.sample(range(200), 50))
+        root.enable_augmentation()
+        for _ in range(300):
+            value = generator.randrange(200)
+            if generator.random() < 0.5:
+                root = insert_into_red_black_tree(root, value)
+            else:
+                root = delete_from_red_black_tree(root, value)
+            self.assert_augmentation_up_to_date(root)
+
+    def test_emptied_tree_is_no_longer_augmented(self):
+        root = insert_values_into_binary_search_tree(None, [5, 3, 8])
+        root.enable_augmentation()
+        root = delete_values_from_binary_search_tree(root, [5, 3, 8])
+        self.assertIsNone(root)
+        root = insert_into_binary_search_tree(root, 4)
+        self.assertFalse(root.is_augmented())
+        root.enable_augmentation()
+        root = insert_into_binary_search_tree(root, 6)
+        self.assert_augmentation_up_to_date(root)
+
+    def test_replay_keeps_augmentation_of_emptied_tree(self):
+        root = insert_values_into_red_black_tree(None, [5, 3, 8])
+        trace = []
+        root = delete_values_from_red_black_tree(root, [5, 3, 8], trace)
+        insert_values_into_red_black_tree(root, [1, 2, 3, 4], trace)
+        replayed_root = insert_values_into_red_black_tree(None, [5, 3, 8])
+        replayed_root.enable_augmentation()
+        for replayed_root in replay_tree_operation_steps(replayed_root, trace):
+            if replayed_root is not None:
+                self.assert_augmentation_up_to_date(replayed_root)
+        self.assertEqual(replayed_root.get_size(), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
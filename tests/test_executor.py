@@ -0,0 +1,36 @@
+import unittest
+from binarytrees import insert_values_into_red_black_tree
+from evaluation import InlineEvaluationExecutor, ProcessPoolEvaluationExecutor
+from evaluation.executor import _decode_shared_tree, _encode_shared_tree
+
+
+def get_tree_identity(existing_tree, values, student_tree):
+    return id(existing_tree), "", None
+
+
+class SharedTreeTest(unittest.TestCase):
+
+    def test_worker_reuses_rebuilt_existing_tree(self):
+        tree = insert_values_into_red_black_tree(None, range(20))
+        data = _encode_shared_tree(tree)
+        rebuilt_tree = _decode_shared_tree(data)
+        self.assertTrue(rebuilt_tree.is_equal_including_subtrees(tree))
+        self.assertIs(_decode_shared_tree(_encode_shared_tree(tree)), rebuilt_tree)
+        rebuilt_tree.get_left_child().set_value(100)
+        self.assertTrue(_decode_shared_tree(data).is_equal_including_subtrees(tree))
+        self.assertIsNone(_decode_shared_tree(_encode_shared_tree(None)))
+
+    def test_batch_shares_existing_tree(self):
+        tree = insert_values_into_red_black_tree(None, range(20))
+        results = list(InlineEvaluationExecutor().evaluate_many(get_tree_identity, tree, None, [None] * 3))
+        self.assertEqual({result[0] for result in results}, {id(tree)})
+        executor = ProcessPoolEvaluationExecutor(max_workers=1)
+        try:
+            results = list(executor.evaluate_many(get_tree_identity, tree, None, [None] * 5))
+        finally:
+            executor.shutdown()
+        self.assertEqual(len({result[0] for result in results}), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import os
+import tempfile
+import unittest
+from binarytrees import RenderCache
+
+
+class RenderCacheTest(unittest.TestCase):
+
+    def test_disk_tier_evicts_least_recently_used_images(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # An image of an earlier run, which counts towards the limit as well.
+            with open(os.path.join(directory, "old.b64"), "w", encoding="ascii") as f:
+                f.write("x" * 400)
+            os.utime(os.path.join(directory, "old.b64"), (0, 0))
+            cache = RenderCache(max_entries=0, directory=directory, max_disk_bytes=1000)
+            for index in range(3):
+                cache.get_or_render(f"key{index}", lambda: "y" * 200)
+            self.assertEqual(cache.get_stats()["disk_evictions"], 0)
+            os.utime(os.path.join(directory, "key0.b64"), (1, 1))
+            self.assertEqual(cache.get_or_render("key0", lambda: self.fail("Rendered again")), "y" * 200)
+            cache.get_or_render("key3", lambda: "y" * 300)
+            self.assertEqual(sorted(os.listdir(directory)), ["key0.b64", "key2.b64", "key3.b64"])
+            self.assertEqual(cache.get_stats()["disk_evictions"], 2)
+            self.assertEqual(cache.get_stats()["disk_hits"], 1)
+
+    def test_disk_tier_without_limit(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = RenderCache(max_entries=0, directory=directory, max_disk_bytes=None)
+            for index in range(5):
+                cache.get_or_render(f"key{index}", lambda: "y" * 1000)
+            self.assertEqual(len(os.listdir(directory)), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import io
+import json
+import unittest
+from binarytrees import BinaryTreeNode
+from evaluation import InvalidRequestError, TreeRequestLimits, parse_batch_request, parse_tree_request
+
+
+def create_stream(body: str | dict) -> io.BytesIO:
+    return io.BytesIO((body if isinstance(body, str) else json.dumps(body)).encode())
+
+
+class TrickleStream(io.BytesIO):
+    # Returns at most chunk_size bytes per read, like a request body arriving in small pieces.
+
+    def __init__(self, body: bytes, chunk_size: int):
+        super().__init__(body)
+        self._chunk_size = chunk_size
+
+    def read(self, size: int = -1) -> bytes:
+        return super().read(self._chunk_size)
+
+
+def create_nested_tree(depth: int) -> str:
+    return "".join(f'{{"value": {value}, "left": ' for value in range(depth)) + "null" + ', "right": null}' * depth
+
+
+class BatchRequestParserTest(unittest.TestCase):
+
+    def test_invalid_student_trees_do_not_fail_the_batch(self):
+        body = ('{"existing_tree": {"value": 5}, "values": [3], "student_trees": ['
+                f'{create_nested_tree(50000)}, {{"value": 5, "left": null}}, {{"valu": 1}},'
+                '{"value": "x", "left": {"value": 2, "left": [1, {"a": [2]}]}}, "!", null]}')
+        existing_tree, student_trees, values = parse_batch_request(create_stream(body), BinaryTreeNode, TreeRequestLimits())
+        self.assertEqual(existing_tree.get_value(), 5)
+        self.assertEqual(values, [3])
+        self.assertEqual(len(student_trees), 6)
+        self.assertEqual(str(student_trees[0]), "The student tree has more than 10000 levels")
+        self.assertEqual(student_trees[1].get_value(), 5)
+        for index in (2, 3, 4):
+            self.assertIsInstance(student_trees[index], InvalidRequestError)
+        self.assertIsNone(student_trees[5])
+
+    def test_limits_of_the_batch(self):
+        limits = TreeRequestLimits(max_nodes=10, max_batch_size=3)
+        leaf = {"value": 1}
+        for body in ({"student_trees": [None] * 4}, {"student_trees": [{"value": 1, "left": leaf, "right": leaf}] * 3 + [leaf]},
+                     {"student_trees": 5}, {"values": [1]}, [1], '{"student_trees": [1,]}',
+                     '{"student_trees": [{"value": 1, "left": {"value": 2 ]}]}'):
+            with self.assertRaises(InvalidRequestError):
+                parse_batch_request(create_stream(body), BinaryTreeNode, limits)
+
+    def test_wrongly_typed_values_only_fail_their_student_tree(self):
+        body = ('{"student_trees": [{"value": [1]}, {"value": 1, "left": {"value": {"a": 1}}}, {"value": true}, {"value": 2}],'
+                '"values": [1]}')
+        _, student_trees, values = parse_batch_request(create_stream(body), BinaryTreeNode, TreeRequestLimits())
+        for index in (0, 1, 2):
+            self.assertEqual(str(student_trees[index]), "The student tree must only contain integer values")
+        self.assertEqual(student_trees[3].get_value(), 2)
+        self.assertEqual(values, [1])
+        with self.assertRaisesRegex(InvalidRequestError, "^The list of values must only contain integer values$"):
+            parse_tree_request(create_stream('{"values": [1, [2]]}'), BinaryTreeNode, TreeRequestLimits())
+
+    def test_tokens_split_across_reads(self):
+        body = json.dumps({"weight": 1.5, "scale": -2.5e-3, "flags": [True, False, None, "a\\\"b"], "values": [3, 12345],
+                           "existing_tree": {"value": 20, "left": {"value": -7}, "right": None}, "student_tree": None,
+                           "exponents": [1e5, 1E+5, 10, 0]}).encode()
+        for chunk_size in (1, 2, 3, 5, 7):
+            existing_tree, student_tree, values, _ = parse_tree_request(TrickleStream(body, chunk_size), BinaryTreeNode,
+                                                                        TreeRequestLimits())
+            self.assertEqual(existing_tree.to_dict(), {"value": 20, "left": {"value": -7, "left": None, "right": None}, "right": None})
+            self.assertIsNone(student_tree)
+            self.assertEqual(values, [3, 12345])
+        for body in (b'{"values": [1.]}', b'{"values": [1e]}', b'{"values": [1-2]}'):
+            with self.assertRaisesRegex(InvalidRequestError, "^Invalid JSON at byte"):
+                parse_tree_request(TrickleStream(body, 1), BinaryTreeNode, TreeRequestLimits())
+
+    def test_single_request(self):
+        body = {"existing_tree": {"value": 2, "left": {"value": 1}}, "student_tree": None, "values": [3], "other": [{}]}
+        existing_tree, student_tree, values, compact = parse_tree_request(create_stream(body), BinaryTreeNode, TreeRequestLimits())
+        self.assertEqual(existing_tree.get_left_child().get_value(), 1)
+        self.assertIsNone(student_tree)
+        self.assertEqual(values, [3])
+        self.assertFalse(compact)
+
+
+if __name__ == "__main__":
+    unittest.main()
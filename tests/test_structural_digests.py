@@ -0,0 +1,45 @@
+import unittest
+from binarytrees import BinaryTreeNode, RedBlackTreeNode
+
+
+class StructuralDigestTest(unittest.TestCase):
+
+    def test_changes_below_children_attached_by_setters(self):
+        root, other_root = BinaryTreeNode(5), BinaryTreeNode(5)
+        child, other_child = BinaryTreeNode(3), BinaryTreeNode(3)
+        root.set_left_child(child)
+        other_root.set_left_child(other_child)
+        self.assertTrue(root.is_equal_including_subtrees(other_root))
+        child.set_value(99)
+        self.assertFalse(root.is_equal_including_subtrees(other_root))
+        grandchild = BinaryTreeNode(1)
+        other_child.set_value(99)
+        other_child.set_right_child(grandchild)
+        self.assertFalse(root.is_equal_including_subtrees(other_root))
+        grandchild.set_value(2)
+        child.set_right_child(BinaryTreeNode(2))
+        self.assertTrue(root.is_equal_including_subtrees(other_root))
+        self.assertEqual(root.get_structural_digest(), other_root.get_structural_digest())
+
+    def test_changes_below_children_passed_to_constructor(self):
+        child = RedBlackTreeNode(3, "RED")
+        root = RedBlackTreeNode(5, "BLACK", child, RedBlackTreeNode(8, "RED"))
+        other_root = RedBlackTreeNode(5, "BLACK", RedBlackTreeNode(3, "RED"), RedBlackTreeNode(8, "RED"))
+        self.assertTrue(root.is_equal_including_subtrees(other_root))
+        child.set_color("BLACK")
+        self.assertFalse(root.is_equal_including_subtrees(other_root))
+        self.assertFalse(root.is_valid())
+
+    def test_detached_child_no_longer_invalidates_its_former_parent(self):
+        child = BinaryTreeNode(3)
+        root = BinaryTreeNode(5, child)
+        root.set_left_child(None)
+        self.assertIsNone(child.get_parent())
+        digest = root.get_structural_digest()
+        child.set_value(4)
+        self.assertEqual(root.get_structural_digest(), digest)
+        self.assertEqual(root.get_structural_digest(), BinaryTreeNode(5).get_structural_digest())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import random
+import unittest
+from functools import lru_cache
+from binarytrees import (BinaryTreeNode, compute_tree_edit_distance, insert_values_into_binary_search_tree,
+                         insert_values_into_red_black_tree)
+from binarytrees._comparison.tree_edit_distance import DEFAULT_RECOLOR_COST
+
+
+def compute_unrestricted_distance(tree: BinaryTreeNode | None, other_tree: BinaryTreeNode | None) -> float:
+    # Direct recursion over the forests of the trees (without any restriction of the compared node pairs).
+    def convert(node, side):
+        if node is None:
+            return None
+        children = tuple(child for child in (convert(node._left, "left"), convert(node._right, "right")) if child is not None)
+        return node._value, getattr(node, "_color", None), side, children
+
+    def count_nodes(forest):
+        return sum(1 + count_nodes(subtree[3]) for subtree in forest)
+
+    def get_relabel_cost(subtree, other_subtree):
+        cost = 1.0 if subtree[2] is not None and other_subtree[2] is not None and subtree[2] != other_subtree[2] else 0.0
+        cost += 1.0 if subtree[0] != other_subtree[0] else 0.0
+        return cost + (DEFAULT_RECOLOR_COST if subtree[1] is not other_subtree[1] else 0.0)
+
+    @lru_cache(maxsize=None)
+    def compute_forest_distance(forest, other_forest):
+        if not forest or not other_forest:
+            return float(count_nodes(forest) + count_nodes(other_forest))
+        last, other_last = forest[-1], other_forest[-1]
+        return min(compute_forest_distance(forest[:-1] + last[3], other_forest) + 1.0,
+                   compute_forest_distance(forest, other_forest[:-1] + other_last[3]) + 1.0,
+                   compute_forest_distance(last[3], other_last[3]) + compute_forest_distance(forest[:-1], other_forest[:-1])
+                   + get_relabel_cost(last, other_last))
+
+    root, other_root = convert(tree, None), convert(other_tree, None)
+    return compute_forest_distance((root,) if root is not None else (), (other_root,) if other_root is not None else ())
+
+
+def create_random_tree_pairs(count: int, seed: int):
+    generator = random.Random(seed)
+    for _ in range(count):
+        insert_values = generator.choice([insert_values_into_binary_search_tree, insert_values_into_red_black_tree])
+        values = generator.sample(range(15), generator.randint(0, 9))
+        other_values = values.copy()
+        for _ in range(generator.randint(0, 3)):
+            choice = generator.random()
+            if choice < 0.4 and other_values:
+                other_values.pop(generator.randrange(len(other_values)))
+            elif choice < 0.8:
+                value = generator.choice([value for value in range(15) if value not in other_values])
+                other_values.insert(generator.randrange(len(other_values) + 1), value)
+            else:
+                generator.shuffle(other_values)
+        yield insert_values(None, values), insert_values(None, other_values)
+
+
+class TreeEditDistanceTest(unittest.TestCase):
+
+    def test_distance_of_subtrees_occurring_elsewhere(self):
+        tree = insert_values_into_binary_search_tree(None, [10, 5, 1, 7, 3, 11, 8])
+        other_tree = insert_values_into_binary_search_tree(None, [5, 1, 7, 3, 11])
+        self.assertEqual(compute_tree_edit_distance(tree, other_tree)[0], 3.0)
+
+    def test_distance_matches_unrestricted_distance(self):
+        for tree, other_tree in create_random_tree_pairs(2000, seed=5):
+            distance, edits = compute_tree_edit_distance(tree, other_tree)
+            self.assertAlmostEqual(distance, compute_unrestricted_distance(tree, other_tree))
+            self.assertAlmostEqual(sum(edit.cost for edit in edits), distance)
+
+    def test_max_distance(self):
+        for tree, other_tree in create_random_tree_pairs(500, seed=7):
+            distance = compute_unrestricted_distance(tree, other_tree)
+            for max_distance in (0.0, 1.0, 2.5, 4.0):
+                expected = distance if distance <= max_distance else float("inf")
+                self.assertAlmostEqual(compute_tree_edit_distance(tree, other_tree, max_distance=max_distance)[0], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()